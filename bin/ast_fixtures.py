@@ -0,0 +1,227 @@
+"""
+Recorded Markdown ASTs, so that the lesson checks can be tested without
+running the Ruby parser.  Each AST is stored as gzipped JSON in a file
+named after the SHA-256 hash of the text that was parsed, so a recording
+is only found for exactly the text it was made from.
+
+Re-record after changing the test lesson in 'fixtures/lesson' (or after
+upgrading the parser) with "make test-fixtures".  Where the parser's gems
+are installed, the tests also check that every recording still matches
+what the parser produces (as does "ast_fixtures.py --check").  Recording
+also notes the version of kramdown used in MANIFEST_FILE; recordings
+without one were not made by the parser, and using them gives a warning.
+"""
+
+
+import os
+import sys
+import glob
+import gzip
+import json
+import hashlib
+import warnings
+import subprocess
+from argparse import ArgumentParser
+
+import util
+from lesson_check import SOURCE_DIRS
+
+# Where the fixtures live.
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Markdown files whose ASTs are recorded.
+LESSON_DIR = os.path.join(FIXTURE_DIR, 'lesson')
+
+# Recorded ASTs.
+AST_DIR = os.path.join(FIXTURE_DIR, 'ast')
+
+# Suffix of recorded ASTs.
+AST_SUFFIX = '.json.gz'
+
+# The parser the recordings are made with.
+PARSER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'markdown_ast.rb')
+
+# File (in the directory of recordings) naming the parser that made them.
+MANIFEST_FILE = 'parser.json'
+
+# Directories of recordings whose manifest has been checked.
+_checked_dirs = set()
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    if args.check:
+        stale = stale_recordings(args.parser, args.lesson_dir, args.ast_dir)
+        for path in stale:
+            print('{0}: recorded AST does not match the parser'.format(path))
+        if stale:
+            print('Run "make test-fixtures" to re-record them.')
+            sys.exit(1)
+        return
+    written, removed = refresh(args.parser, args.lesson_dir, args.ast_dir)
+    print('Recorded {0} AST(s), removed {1} stale recording(s)'.format(written, removed))
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Record ASTs of the test lesson's Markdown files.""")
+    parser.add_argument('-p', '--parser',
+                        required=True,
+                        dest='parser',
+                        help='path to Markdown parser')
+    parser.add_argument('-l', '--lesson',
+                        default=LESSON_DIR,
+                        dest='lesson_dir',
+                        help='directory of Markdown files to record')
+    parser.add_argument('-a', '--ast',
+                        default=AST_DIR,
+                        dest='ast_dir',
+                        help='directory of recorded ASTs')
+    parser.add_argument('-c', '--check',
+                        default=False,
+                        action='store_true',
+                        dest='check',
+                        help='only check that the recordings match the parser')
+    args = parser.parse_args()
+    util.require(parser_available(args.parser),
+                 'Unable to run the Markdown parser: install its gems with "bundle install"',
+                 True)
+    return args
+
+
+def source_hash(body):
+    """Key of the recording of the AST of some text."""
+
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def ast_path(body, ast_dir=AST_DIR):
+    """Path of the recording of the AST of some text."""
+
+    return os.path.join(ast_dir, source_hash(body) + AST_SUFFIX)
+
+
+def save_ast(body, doc, ast_dir=AST_DIR):
+    """Record the AST of some text, returning the path written."""
+
+    path = ast_path(body, ast_dir)
+    data = json.dumps(doc, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    # A fixed timestamp means an unchanged AST gives an unchanged file.
+    with open(path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as writer:
+            writer.write(data)
+    return path
+
+
+def load_ast(body, ast_dir=AST_DIR):
+    """Get the recorded AST of some text."""
+
+    path = ast_path(body, ast_dir)
+    util.require(os.path.exists(path),
+                 'No recorded AST for text starting {0!r}: run "make test-fixtures"'.format(
+                     body[:40]),
+                 True)
+    check_manifest(ast_dir)
+    with gzip.open(path, 'rt', encoding='utf-8') as reader:
+        return json.load(reader)
+
+
+def check_manifest(ast_dir=AST_DIR):
+    """Warn (once per directory) if recordings were not made by the parser."""
+
+    if ast_dir in _checked_dirs:
+        return
+    _checked_dirs.add(ast_dir)
+    try:
+        with open(os.path.join(ast_dir, MANIFEST_FILE), 'r', encoding='utf-8') as reader:
+            version = json.load(reader).get('kramdown')
+    except (OSError, ValueError, AttributeError):
+        version = None
+    if not version:
+        warnings.warn('The ASTs in {0} were not recorded by the Markdown parser: '
+                      'run "make test-fixtures"'.format(ast_dir), stacklevel=3)
+
+
+def parse_recorded(parser, body):
+    """Stand-in for util.parse_markdown that uses recorded ASTs."""
+
+    return load_ast(body)
+
+
+def parser_version(parser=PARSER):
+    """Get the version of kramdown the Markdown parser uses, or None if
+    the parser (or the gems it needs) cannot be run here."""
+
+    script = "require 'kramdown'; require 'kramdown-parser-gfm'; print Kramdown::VERSION"
+    try:
+        result = subprocess.run(['bundle', 'exec', 'ruby', '-e', script],
+                                cwd=os.path.dirname(os.path.abspath(parser)),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def parser_available(parser=PARSER):
+    """Can the Markdown parser (and the gems it needs) be run here?"""
+
+    return parser_version(parser) is not None
+
+
+def lesson_bodies(lesson_dir=LESSON_DIR):
+    """Get {path: body} for the Markdown files to record, where each
+    body is the text that read_markdown passes to the parser."""
+
+    result = {}
+    patterns = [os.path.join(lesson_dir, d, '*.md') for d in SOURCE_DIRS]
+    for path in sorted(p for pat in patterns for p in glob.glob(pat)):
+        with open(path, 'r', encoding='utf-8') as reader:
+            text = reader.read()
+        result[path] = util.split_metadata(path, text)[2]
+    return result
+
+
+def refresh(parser, lesson_dir=LESSON_DIR, ast_dir=AST_DIR):
+    """Record the AST of every file in the test lesson and remove
+    recordings that no file needs, returning (written, removed)."""
+
+    os.makedirs(ast_dir, exist_ok=True)
+    wanted = set()
+    for body in lesson_bodies(lesson_dir).values():
+        wanted.add(save_ast(body, util.parse_markdown(parser, body), ast_dir))
+    with open(os.path.join(ast_dir, MANIFEST_FILE), 'w', encoding='utf-8') as writer:
+        json.dump({'kramdown': parser_version(parser)}, writer)
+        writer.write('\n')
+
+    removed = 0
+    for path in glob.glob(os.path.join(ast_dir, '*' + AST_SUFFIX)):
+        if path not in wanted:
+            os.remove(path)
+            removed += 1
+    return len(wanted), removed
+
+
+def stale_recordings(parser, lesson_dir=LESSON_DIR, ast_dir=AST_DIR):
+    """Get the paths of the files in the test lesson whose recorded AST
+    is missing or differs from what the parser produces now."""
+
+    result = []
+    for (path, body) in lesson_bodies(lesson_dir).items():
+        recorded = ast_path(body, ast_dir)
+        if not os.path.exists(recorded):
+            result.append(path)
+            continue
+        with gzip.open(recorded, 'rt', encoding='utf-8') as reader:
+            if json.load(reader) != util.parse_markdown(parser, body):
+                result.append(path)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Run the checks for a workshop or lesson repository in a single process.
+The checks share one report, one thread pool for the Markdown parser,
+and the parsed YAML files, so _config.yml is only read once.
+"""
+
+
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from util import load_yaml
+from reporter import Reporter
+import lesson_check
+import workshop_check
+
+# Default path to the Markdown parser.
+DEFAULT_PARSER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'markdown_ast.rb')
+
+# How many Markdown files to parse at once.
+DEFAULT_JOBS = lesson_check.PARSE_AHEAD
+
+# Which checks apply to each kind of repository (as given by 'kind'
+# in _config.yml) when running all of them.
+CHECKS_BY_KIND = {
+    'workshop': ['workshop'],
+    'lesson': ['lesson'],
+}
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    reporter = Reporter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        run_checks(args, reporter, pool)
+
+    reporter.report()
+    if reporter.messages:
+        if args.permissive:
+            print("Problems detected but ignored (permissive mode).")
+        else:
+            print("Problems detected.")
+            sys.exit(1)
+    else:
+        print("No problems found.")
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Check a workshop or lesson repository.""")
+    parser.add_argument('-s', '--source',
+                        default=os.curdir,
+                        dest='source_dir',
+                        help='source directory')
+    parser.add_argument('-j', '--jobs',
+                        default=DEFAULT_JOBS,
+                        type=int,
+                        dest='jobs',
+                        help='number of Markdown files to parse at once')
+    parser.add_argument('--permissive',
+                        default=False,
+                        action="store_true",
+                        dest='permissive',
+                        help='Do not raise an error even if issues are detected')
+
+    lesson_options = ArgumentParser(add_help=False)
+    lesson_options.add_argument('-l', '--linelen',
+                                default=False,
+                                action="store_true",
+                                dest='line_lengths',
+                                help='Check line lengths')
+    lesson_options.add_argument('-p', '--parser',
+                                default=DEFAULT_PARSER,
+                                dest='parser',
+                                help='path to Markdown parser')
+    lesson_options.add_argument('-r', '--references',
+                                default=None,
+                                dest='reference_path',
+                                help='path to Markdown file of external references '
+                                     '(default: _includes/links.md if present)')
+    lesson_options.add_argument('-t', '--terms',
+                                default=None,
+                                dest='term_path',
+                                help='path to YAML file of terms to report in lesson text')
+    lesson_options.add_argument('-w', '--whitespace',
+                                default=False,
+                                action="store_true",
+                                dest='trailing_whitespace',
+                                help='Check for trailing whitespace')
+    lesson_options.add_argument('--syntax',
+                                default=False,
+                                action="store_true",
+                                dest='code_syntax',
+                                help='Check the syntax of Python, SQL, and shell code blocks')
+    lesson_options.add_argument('--syntax-cache',
+                                default=None,
+                                dest='syntax_cache',
+                                help='file in which to cache code block results '
+                                     '(default: in the source directory; "" for none)')
+
+    repo_options = ArgumentParser(add_help=False)
+    repo_options.add_argument('--repo',
+                              default=None,
+                              dest='repo_url',
+                              help='repository URL (default: from the "upstream" Git remote)')
+    repo_options.add_argument('--api',
+                              default=None,
+                              dest='api_url',
+                              help='root URL of the GitHub API')
+    repo_options.add_argument('--github-cache',
+                              default=None,
+                              dest='cache_file',
+                              help='file in which to cache GitHub API responses')
+
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    commands.add_parser('workshop', help='check a workshop website')
+    commands.add_parser('lesson', parents=[lesson_options], help='check a lesson')
+    commands.add_parser('repo', parents=[repo_options], help="check the repository's labels")
+    everything = commands.add_parser('all', parents=[lesson_options, repo_options],
+                                     help='run every check that applies to this kind of repository')
+    everything.add_argument('--labels',
+                            default=False,
+                            action="store_true",
+                            dest='labels',
+                            help="also check the repository's labels (needs network access)")
+
+    return parser.parse_args(argv)
+
+
+def select_checks(args, reporter):
+    """Get the names of the checks to run."""
+
+    if args.command != 'all':
+        return [args.command]
+
+    config_file = os.path.join(args.source_dir, '_config.yml')
+    kind = (load_yaml(config_file) or {}).get('kind', None)
+    reporter.check(kind in CHECKS_BY_KIND,
+                   config_file,
+                   'Missing or unknown kind of repository: {0}',
+                   kind)
+    checks = list(CHECKS_BY_KIND.get(kind, []))
+    if args.labels:
+        checks.append('repo')
+    return checks
+
+
+def run_checks(args, reporter, pool=None):
+    """Run the selected checks, returning their names."""
+
+    checks = select_checks(args, reporter)
+    for name in checks:
+        CHECKS[name](args, reporter, pool)
+    return checks
+
+
+def check_workshop(args, reporter, pool):
+    """Check a workshop website."""
+
+    reporter.extend(workshop_check.check_workshop(args.source_dir))
+
+
+def check_lesson(args, reporter, pool):
+    """Check a lesson, parsing its Markdown in the shared pool."""
+
+    if args.reference_path is None:
+        links_file = os.path.join(args.source_dir, '_includes', 'links.md')
+        if os.path.isfile(links_file):
+            args.reference_path = links_file
+    args.reporter = reporter
+    lesson_check.check_lesson(args, pool)
+
+
+def check_repo(args, reporter, pool):
+    """Check the repository's labels on GitHub."""
+
+    # Imported here so that the other checks do not need 'requests'.
+    import repo_check
+    from github_client import GitHubClient, GitHubError, API_URL, DEFAULT_CACHE_FILE
+
+    repo_url = repo_check.get_repo_url(args.repo_url, args.source_dir)
+    with GitHubClient(api_url=args.api_url or API_URL,
+                      cache_file=args.cache_file or DEFAULT_CACHE_FILE) as client:
+        try:
+            repo_check.check_labels(reporter, repo_url, client)
+        except GitHubError as e:
+            reporter.add(None, str(e))
+
+
+# Functions that run each check.
+CHECKS = {
+    'workshop': check_workshop,
+    'lesson': check_lesson,
+    'repo': check_repo,
+}
+
+
+if __name__ == '__main__':
+    main()
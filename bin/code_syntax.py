@@ -0,0 +1,228 @@
+"""
+Check the syntax of the code in lessons' code blocks.  Python is
+compiled, SQL is prepared (with EXPLAIN) in an empty in-memory SQLite
+database, and shell code is read by 'bash -n'; nothing is run.  Only
+errors in syntax are reported: SQL that refers to tables the lesson
+creates elsewhere, for example, is not an error.
+
+Blocks are checked in a process pool, and the result for each distinct
+block is cached by a hash of its text, so unchanged blocks are not
+checked again.
+"""
+
+
+import os
+import re
+import sys
+import json
+import shutil
+import sqlite3
+import hashlib
+import warnings
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+# Where to remember results by default (relative to the lesson root).
+CACHE_FILE = '.code-syntax-cache.json'
+
+# Languages that can be checked, by code block class.
+LANGUAGES = {
+    'language-python': 'python',
+    'language-sql': 'sql',
+    'language-bash': 'shell',
+    'language-sh': 'shell',
+    'language-shell': 'shell',
+}
+
+# Path to the shell used to check shell code (shell blocks are not
+# checked if it is not installed).
+BASH = shutil.which('bash')
+
+# What each language is checked with: a result is only reused if this
+# has not changed.
+CHECKER_VERSIONS = {
+    'python': 'Python {0}.{1}'.format(*sys.version_info[:2]),
+    'sql': 'SQLite {0}'.format(sqlite3.sqlite_version),
+    'shell': 'bash',
+}
+
+# How many blocks to send to a worker process at a time.
+CHUNK_SIZE = 16
+
+# Pattern to match IPython magics and shell escapes (replaced by 'pass').
+P_IPYTHON_LINE = re.compile(r'^([ \t]*)[%!].*$', re.MULTILINE)
+
+# Pattern to match SQLite errors that are about syntax (rather than
+# about tables, columns, or functions that do not exist).
+P_SQL_SYNTAX_ERROR = re.compile(r'syntax error|incomplete input|unrecognized token')
+
+# Pattern to split a line of SQL after each semicolon.
+P_SQL_PIECE = re.compile(r'[^;]*;|[^;]+')
+
+# Pattern to match the line number and message in errors from 'bash -n'.
+P_SHELL_ERROR = re.compile(r'line (\d+): (.+)')
+
+
+def block_language(cls):
+    """Get the language of a code block from its class, or None if its
+    syntax cannot be checked."""
+
+    for name in (cls or '').split():
+        if name in LANGUAGES:
+            return LANGUAGES[name]
+    return None
+
+
+def check_python(code):
+    """Check Python code, returning None or (line, message)."""
+
+    code = P_IPYTHON_LINE.sub(r'\1pass', code)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            compile(code, '<code block>', 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return e.lineno or 1, 'Python syntax error: {0}'.format(e.msg)
+    except ValueError as e:
+        return 1, 'Python syntax error: {0}'.format(e)
+    return None
+
+
+def explain_sql(connection, statement):
+    """Prepare one SQL statement, returning None or an error message."""
+
+    if not statement.lstrip().upper().startswith('EXPLAIN'):
+        statement = 'EXPLAIN ' + statement
+    try:
+        connection.execute(statement)
+    except sqlite3.Error as e:
+        if P_SQL_SYNTAX_ERROR.search(str(e)):
+            return str(e)
+    return None
+
+
+def check_sql(code):
+    """Check SQL code one statement at a time, returning None or
+    (line, message).  Lines that are SQLite shell commands (such as
+    '.mode csv') are skipped."""
+
+    connection = sqlite3.connect(':memory:')
+    try:
+        statement, first, has_sql = '', None, False
+        for (num, line) in enumerate(code.split('\n'), 1):
+            if not statement and line.strip().startswith('.'):
+                continue
+            for piece in P_SQL_PIECE.findall(line + '\n'):
+                stripped = piece.strip()
+                if not statement and not stripped:
+                    continue
+                if not statement:
+                    first = num
+                statement += piece
+                has_sql = has_sql or (stripped and not stripped.startswith('--'))
+                if sqlite3.complete_statement(statement):
+                    error = has_sql and explain_sql(connection, statement)
+                    if error:
+                        return first, 'SQL syntax error: {0}'.format(error)
+                    statement, has_sql = '', False
+        if has_sql:
+            error = explain_sql(connection, statement)
+            if error:
+                return first, 'SQL syntax error: {0}'.format(error)
+    finally:
+        connection.close()
+    return None
+
+
+def check_shell(code):
+    """Check shell code with 'bash -n', returning None or (line, message)."""
+
+    if BASH is None:
+        return None
+    result = subprocess.run([BASH, '-n'], input=code, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode == 0:
+        return None
+    m = P_SHELL_ERROR.search(result.stderr)
+    if m:
+        return int(m.group(1)), 'Shell syntax error: {0}'.format(m.group(2).strip())
+    return 1, 'Shell syntax error: {0}'.format(result.stderr.strip())
+
+
+# Functions that check each language.
+SYNTAX_CHECKERS = {
+    'python': check_python,
+    'sql': check_sql,
+    'shell': check_shell,
+}
+
+
+def check_source(item):
+    """Check (language, code) in a worker process."""
+
+    language, code = item
+    return SYNTAX_CHECKERS[language](code)
+
+
+def block_key(language, code):
+    """Key of the cached result for a block."""
+
+    digest = hashlib.sha256()
+    for part in (language, CHECKER_VERSIONS[language], code):
+        digest.update(part.encode('utf-8') + b'\0')
+    return digest.hexdigest()
+
+
+def load_cache(cache_file):
+    """Load cached results as {key: None or [line, message]}."""
+
+    if not cache_file:
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as reader:
+            cache = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file, cache):
+    """Save results, replacing the cache file atomically."""
+
+    if not cache_file:
+        return
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as writer:
+        json.dump(cache, writer)
+    os.replace(temp_file, cache_file)
+
+
+def check_code_blocks(reporter, blocks, jobs=None, cache_file=None):
+    """
+    Check code blocks given as [(filename, first line of code, language,
+    code)], adding syntax errors to the reporter.  Returns the number of
+    distinct blocks that were not already in the cache.
+    """
+
+    cache = load_cache(cache_file)
+    keys = [block_key(language, code) for (_, _, language, code) in blocks]
+    pending = {}
+    for (key, (_, _, language, code)) in zip(keys, blocks):
+        if key not in cache:
+            pending[key] = (language, code)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(check_source, pending.values(), chunksize=CHUNK_SIZE)
+            for (key, result) in zip(pending, results):
+                cache[key] = result
+
+    for (key, (filename, first_line, _, _)) in zip(keys, blocks):
+        if cache[key] is not None:
+            line, message = cache[key]
+            reporter.add((filename, first_line + line - 1), '{0}', message)
+
+    # Forget blocks that are no longer in the lesson.
+    wanted = set(keys)
+    save_cache(cache_file, {k: v for (k, v) in cache.items() if k in wanted})
+    return len(pending)
@@ -0,0 +1,318 @@
+"""
+Small client for the GitHub REST API used by the checking tools.
+"""
+
+
+import os
+import sys
+import json
+import time
+import threading
+from urllib.parse import quote
+
+# Import this way to produce a more useful error message.
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    print('Unable to import requests module: please install requests', file=sys.stderr)
+    sys.exit(1)
+
+# Root of the API.
+API_URL = 'https://api.github.com'
+
+# Largest page size the API allows.
+PER_PAGE = 100
+
+# Longest we will wait (in seconds) for a rate limit to reset.
+MAX_RATE_LIMIT_WAIT = 60
+
+# Stop sending requests when this many remain until the limit resets,
+# so that concurrent workers do not all run into the limit at once.
+RATE_LIMIT_RESERVE = 5
+
+# How many times to try a change that fails for a transient reason.
+MAX_ATTEMPTS = 3
+
+# Statuses that indicate a transient failure worth retrying.
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+# Where to keep cached responses unless told otherwise.
+DEFAULT_CACHE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'carpentries-github.json')
+
+
+class GitHubError(Exception):
+    """Raised when the API cannot satisfy a request."""
+
+    def __init__(self, url, status, message=''):
+        super().__init__('Request for {0} failed with {1}{2}'.format(
+            url, status, ': ' + message if message else ''))
+        self.url = url
+        self.status = status
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses, keyed by URL.  Each entry holds the
+    ETag, the decoded body, and the URL of the next page (if any).
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        if filename:
+            try:
+                with open(filename, 'r', encoding='utf-8') as reader:
+                    self.entries = json.load(reader)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, url):
+        with self.lock:
+            return self.entries.get(url)
+
+    def put(self, url, etag, body, next_url):
+        with self.lock:
+            self.entries[url] = {'etag': etag, 'body': body, 'next': next_url}
+            self.dirty = True
+
+    def save(self):
+        """Write the cache back to disk if it has changed."""
+
+        with self.lock:
+            if not (self.filename and self.dirty):
+                return
+            dirname = os.path.dirname(self.filename)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            temp_file = self.filename + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as writer:
+                json.dump(self.entries, writer)
+            os.replace(temp_file, self.filename)
+            self.dirty = False
+
+
+class GitHubClient:
+    """
+    GitHub API client with pooled connections, automatic pagination,
+    conditional requests (so unchanged resources cost a 304), and
+    handling of rate limits.
+    """
+
+    def __init__(self, api_url=API_URL, token=None, cache_file=None,
+                 pool_size=10, max_wait=MAX_RATE_LIMIT_WAIT,
+                 reserve=RATE_LIMIT_RESERVE):
+        self.api_url = api_url.rstrip('/')
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.rate_lock = threading.Lock()
+        self.cache = ResponseCache(cache_file)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept'] = 'application/vnd.github+json'
+        token = token or os.environ.get('GITHUB_TOKEN')
+        if token:
+            self.session.headers['Authorization'] = 'token {0}'.format(token)
+        self.rate_remaining = None
+        self.rate_reset = None
+        self.in_flight = 0
+        self.calls = 0
+
+    def close(self):
+        """Save cached responses and release connections."""
+
+        self.cache.save()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def url(self, path):
+        """Full URL for an API path."""
+
+        return path if path.startswith('http') else self.api_url + path
+
+    def request(self, method, path, **kwargs):
+        """
+        Make a single request, waiting and retrying once if the rate
+        limit has been exhausted and will reset soon enough.
+        """
+
+        url = self.url(path)
+        for attempt in (1, 2):
+            self.throttle()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            finally:
+                with self.rate_lock:
+                    self.in_flight -= 1
+            self.update_rate_limit(r)
+            if r.status_code in (403, 429) and self.rate_remaining == 0 and attempt == 1:
+                delay = self.rate_limit_delay()
+                if delay is not None:
+                    time.sleep(delay)
+                    continue
+            return r
+
+    def throttle(self):
+        """
+        Wait for permission to send a request.  Requests already sent
+        but not yet answered count against the remaining rate limit; if
+        only the reserve would be left, back off until the limit resets.
+        The lock is held while waiting so that every thread sharing this
+        client waits, since they share the rate limit.
+        """
+
+        with self.rate_lock:
+            if self.rate_remaining is not None and \
+               self.rate_remaining - self.in_flight <= self.reserve:
+                delay = self.rate_limit_delay()
+                if delay is not None:
+                    time.sleep(delay)
+                    self.rate_remaining = None
+            self.in_flight += 1
+            self.calls += 1
+
+    def update_rate_limit(self, response):
+        """
+        Record the rate-limit state reported by the API.  Responses can
+        arrive out of order, so within one rate-limit window the lowest
+        remaining count wins.
+        """
+
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        remaining = int(headers['X-RateLimit-Remaining'])
+        reset = float(headers.get('X-RateLimit-Reset', 0)) or None
+        with self.rate_lock:
+            if reset == self.rate_reset and self.rate_remaining is not None:
+                remaining = min(remaining, self.rate_remaining)
+            self.rate_remaining = remaining
+            self.rate_reset = reset
+
+    def rate_limit_delay(self):
+        """
+        Seconds until the rate limit resets, or None if that is longer
+        than we are prepared to wait.
+        """
+
+        if self.rate_reset is None:
+            return None
+        delay = max(0.0, self.rate_reset - time.time())
+        return delay if delay <= self.max_wait else None
+
+    def get_page(self, url):
+        """Get one page, returning (body, URL of next page or None)."""
+
+        headers = {}
+        cached = self.cache.get(url)
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        r = self.request('GET', url, headers=headers)
+        if r.status_code == 304 and cached:
+            return cached['body'], cached['next']
+        if r.status_code != 200:
+            raise GitHubError(url, r.status_code, self.error_message(r))
+        body = r.json()
+        next_url = r.links.get('next', {}).get('url')
+        if r.headers.get('ETag'):
+            self.cache.put(url, r.headers['ETag'], body, next_url)
+        return body, next_url
+
+    def get_all(self, path):
+        """Get every item of a paginated collection."""
+
+        separator = '&' if '?' in path else '?'
+        url = self.url('{0}{1}per_page={2}'.format(path, separator, PER_PAGE))
+        result = []
+        while url:
+            body, url = self.get_page(url)
+            result.extend(body)
+        return result
+
+    @staticmethod
+    def error_message(response):
+        """Best-effort extraction of the API's error message."""
+
+        try:
+            return response.json().get('message', '')
+        except ValueError:
+            return ''
+
+    def get_org_repos(self, org):
+        """Get the full names (owner/project) of an organization's
+        repositories that have not been archived."""
+
+        entries = self.get_all('/orgs/{0}/repos'.format(org))
+        return [entry['full_name'] for entry in entries
+                if not entry.get('archived', False)]
+
+    def send(self, method, path, ok=(200, 201, 204), **kwargs):
+        """
+        Make a request that changes something, retrying transient
+        failures, and return the response.  Statuses in 'ok' are
+        success; anything else raises GitHubError.
+        """
+
+        url = self.url(path)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                r = self.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise GitHubError(url, 'connection error', str(e))
+                time.sleep(attempt)
+                continue
+            if r.status_code in TRANSIENT_STATUSES and attempt < MAX_ATTEMPTS:
+                time.sleep(attempt)
+                continue
+            if r.status_code not in ok:
+                raise GitHubError(url, r.status_code, self.error_message(r))
+            return r
+
+    def get_labels(self, owner, project):
+        """Get all labels of a repository as {name: color}."""
+
+        entries = self.get_all('/repos/{0}/{1}/labels'.format(owner, project))
+        return {entry['name']: entry['color'] for entry in entries}
+
+    def label_path(self, owner, project, name=None):
+        """API path for a repository's labels or for a single label."""
+
+        path = '/repos/{0}/{1}/labels'.format(owner, project)
+        return path if name is None else path + '/' + quote(name, safe='')
+
+    def create_label(self, owner, project, name, color):
+        """
+        Create a label.  If it already exists (e.g., because an earlier
+        attempt succeeded without us seeing the response), set its color.
+        """
+
+        r = self.send('POST', self.label_path(owner, project),
+                      ok=(201, 422), json={'name': name, 'color': color})
+        if r.status_code == 422:
+            self.update_label(owner, project, name, color)
+
+    def update_label(self, owner, project, name, color):
+        """Set the color of a label, creating the label if it has gone."""
+
+        r = self.send('PATCH', self.label_path(owner, project, name),
+                      ok=(200, 404), json={'color': color})
+        if r.status_code == 404:
+            self.send('POST', self.label_path(owner, project),
+                      ok=(201,), json={'name': name, 'color': color})
+
+    def delete_label(self, owner, project, name):
+        """Delete a label; deleting a label that has gone is not an error."""
+
+        self.send('DELETE', self.label_path(owner, project, name), ok=(204, 404))
@@ -0,0 +1,227 @@
+'''Summarize the JSON reports written by "swc-installation-test-2.py --json"
+for a whole workshop.  Reports are read one at a time into an SQLite index,
+so memory use does not grow with the number of learners, and a report is
+only read again if its file has changed.
+'''
+
+
+import sys
+import os
+import json
+import sqlite3
+from argparse import ArgumentParser
+
+USAGE = 'Usage: "installation_reports.py -d index.sqlite path/to/reports/directory"'
+
+# Tables of reports and of the results of each check in each report.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    path TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    system TEXT,
+    os_version TEXT,
+    python_version TEXT,
+    created TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    version TEXT,
+    cause TEXT
+);
+CREATE INDEX IF NOT EXISTS results_by_path ON results (path);
+CREATE INDEX IF NOT EXISTS results_by_check ON results (check_name, passed);
+'''
+
+# Reports larger than this (in bytes) are not installation reports.
+MAX_REPORT_SIZE = 1024 * 1024
+
+# How many reports to read between commits.
+BATCH_SIZE = 100
+
+# How many of the most common causes to show for each failing check.
+TOP_CAUSES = 3
+
+
+def main():
+    '''Run as the main program.'''
+
+    args = parse_args()
+    db = open_index(args.index_file)
+    counts = update_index(db, args.reports_dir)
+    print_summary(db, sys.stdout)
+    db.close()
+    print('Indexed reports: {0} read, {1} unchanged, {2} removed'.format(
+        counts['read'], counts['unchanged'], counts['removed']),
+        file=sys.stderr)
+
+
+def parse_args():
+    '''Parse command-line arguments.'''
+
+    parser = ArgumentParser(description='''Summarize learners' installation reports.''',
+                            usage=USAGE)
+    parser.add_argument('reports_dir',
+                        help='directory containing the JSON reports')
+    parser.add_argument('-d', '--database',
+                        required=True,
+                        dest='index_file',
+                        help='SQLite file holding the index')
+    return parser.parse_args()
+
+
+def open_index(index_file):
+    '''Open (creating if necessary) the index database.'''
+
+    db = sqlite3.connect(index_file)
+    db.executescript(SCHEMA)
+    return db
+
+
+def root_cause(error):
+    '''
+    First line of the most specific message in a failure's chain of
+    causes, following the chain as long as each failure has one cause.
+    '''
+
+    while len(error.get('causes') or []) == 1:
+        error = error['causes'][0]
+    return (error.get('message') or '').strip().split('\n')[0]
+
+
+def read_report(path):
+    '''
+    Read one report, returning (platform, [(check, passed, version, cause)])
+    or None if the file is not a usable report.
+    '''
+
+    if os.path.getsize(path) > MAX_REPORT_SIZE:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as reader:
+            report = json.load(reader)
+        platform = report['platform']
+        results = [(entry['check'], bool(entry['passed']), entry.get('version'),
+                    root_cause(entry['error']) if entry.get('error') else None)
+                   for entry in report['checks']]
+        platform['created'] = report.get('created')
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return platform, results
+
+
+def update_index(db, reports_dir):
+    '''
+    Bring the index up to date with the reports in a directory,
+    returning counts of reports read, unchanged, and removed.  Files are
+    visited one at a time and each run marks the reports it sees, so
+    nothing proportional to the number of reports is held in memory.
+    '''
+
+    (run,) = db.execute('SELECT COALESCE(MAX(run), 0) + 1 FROM reports').fetchone()
+    counts = {'read': 0, 'unchanged': 0, 'removed': 0}
+    with os.scandir(reports_dir) as entries:
+        for entry in entries:
+            if not (entry.name.endswith('.json') and entry.is_file()):
+                continue
+            path = os.path.abspath(entry.path)
+            info = entry.stat()
+            stamp = json.dumps([info.st_size, info.st_mtime_ns])
+            row = db.execute('SELECT stamp FROM reports WHERE path = ?', (path,)).fetchone()
+            if row and row[0] == stamp:
+                db.execute('UPDATE reports SET run = ? WHERE path = ?', (run, path))
+                counts['unchanged'] += 1
+                continue
+            add_report(db, path, stamp, run, read_report(path))
+            counts['read'] += 1
+            if counts['read'] % BATCH_SIZE == 0:
+                db.commit()
+
+    stale = [row[0] for row in db.execute('SELECT path FROM reports WHERE run != ?', (run,))]
+    for path in stale:
+        db.execute('DELETE FROM results WHERE path = ?', (path,))
+        db.execute('DELETE FROM reports WHERE path = ?', (path,))
+        counts['removed'] += 1
+    db.commit()
+    return counts
+
+
+def add_report(db, path, stamp, run, report):
+    '''Replace whatever the index holds for a report file.'''
+
+    db.execute('DELETE FROM results WHERE path = ?', (path,))
+    if report is None:
+        db.execute('INSERT OR REPLACE INTO reports (path, stamp, run, valid) VALUES (?, ?, ?, 0)',
+                   (path, stamp, run))
+        return
+    platform, results = report
+    db.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, 1, ?, ?, ?, ?)',
+               (path, stamp, run, platform.get('system'), platform.get('os_version'),
+                platform.get('python_version'), platform.get('created')))
+    db.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?)',
+                   [(path, check, int(passed), version, cause)
+                    for (check, passed, version, cause) in results])
+
+
+def failures_by_check(db):
+    '''(check, failed, total) for every check that failed anywhere, worst first.'''
+
+    return db.execute('SELECT check_name, SUM(NOT passed) AS failed, COUNT(*) FROM results '
+                      'GROUP BY check_name HAVING failed > 0 '
+                      'ORDER BY failed DESC, check_name').fetchall()
+
+
+def failures_by_platform(db, check):
+    '''
+    (system, OS version, check version, failed, total) for one check,
+    worst first.  Failed checks usually report no version, so their
+    rows show how often the check failed outright.
+    '''
+
+    return db.execute('SELECT r.system, r.os_version, s.version, SUM(NOT s.passed) AS failed, '
+                      'COUNT(*) FROM results s JOIN reports r ON s.path = r.path '
+                      'WHERE s.check_name = ? GROUP BY r.system, r.os_version, s.version '
+                      'HAVING failed > 0 ORDER BY failed DESC, r.system, r.os_version, s.version',
+                      (check,)).fetchall()
+
+
+def common_causes(db, check, limit=TOP_CAUSES):
+    '''(cause, count) of the most common reasons a check failed.'''
+
+    return db.execute('SELECT cause, COUNT(*) AS n FROM results '
+                      'WHERE check_name = ? AND NOT passed '
+                      'GROUP BY cause ORDER BY n DESC, cause LIMIT ?',
+                      (check, limit)).fetchall()
+
+
+def print_summary(db, stream):
+    '''Print what failed, on which platforms, and why.'''
+
+    (valid, invalid) = db.execute('SELECT COALESCE(SUM(valid), 0), COALESCE(SUM(NOT valid), 0) '
+                                  'FROM reports').fetchone()
+    print('{0} report(s){1}'.format(
+        valid, ', {0} unreadable'.format(invalid) if invalid else ''), file=stream)
+    for (system, count) in db.execute('SELECT system, COUNT(*) FROM reports WHERE valid '
+                                      'GROUP BY system ORDER BY COUNT(*) DESC, system'):
+        print('  {0}: {1}'.format(system, count), file=stream)
+
+    failures = failures_by_check(db)
+    if not failures:
+        print('\nNo failures.', file=stream)
+        return
+    for (check, failed, total) in failures:
+        print('\n{0}: {1} of {2} failed'.format(check, failed, total), file=stream)
+        for (system, os_version, version, platform_failed, platform_total) in \
+                failures_by_platform(db, check):
+            print('  {0} {1} ({2}): {3} of {4}'.format(
+                system, os_version or '', 'version ' + version if version else 'no version',
+                platform_failed, platform_total), file=stream)
+        for (cause, count) in common_causes(db, check):
+            print('  {0} x {1}'.format(count, cause), file=stream)
+
+
+if __name__ == '__main__':
+    main()
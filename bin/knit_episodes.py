@@ -0,0 +1,265 @@
+"""
+Knit R Markdown episodes into Markdown, several at a time, skipping
+episodes whose inputs have not changed since they were last knit.
+
+Each episode is knit in its own R session, and 'chunk-options.R' names
+each episode's figures after the episode, so episodes are independent
+and can be knit concurrently.  An episode is knit again only if its Rmd
+file, one of SHARED_INPUTS (chunk options, the knitting script, or the
+package lockfile), or the knitter command has changed, or if its output
+or one of the figures it links to has been removed or edited.  Before
+knitting, each episode's metadata is checked (as 'lesson_check.py'
+does) and episodes that fail are not knit.
+"""
+
+
+import os
+import re
+import sys
+import glob
+import json
+import shlex
+import hashlib
+import subprocess
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from util import split_metadata
+from reporter import Reporter
+from lesson_check import SOURCE_RMD_DIRS, check_rmd_metadata
+
+# Where knit episodes are written (relative to the lesson root).
+OUTPUT_DIR = '_episodes'
+
+# Files (relative to the lesson root) that can change the output of
+# every episode; missing files are allowed.
+SHARED_INPUTS = [
+    os.path.join('bin', 'chunk-options.R'),
+    os.path.join('bin', 'generate_md_episodes.R'),
+    'renv.lock',
+]
+
+# Command that knits one episode: it is run in the lesson root with the
+# paths of the Rmd file and of the Markdown file to create appended.
+KNITTER = '''Rscript -e "source('bin/generate_md_episodes.R')"'''
+
+# Where to remember what has been knit (relative to the lesson root).
+CACHE_FILE = '.knit-cache.json'
+
+# How many lines of a failed knitter's output to show.
+ERROR_LINES = 20
+
+# Pattern to match the generated figures a knit episode links to
+# ('chunk-options.R' writes them to 'fig/rmd-*', linked as '../fig/').
+P_FIGURE = re.compile(r'\.\./(fig/rmd-[^\s)"\'>]+)')
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    reporter = Reporter()
+    results = knit_episodes(args.source_dir, reporter, knitter=args.knitter,
+                            jobs=args.jobs, cache_file=args.cache_file,
+                            setup=args.setup, force=args.force)
+    reporter.report()
+    counts = {}
+    for (_, status) in results:
+        counts[status] = counts.get(status, 0) + 1
+    print('Episodes: {0} knit, {1} unchanged, {2} failed, {3} not knit'.format(
+        counts.get('knit', 0), counts.get('cached', 0),
+        counts.get('failed', 0), counts.get('skipped', 0)))
+    if reporter.messages:
+        sys.exit(1)
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Knit R Markdown episodes into Markdown.""")
+    parser.add_argument('-s', '--source',
+                        default=os.curdir,
+                        dest='source_dir',
+                        help='lesson root directory')
+    parser.add_argument('-j', '--jobs',
+                        default=None,
+                        type=int,
+                        dest='jobs',
+                        help='number of episodes to knit at once (default: number of CPUs)')
+    parser.add_argument('-k', '--knitter',
+                        default=KNITTER,
+                        dest='knitter',
+                        help='command that knits one episode')
+    parser.add_argument('-c', '--cache',
+                        default=CACHE_FILE,
+                        dest='cache_file',
+                        help='file (relative to the lesson root) in which to remember what was knit')
+    parser.add_argument('--setup',
+                        default=None,
+                        dest='setup',
+                        help='command to run once before knitting anything (e.g., to install packages)')
+    parser.add_argument('-f', '--force',
+                        default=False,
+                        action='store_true',
+                        dest='force',
+                        help='knit every episode, even if it has not changed')
+    return parser.parse_args()
+
+
+def find_episodes(source_dir):
+    """Get [(Rmd path, Markdown path)] relative to the lesson root."""
+
+    result = []
+    for d in SOURCE_RMD_DIRS:
+        for path in sorted(glob.glob(os.path.join(source_dir, d, '*.Rmd'))):
+            name = os.path.splitext(os.path.basename(path))[0] + '.md'
+            result.append((os.path.relpath(path, source_dir), os.path.join(OUTPUT_DIR, name)))
+    return result
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it cannot be read."""
+
+    try:
+        with open(path, 'rb') as reader:
+            return hashlib.sha256(reader.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def episode_key(source_dir, rmd, knitter):
+    """Hash everything that the output of knitting an episode depends on."""
+
+    digest = hashlib.sha256()
+    digest.update(knitter.encode('utf-8'))
+    for path in [rmd] + SHARED_INPUTS:
+        digest.update(b'\0' + path.encode('utf-8') + b'\0')
+        digest.update((file_digest(os.path.join(source_dir, path)) or '-').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def precheck(reporter, source_dir, rmd):
+    """Check an episode's metadata, returning True if it can be knit."""
+
+    path = os.path.join(source_dir, rmd)
+    with open(path, 'r', encoding='utf-8') as reader:
+        _, metadata, _ = split_metadata(path, reader.read())
+    before = len(reporter.messages)
+    check_rmd_metadata(reporter, path, metadata)
+    return len(reporter.messages) == before
+
+
+def knit(source_dir, knitter, rmd, md):
+    """Knit one episode, returning None or a description of the failure."""
+
+    os.makedirs(os.path.join(source_dir, os.path.dirname(md)), exist_ok=True)
+    command = shlex.split(knitter) + [rmd, md]
+    try:
+        result = subprocess.run(command, cwd=source_dir, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, universal_newlines=True)
+    except OSError as e:
+        return 'unable to run knitter: {0}'.format(e)
+    if result.returncode != 0:
+        output = result.stdout.rstrip().split('\n')[-ERROR_LINES:]
+        return 'knitter failed with status {0}:\n{1}'.format(
+            result.returncode, '\n'.join(output))
+    if not os.path.isfile(os.path.join(source_dir, md)):
+        return 'knitter did not create {0}'.format(md)
+    return None
+
+
+def figure_digests(source_dir, md):
+    """Get {figure path: hash} for the generated figures a knit episode
+    links to (the hash is None if the figure is missing)."""
+
+    with open(os.path.join(source_dir, md), 'r', encoding='utf-8') as reader:
+        figures = set(P_FIGURE.findall(reader.read()))
+    return {fig: file_digest(os.path.join(source_dir, fig)) for fig in sorted(figures)}
+
+
+def outputs_unchanged(source_dir, md, entry):
+    """Are a knit episode and its figures as they were when it was knit?"""
+
+    if 'figures' not in entry or \
+       entry.get('output') != file_digest(os.path.join(source_dir, md)):
+        return False
+    return all(file_digest(os.path.join(source_dir, fig)) == digest
+               for (fig, digest) in entry['figures'].items())
+
+
+def load_cache(cache_file):
+    """Load the cache as {Rmd path: {'key': hash, 'output': hash,
+    'figures': {figure path: hash}}}."""
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as reader:
+            cache = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file, cache):
+    """Save the cache, replacing the file atomically."""
+
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as writer:
+        json.dump(cache, writer, indent=1, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+
+def knit_episodes(source_dir, reporter, knitter=KNITTER, jobs=None, cache_file=CACHE_FILE,
+                  setup=None, force=False):
+    """
+    Knit the episodes that need it, returning [(Rmd path, status)] where
+    status is 'knit', 'cached', 'failed', or 'skipped' (failed the
+    precheck).  Problems are added to the reporter.
+    """
+
+    cache_path = os.path.join(source_dir, cache_file)
+    cache = load_cache(cache_path)
+    statuses = {}
+    pending = []
+    for (rmd, md) in find_episodes(source_dir):
+        if not precheck(reporter, source_dir, rmd):
+            statuses[rmd] = 'skipped'
+            continue
+        key = episode_key(source_dir, rmd, knitter)
+        entry = cache.get(rmd, {})
+        if not force and entry.get('key') == key and \
+           outputs_unchanged(source_dir, md, entry):
+            statuses[rmd] = 'cached'
+        else:
+            pending.append((rmd, md, key))
+
+    if pending and setup:
+        result = subprocess.run(setup, shell=True, cwd=source_dir)
+        if result.returncode != 0:
+            reporter.add(None, 'Setup command "{0}" failed with status {1}',
+                         setup, result.returncode)
+            for (rmd, _, _) in pending:
+                statuses[rmd] = 'failed'
+            pending = []
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            futures = [(rmd, md, key, pool.submit(knit, source_dir, knitter, rmd, md))
+                       for (rmd, md, key) in pending]
+            for (rmd, md, key, future) in futures:
+                error = future.result()
+                if error is None:
+                    cache[rmd] = {'key': key,
+                                  'output': file_digest(os.path.join(source_dir, md)),
+                                  'figures': figure_digests(source_dir, md)}
+                    statuses[rmd] = 'knit'
+                else:
+                    cache.pop(rmd, None)
+                    reporter.add(os.path.join(source_dir, rmd), '{0}', error)
+                    statuses[rmd] = 'failed'
+
+    # Forget episodes that no longer exist.
+    for rmd in list(cache):
+        if rmd not in statuses:
+            del cache[rmd]
+    save_cache(cache_path, cache)
+    return sorted(statuses.items())
@@ -8,11 +8,14 @@ import glob
 import re
 import sys
 from argparse import ArgumentParser
+from collections import deque
+from itertools import islice
 
 # This uses the `__all__` list in `util.py` to determine what objects to import
 # see https://docs.python.org/3/tutorial/modules.html#importing-from-a-package
 from util import *
 from reporter import Reporter
+from code_syntax import CACHE_FILE as SYNTAX_CACHE_FILE, block_language, check_code_blocks
 
 __version__ = '0.3'
 
@@ -119,6 +122,13 @@ BREAK_METADATA_FIELDS = {
 # Please keep this in sync with .editorconfig!
 MAX_LINE_LEN = 100
 
+# Pattern to match whitespace in a term (which matches any whitespace,
+# since a term can be split across lines).
+P_TERM_SPACE = re.compile(r'\s+')
+
+# How many Markdown files to parse ahead of checking when a pool is used.
+PARSE_AHEAD = 4
+
 # Contents of _config.yml
 CONFIG = {}
 
@@ -127,6 +137,25 @@ def main():
 
     args = parse_args()
     args.reporter = Reporter()
+    check_lesson(args)
+
+    args.reporter.report()
+    if args.reporter.messages:
+        if args.permissive:
+            print("Problems detected but ignored (permissive mode).")
+        else:
+            print("Problems detected.")
+            sys.exit(1)
+    else:
+        print("No problems found.")
+
+    return
+
+
+def check_lesson(args, pool=None):
+    """Run every check on a lesson, adding problems to args.reporter.  If
+    a thread pool is given, Markdown files are parsed in it ahead of
+    being checked."""
 
     global CONFIG
     config_file = os.path.join(args.source_dir, '_config.yml')
@@ -139,28 +168,23 @@ def main():
         args.permissive = True
 
     check_config(args.reporter)
-    check_source_rmd(args.reporter, args.source_dir, args.parser)
+    check_source_rmd(args.reporter, args.source_dir, args.parser, pool)
 
     args.references = read_references(args.reporter, args.reference_path)
-
-    docs = read_all_markdown(args.source_dir, args.parser)
-    check_fileset(args.source_dir, args.reporter, list(docs.keys()))
+    args.terms = read_terms(args.term_path) if args.term_path else None
+
+    # Code blocks are gathered while files are checked so that they can
+    # all be checked together in a process pool afterward.
+    args.code_blocks = [] if args.code_syntax else None
+    filenames = check_all_markdown(args, pool)
+    if args.code_syntax:
+        cache_file = args.syntax_cache
+        if cache_file is None:
+            cache_file = os.path.join(args.source_dir, SYNTAX_CACHE_FILE)
+        check_code_blocks(args.reporter, args.code_blocks, cache_file=cache_file or None)
+        args.code_blocks = None
+    check_fileset(args.source_dir, args.reporter, filenames)
     check_unwanted_files(args.source_dir, args.reporter)
-    for filename in list(docs.keys()):
-        checker = create_checker(args, filename, docs[filename])
-        checker.check()
-
-    args.reporter.report()
-    if args.reporter.messages:
-        if args.permissive:
-            print("Problems detected but ignored (permissive mode).")
-        else:
-            print("Problems detected.")
-            sys.exit(1)
-    else:
-        print("No problems found.")
-
-    return
 
 
 def parse_args():
@@ -180,6 +204,11 @@ def parse_args():
                         default=None,
                         dest='reference_path',
                         help='path to Markdown file of external references')
+    parser.add_argument('-t', '--terms',
+                        default=None,
+                        dest='term_path',
+                        help='path to YAML file of terms to report in lesson text '
+                             '(such as bin/terminology.yml)')
     parser.add_argument('-s', '--source',
                         default=os.curdir,
                         dest='source_dir',
@@ -189,6 +218,17 @@ def parse_args():
                         action="store_true",
                         dest='trailing_whitespace',
                         help='Check for trailing whitespace')
+    parser.add_argument('--syntax',
+                        default=False,
+                        action="store_true",
+                        dest='code_syntax',
+                        help='Check the syntax of Python, SQL, and shell code blocks')
+    parser.add_argument('--syntax-cache',
+                        default=None,
+                        dest='syntax_cache',
+                        help='file in which to cache code block results '
+                             '(default: {0} in the source directory; "" for none)'.format(
+                                 SYNTAX_CACHE_FILE))
     parser.add_argument('--permissive',
                         default=False,
                         action="store_true",
@@ -227,19 +267,22 @@ def check_config(reporter):
         defaults_test = defaults in CONFIG.get('defaults', [])
         reporter.check(defaults_test, 'configuration', error_message)
 
-def check_source_rmd(reporter, source_dir, parser):
+def check_source_rmd(reporter, source_dir, parser, pool=None):
     """Check that Rmd episode files include `source: Rmd`"""
 
     episode_rmd_dir = [os.path.join(source_dir, d) for d in SOURCE_RMD_DIRS]
     episode_rmd_files = [os.path.join(d, '*.Rmd') for d in episode_rmd_dir]
-    results = {}
-    for pat in episode_rmd_files:
-        for f in glob.glob(pat):
-            data = read_markdown(parser, f)
-            dy = data['metadata']
-            if dy:
-                reporter.check_field(f, 'episode_rmd',
-                                     dy, 'source', 'Rmd')
+    filenames = [f for pat in episode_rmd_files for f in glob.glob(pat)]
+    for (f, data) in read_markdown_files(parser, filenames, pool):
+        check_rmd_metadata(reporter, f, data['metadata'])
+
+
+def check_rmd_metadata(reporter, filename, metadata):
+    """Check the metadata of an Rmd episode file."""
+
+    if metadata:
+        reporter.check_field(filename, 'episode_rmd',
+                             metadata, 'source', 'Rmd')
 
 def read_references(reporter, ref_path):
     """Read shared file of reference links, returning dictionary of valid references
@@ -300,20 +343,156 @@ def read_references(reporter, ref_path):
     return result
 
 
+def read_terms(term_path):
+    """Read a YAML file of rules about terms, returning a TermScanner.
+    Each rule is {'terms': [term], 'message': text, 'case_sensitive':
+    bool}, where '{0}' in the message is replaced by the matching text.
+    """
+
+    rules = load_yaml(term_path)
+    require(isinstance(rules, list),
+            '{0}: terms file must contain a list of rules'.format(term_path),
+            True)
+    for (i, rule) in enumerate(rules, 1):
+        require(isinstance(rule, dict) and isinstance(rule.get('message'), str) and
+                isinstance(rule.get('terms'), list) and
+                all(isinstance(t, str) and t.strip() for t in rule['terms']),
+                '{0}: rule {1} must have a message and a list of terms'.format(term_path, i),
+                True)
+    return TermScanner(rules)
+
+
+class TermScanner:
+    """
+    Find any of a large number of terms in text in a single pass.  The
+    terms are compiled into one regular expression shaped like a trie
+    (so 'just' and 'justify' share 'just'), so the work done at each
+    position in the text is bounded by the length of the longest term
+    rather than by the number of terms.  Terms only match whole words.
+    """
+
+    def __init__(self, rules):
+        self.messages = {}
+        sensitive, insensitive = set(), set()
+        for rule in rules:
+            case_sensitive = rule.get('case_sensitive', False)
+            for term in rule['terms']:
+                key = self.key(term, case_sensitive)
+                self.messages[key] = rule['message']
+                (sensitive if case_sensitive else insensitive).add(key)
+
+        branches = []
+        if insensitive:
+            branches.append('(?i:' + trie_pattern(insensitive) + ')')
+        if sensitive:
+            branches.append(trie_pattern(sensitive))
+        self.pattern = re.compile(r'(?<!\w)(?:' + '|'.join(branches) + r')(?!\w)') \
+            if branches else None
+
+    @staticmethod
+    def key(text, case_sensitive):
+        """Key under which the message for a term is stored."""
+
+        text = P_TERM_SPACE.sub(' ', text.strip())
+        return text if case_sensitive else text.lower()
+
+    def scan(self, text):
+        """Yield (offset, message) for each term in the text."""
+
+        if self.pattern is None:
+            return
+        for m in self.pattern.finditer(text):
+            found = P_TERM_SPACE.sub(' ', m.group(0))
+            message = self.messages.get(self.key(found, True)) or \
+                self.messages[self.key(found, False)]
+            yield m.start(), message.format(found)
+
+
+def trie_pattern(terms):
+    """Build a regular expression that matches any of the terms."""
+
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in P_TERM_SPACE.sub(' ', term):
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie_node_pattern(trie)
+
+
+def trie_node_pattern(node):
+    """Build the regular expression for one node of a trie of terms."""
+
+    branches = [(r'\s+' if char == ' ' else re.escape(char)) + trie_node_pattern(child)
+                for (char, child) in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+def read_markdown_files(parser, filenames, pool=None):
+    """Read files one at a time, yielding (path, data) in order.  With a
+    thread pool, up to PARSE_AHEAD files are parsed ahead of the one
+    being checked, so memory use is still bounded."""
+
+    if pool is None:
+        for filename in filenames:
+            data = read_markdown(parser, filename)
+            yield filename, data
+            # Don't hold on to this file while the next one is read.
+            del data
+        return
+
+    filenames = iter(filenames)
+    pending = deque((f, pool.submit(read_markdown, parser, f))
+                    for f in islice(filenames, PARSE_AHEAD))
+    while pending:
+        (filename, future) = pending.popleft()
+        for following in islice(filenames, 1):
+            pending.append((following, pool.submit(read_markdown, parser, following)))
+        yield filename, future.result()
+        del future
+
+
+def iter_markdown(source_dir, parser, pool=None):
+    """Read source files one at a time, yielding
+    (path, {'metadata':yaml, 'metadata_len':N, 'text':text, 'lines':[(i, line, len)], 'doc':doc})
+    """
+
+    all_dirs = [os.path.join(source_dir, d) for d in SOURCE_DIRS]
+    all_patterns = [os.path.join(d, '*.md') for d in all_dirs]
+    filenames = [filename for pat in all_patterns for filename in glob.glob(pat)]
+    for (filename, data) in read_markdown_files(parser, filenames, pool):
+        if data:
+            yield filename, data
+        del data
+
+
 def read_all_markdown(source_dir, parser):
     """Read source files, returning
     {path : {'metadata':yaml, 'metadata_len':N, 'text':text, 'lines':[(i, line, len)], 'doc':doc}}
     """
 
-    all_dirs = [os.path.join(source_dir, d) for d in SOURCE_DIRS]
-    all_patterns = [os.path.join(d, '*.md') for d in all_dirs]
-    result = {}
-    for pat in all_patterns:
-        for filename in glob.glob(pat):
-            data = read_markdown(parser, filename)
-            if data:
-                result[filename] = data
-    return result
+    return dict(iter_markdown(source_dir, parser))
+
+
+def check_all_markdown(args, pool=None):
+    """Check each source file as soon as it has been read, returning the
+    paths of the files checked.  Only one file's text, lines, and AST
+    are in memory at a time (plus any being parsed ahead in the pool),
+    so memory use does not grow with the size of the lesson.
+    """
+
+    filenames = []
+    for (filename, data) in iter_markdown(args.source_dir, args.parser, pool):
+        checker = create_checker(args, filename, data)
+        checker.check()
+        filenames.append(filename)
+        del checker, data
+    return filenames
 
 
 def check_fileset(source_dir, reporter, filenames_present):
@@ -357,6 +536,34 @@ def check_fileset(source_dir, reporter, filenames_present):
                    seen)
 
 
+def check_episode_metadata(reporter, filename, metadata):
+    """Check an episode's metadata against the fields its layout requires."""
+
+    if 'layout' in metadata:
+        if metadata['layout'] == 'break':
+            check_metadata_fields(reporter, filename, metadata, BREAK_METADATA_FIELDS)
+        else:
+            reporter.add(filename,
+                         'Unknown episode layout "{0}"',
+                         metadata['layout'])
+    else:
+        check_metadata_fields(reporter, filename, metadata, TEACHING_METADATA_FIELDS)
+
+
+def check_metadata_fields(reporter, filename, metadata, expected):
+    """Check that metadata has the expected fields with the expected types."""
+
+    for (name, type_) in expected:
+        if name not in metadata:
+            reporter.add(filename,
+                         'Missing metadata field {0}',
+                         name)
+        elif not isinstance(metadata[name], type_):
+            reporter.add(filename,
+                         '"{0}" has wrong type in metadata ({1} instead of {2})',
+                         name, type(metadata[name]), type_)
+
+
 def create_checker(args, filename, info):
     """Create appropriate checker for file."""
 
@@ -391,6 +598,8 @@ class CheckBase:
         self.check_blockquote_classes()
         self.check_codeblock_classes()
         self.check_defined_link_references()
+        self.check_terms()
+        self.collect_code_blocks()
 
     def check_metadata(self):
         """Check the YAML metadata."""
@@ -426,7 +635,7 @@ class CheckBase:
 
         if self.args.trailing_whitespace:
             trailing = [
-                i for (i, l, n) in self.lines if P_TRAILING_WHITESPACE.match(l)]
+                i for (i, l, n) in self.lines if P_TRAILING_WHITESPACE.search(l)]
             self.reporter.check(not trailing,
                                 self.filename,
                                 'Line(s) end with whitespace: {0}',
@@ -453,6 +662,33 @@ class CheckBase:
                                 'Unknown or missing code block type {0}',
                                 cls)
 
+    def check_terms(self):
+        """Check text for the terms in the terms file (if given)."""
+
+        scanner = getattr(self.args, 'terms', None)
+        if scanner is None:
+            return
+        for node in self.find_all(self.doc, {'type': 'text'}):
+            text = node['value']
+            line, seen = self.get_loc(node), 0
+            for (offset, message) in scanner.scan(text):
+                line += text.count('\n', seen, offset)
+                seen = offset
+                self.reporter.add((self.filename, line), '{0}', message)
+
+    def collect_code_blocks(self):
+        """Remember code blocks whose syntax can be checked (if wanted)."""
+
+        blocks = getattr(self.args, 'code_blocks', None)
+        if blocks is None:
+            return
+        for node in self.find_all(self.doc, {'type': 'codeblock'}):
+            language = block_language(self.get_val(node, 'attr', 'class'))
+            if language is not None:
+                # The code of a fenced block starts after the fence.
+                first_line = self.get_loc(node) + bool(self.get_val(node, 'options', 'fenced'))
+                blocks.append((self.filename, first_line, language, node['value']))
+
     def check_defined_link_references(self):
         """Check that defined links resolve in the file.
 
@@ -553,27 +789,11 @@ class CheckEpisode(CheckBase):
     def check_metadata(self):
         super().check_metadata()
         if self.metadata:
-            if 'layout' in self.metadata:
-                if self.metadata['layout'] == 'break':
-                    self.check_metadata_fields(BREAK_METADATA_FIELDS)
-                else:
-                    self.reporter.add(self.filename,
-                                      'Unknown episode layout "{0}"',
-                                      self.metadata['layout'])
-            else:
-                self.check_metadata_fields(TEACHING_METADATA_FIELDS)
+            check_episode_metadata(self.reporter, self.filename, self.metadata)
 
     def check_metadata_fields(self, expected):
         """Check metadata fields."""
-        for (name, type_) in expected:
-            if name not in self.metadata:
-                self.reporter.add(self.filename,
-                                  'Missing metadata field {0}',
-                                  name)
-            elif not isinstance(self.metadata[name], type_):
-                self.reporter.add(self.filename,
-                                  '"{0}" has wrong type in metadata ({1} instead of {2})',
-                                  name, type(self.metadata[name]), type_)
+        check_metadata_fields(self.reporter, self.filename, self.metadata, expected)
 
     def check_reference_inclusion(self):
         """Check that links file has been included."""
@@ -0,0 +1,323 @@
+"""
+Check that the external URLs used in a lesson still resolve.
+
+URLs are gathered from the shared file of reference links and from the
+links and images in every Markdown file, and each distinct URL is
+checked once however often it is used.  URLs are checked concurrently
+over pooled connections, but requests to any one host are spaced out so
+that no site is hammered.  Each URL is first requested with HEAD and,
+if that fails, with GET (some servers do not answer HEAD properly).
+
+URLs that resolve are remembered in a cache file for a while (see
+CACHE_TTL), so repeated runs only re-check broken or stale ones.
+"""
+
+
+import os
+import sys
+import json
+import time
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urlsplit
+
+# Import this way to produce a more useful error message.
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    print('Unable to import requests module: please install requests', file=sys.stderr)
+    sys.exit(1)
+
+from util import require
+from reporter import Reporter
+from lesson_check import P_INTERNAL_LINK_DEF, iter_markdown
+
+# How many URLs to check at once.
+DEFAULT_JOBS = 8
+
+# Shortest time (in seconds) between the starts of requests to one host.
+HOST_INTERVAL = 1.0
+
+# How long to wait (in seconds) for a server to respond.
+TIMEOUT = 10.0
+
+# Where to remember URLs that resolved (relative to the lesson root).
+CACHE_FILE = '.link-check-cache.json'
+
+# How long (in seconds) a URL that resolved is trusted without checking.
+CACHE_TTL = 7 * 24 * 60 * 60
+
+# Identify ourselves to servers.
+USER_AGENT = 'carpentries-link-check/1.0 (+https://github.com/carpentries/styles)'
+
+# Schemes of URLs that are checked.
+EXTERNAL_SCHEMES = {'http', 'https'}
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    reporter = Reporter()
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        urls = collect_urls(args.source_dir, args.parser, args.reference_path, pool)
+    cache_file = os.path.join(args.source_dir, args.cache_file) if args.cache_file else None
+    requested = check_links(reporter, urls, jobs=args.jobs, interval=args.interval,
+                            timeout=args.timeout, cache_file=cache_file, ttl=args.ttl)
+    reporter.report()
+    print('Checked {0} URL(s), {1} from the cache'.format(len(urls), len(urls) - requested))
+    if reporter.messages:
+        print('Problems detected.')
+        sys.exit(1)
+    print('No problems found.')
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Check the external links in a lesson.""")
+    parser.add_argument('-s', '--source',
+                        default=os.curdir,
+                        dest='source_dir',
+                        help='source directory')
+    parser.add_argument('-p', '--parser',
+                        default=None,
+                        dest='parser',
+                        help='path to Markdown parser')
+    parser.add_argument('-r', '--references',
+                        default=None,
+                        dest='reference_path',
+                        help='path to Markdown file of external references '
+                             '(default: _includes/links.md if present)')
+    parser.add_argument('-j', '--jobs',
+                        default=DEFAULT_JOBS,
+                        type=int,
+                        dest='jobs',
+                        help='number of URLs to check at once')
+    parser.add_argument('--interval',
+                        default=HOST_INTERVAL,
+                        type=float,
+                        dest='interval',
+                        help='seconds between requests to the same host')
+    parser.add_argument('--timeout',
+                        default=TIMEOUT,
+                        type=float,
+                        dest='timeout',
+                        help='seconds to wait for a server to respond')
+    parser.add_argument('-c', '--cache',
+                        default=CACHE_FILE,
+                        dest='cache_file',
+                        help='file (relative to the source directory) in which to remember '
+                             'URLs that resolved ("" for none)')
+    parser.add_argument('--ttl',
+                        default=CACHE_TTL,
+                        type=float,
+                        dest='ttl',
+                        help='seconds for which a URL that resolved is not checked again')
+
+    args, extras = parser.parse_known_args()
+    require(args.parser is not None,
+            'Path to Markdown parser not provided',
+            True)
+    require(not extras,
+            'Unexpected trailing command-line arguments "{0}"'.format(extras))
+    if args.reference_path is None:
+        links_file = os.path.join(args.source_dir, '_includes', 'links.md')
+        if os.path.isfile(links_file):
+            args.reference_path = links_file
+    return args
+
+
+def is_external(url):
+    """Is this a URL that should be checked?"""
+
+    return urlsplit(url).scheme.lower() in EXTERNAL_SCHEMES
+
+
+def read_reference_urls(ref_path):
+    """Get [(url, (path, line))] from a file of reference links."""
+
+    result = []
+    with open(ref_path, 'r', encoding='utf-8') as reader:
+        for (num, line) in enumerate(reader, 1):
+            m = P_INTERNAL_LINK_DEF.search(line)
+            if m:
+                result.append((m.group(2).strip(), (ref_path, num)))
+    return result
+
+
+def find_links(node, offset):
+    """Get [(url, line)] for the links and images in a Markdown AST."""
+
+    result = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        attr = node.get('attr', {})
+        url = attr.get('href') if node.get('type') == 'a' else \
+            attr.get('src') if node.get('type') == 'img' else None
+        if url:
+            line = node.get('options', {}).get('location')
+            result.append((url, None if line is None else line + offset))
+        stack.extend(reversed(node.get('children', [])))
+    return result
+
+
+def collect_urls(source_dir, parser, reference_path=None, pool=None):
+    """
+    Gather the external URLs used in a lesson, returning {url:
+    [location]} where each location is (path, line) or just the path.
+    URLs that differ only in their fragment are the same URL.
+    """
+
+    found = []
+    if reference_path:
+        found.extend(read_reference_urls(reference_path))
+    for (filename, data) in iter_markdown(source_dir, parser, pool):
+        offset = data['metadata_len'] or 0
+        for (url, line) in find_links(data['doc'], offset):
+            found.append((url, filename if line is None else (filename, line)))
+
+    result = {}
+    for (url, location) in found:
+        if is_external(url):
+            result.setdefault(urldefrag(url)[0], []).append(location)
+    return result
+
+
+class HostLimiter:
+    """
+    Space out the requests sent to each host.  A thread reserves the
+    next free slot for the host while holding the lock and then sleeps
+    until it comes round without holding it, so threads requesting
+    other hosts are never held up.
+    """
+
+    def __init__(self, interval=HOST_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = {}
+
+    def wait(self, url):
+        """Wait until a request to this URL's host may be sent."""
+
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def describe_response(response):
+    """Say what went wrong with a response."""
+
+    return 'status {0}{1}'.format(response.status_code,
+                                  ' ' + response.reason if response.reason else '')
+
+
+def check_url(session, limiter, url, timeout=TIMEOUT):
+    """Check one URL, returning None if it resolves or a description of
+    the problem."""
+
+    try:
+        limiter.wait(url)
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+        response.close()
+        if response.status_code < 400:
+            return None
+
+        # Some servers refuse or mishandle HEAD, so ask again for the page.
+        limiter.wait(url)
+        with session.get(url, allow_redirects=True, timeout=timeout, stream=True) as response:
+            if response.status_code < 400:
+                return None
+            return describe_response(response)
+    except requests.exceptions.Timeout:
+        return 'timed out after {0:g} seconds'.format(timeout)
+    except requests.exceptions.TooManyRedirects:
+        return 'too many redirects'
+    except requests.exceptions.ConnectionError:
+        return 'unable to connect'
+    except requests.exceptions.RequestException as e:
+        return str(e)
+
+
+def load_cache(cache_file):
+    """Load {url: time last found to resolve}."""
+
+    if not cache_file:
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as reader:
+            cache = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file, cache):
+    """Save the cache, replacing the file atomically."""
+
+    if not cache_file:
+        return
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as writer:
+        json.dump(cache, writer, indent=1, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+
+def check_urls(urls, jobs=DEFAULT_JOBS, interval=HOST_INTERVAL, timeout=TIMEOUT,
+               cache_file=None, ttl=CACHE_TTL):
+    """
+    Check URLs, returning ({url: problem} for the URLs that did not
+    resolve, number of URLs requested).  URLs that resolved less than
+    'ttl' seconds ago (according to the cache) are not requested.
+    """
+
+    cache = load_cache(cache_file)
+    now = time.time()
+    pending = [url for url in urls if now - cache.get(url, 0) >= ttl]
+
+    problems = {}
+    if pending:
+        limiter = HostLimiter(interval)
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=jobs, pool_maxsize=jobs)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = pool.map(lambda url: check_url(session, limiter, url, timeout),
+                                   pending)
+                for (url, problem) in zip(pending, results):
+                    if problem is None:
+                        cache[url] = now
+                    else:
+                        cache.pop(url, None)
+                        problems[url] = problem
+
+    # Forget URLs that are no longer used.
+    save_cache(cache_file, {url: cache[url] for url in urls if url in cache})
+    return problems, len(pending)
+
+
+def check_links(reporter, urls, jobs=DEFAULT_JOBS, interval=HOST_INTERVAL, timeout=TIMEOUT,
+                cache_file=None, ttl=CACHE_TTL):
+    """
+    Check {url: [location]}, reporting each use of a URL that does not
+    resolve, and return the number of URLs requested.
+    """
+
+    problems, requested = check_urls(urls, jobs, interval, timeout, cache_file, ttl)
+    for (url, problem) in sorted(problems.items()):
+        for location in urls[url]:
+            reporter.add(location, 'Broken link {0}: {1}', url, problem)
+    return requested
+
+
+if __name__ == '__main__':
+    main()
@@ -5,23 +5,21 @@ Check repository settings.
 
 import sys
 import os
-from subprocess import Popen, PIPE
 import re
 from argparse import ArgumentParser
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-from util import require
+from util import require, get_git_remote_url
 from reporter import Reporter
+from github_client import GitHubClient, GitHubError, API_URL, DEFAULT_CACHE_FILE
 
-# Import this way to produce a more useful error message.
-try:
-    import requests
-except ImportError:
-    print('Unable to import requests module: please install requests', file=sys.stderr)
-    sys.exit(1)
 
+# Pattern to match Git remote URLs => (user name, project name).
+P_GIT_REMOTE = re.compile(r'(?:https://|git@)github.com[:/]([^/]+)/([^.]+)(\.git)?')
 
-# Pattern to match Git command-line output for remotes => (user name, project name).
-P_GIT_REMOTE = re.compile(r'upstream\s+(?:https://|git@)github.com[:/]([^/]+)/([^.]+)(\.git)?\s+\(fetch\)')
+# Which Git remote to take the repository from.
+GIT_REMOTE = 'upstream'
 
 # Repository URL format string.
 F_REPO_URL = 'https://github.com/{0}/{1}/'
@@ -29,8 +27,15 @@ F_REPO_URL = 'https://github.com/{0}/{1}/'
 # Pattern to match repository URLs => (user name, project name)
 P_REPO_URL = re.compile(r'https?://github\.com/([^.]+)/([^/]+)/?')
 
-# API URL format string.
-F_API_URL = 'https://api.github.com/repos/{0}/{1}/labels'
+# Pattern to match short repository names => (user name, project name)
+P_REPO_NAME = re.compile(r'^([\w.-]+)/([\w.-]+)$')
+
+# How many repositories to audit at once.
+DEFAULT_JOBS = 8
+
+# A single change to a repository's labels: action is 'create',
+# 'update', or 'delete'; color is None for deletions.
+LabelChange = namedtuple('LabelChange', ['repo_url', 'action', 'name', 'color'])
 
 # Expected labels and colors.
 EXPECTED = {
@@ -63,9 +68,33 @@ def main():
     """
 
     args = parse_args()
-    reporter = Reporter()
-    repo_url = get_repo_url(args.repo_url)
-    check_labels(reporter, repo_url)
+    with GitHubClient(api_url=args.api_url, cache_file=args.cache_file,
+                      pool_size=args.jobs) as client:
+        if args.fix or args.dry_run:
+            if args.org or args.repos_file:
+                repo_urls = get_audit_repo_urls(client, args.org, args.repos_file)
+            else:
+                repo_urls = [get_repo_url(args.repo_url, args.source_dir)]
+            results = reconcile_repos(client, repo_urls, args.jobs,
+                                      apply=args.fix and not args.dry_run,
+                                      delete_extra=args.delete_extra)
+            if not report_reconcile(results, applied=args.fix and not args.dry_run):
+                sys.exit(1)
+            return
+
+        if args.org or args.repos_file:
+            repo_urls = get_audit_repo_urls(client, args.org, args.repos_file)
+            results = audit_repos(client, repo_urls, args.jobs)
+            if not report_audit(results):
+                sys.exit(1)
+            return
+
+        reporter = Reporter()
+        repo_url = get_repo_url(args.repo_url, args.source_dir)
+        try:
+            check_labels(reporter, repo_url, client)
+        except GitHubError as e:
+            require(False, str(e), True)
     reporter.report()
 
 
@@ -83,6 +112,42 @@ def parse_args():
                         default=os.curdir,
                         dest='source_dir',
                         help='source directory')
+    parser.add_argument('-c', '--cache',
+                        default=DEFAULT_CACHE_FILE,
+                        dest='cache_file',
+                        help='file in which to cache API responses')
+    parser.add_argument('--api',
+                        default=API_URL,
+                        dest='api_url',
+                        help='root URL of the GitHub API')
+    parser.add_argument('-o', '--org',
+                        default=None,
+                        dest='org',
+                        help='audit every repository in this organization')
+    parser.add_argument('-f', '--repos-file',
+                        default=None,
+                        dest='repos_file',
+                        help='audit the repositories (URLs or owner/name) listed in this file')
+    parser.add_argument('-j', '--jobs',
+                        default=DEFAULT_JOBS,
+                        type=int,
+                        dest='jobs',
+                        help='number of repositories to audit at once')
+    parser.add_argument('--fix',
+                        default=False,
+                        action='store_true',
+                        dest='fix',
+                        help='create and recolor labels to match the expected set')
+    parser.add_argument('--delete-extra',
+                        default=False,
+                        action='store_true',
+                        dest='delete_extra',
+                        help='with --fix, also delete labels that are not expected')
+    parser.add_argument('-n', '--dry-run',
+                        default=False,
+                        action='store_true',
+                        dest='dry_run',
+                        help='show the changes --fix would make without making them')
 
     args, extras = parser.parse_known_args()
     require(not extras,
@@ -91,7 +156,7 @@ def parse_args():
     return args
 
 
-def get_repo_url(repo_url):
+def get_repo_url(repo_url, source_dir=os.curdir):
     """
     Figure out which repository to query.
     """
@@ -100,64 +165,212 @@ def get_repo_url(repo_url):
     if repo_url is not None:
         return repo_url
 
-    # Guess.
-    cmd = 'git remote -v'
-    p = Popen(cmd, shell=True, stdin=PIPE, stdout=PIPE,
-              close_fds=True, universal_newlines=True, encoding='utf-8')
-    stdout_data, stderr_data = p.communicate()
-    stdout_data = stdout_data.split('\n')
-    matches = [P_GIT_REMOTE.match(line) for line in stdout_data]
-    matches = [m for m in matches if m is not None]
-    require(len(matches) == 1,
-            'Unexpected output from git remote command: "{0}"'.format(matches))
-
-    username = matches[0].group(1)
+    # Guess from the checkout's Git configuration.
+    remote_url = get_git_remote_url(source_dir, GIT_REMOTE)
+    m = P_GIT_REMOTE.match(remote_url or '')
+    require(m,
+            'Unexpected URL for git remote "{0}": "{1}"'.format(GIT_REMOTE, remote_url),
+            True)
+
+    username = m.group(1)
     require(
-        username, 'empty username in git remote output {0}'.format(matches[0]))
+        username, 'empty username in git remote URL {0}'.format(remote_url))
 
-    project_name = matches[0].group(2)
+    project_name = m.group(2)
     require(
-        username, 'empty project name in git remote output {0}'.format(matches[0]))
+        username, 'empty project name in git remote URL {0}'.format(remote_url))
 
     url = F_REPO_URL.format(username, project_name)
     return url
 
 
-def check_labels(reporter, repo_url):
+def check_labels(reporter, repo_url, client=None):
     """
     Check labels in repository.
     """
 
-    actual = get_labels(repo_url)
-    extra = set(actual.keys()) - set(EXPECTED.keys())
+    actual = get_labels(repo_url, client)
+    extra, missing, miscolored = compare_labels(actual)
 
     reporter.check(not extra,
                    None,
                    'Extra label(s) in repository {0}: {1}',
-                   repo_url, ', '.join(sorted(extra)))
+                   repo_url, ', '.join(extra))
 
-    missing = set(EXPECTED.keys()) - set(actual.keys())
     reporter.check(not missing,
                    None,
                    'Missing label(s) in repository {0}: {1}',
-                   repo_url, ', '.join(sorted(missing)))
+                   repo_url, ', '.join(missing))
 
+    for name in miscolored:
+        reporter.add(None,
+                     'Color mis-match for label {0} in {1}: expected {2}, found {3}',
+                     name, repo_url, EXPECTED[name], actual[name])
+
+
+def compare_labels(actual):
+    """
+    Compare actual labels {name: color} with the expected ones,
+    returning sorted lists of extra, missing, and miscolored names.
+    """
+
+    extra = sorted(set(actual.keys()) - set(EXPECTED.keys()))
+    missing = sorted(set(EXPECTED.keys()) - set(actual.keys()))
     overlap = set(EXPECTED.keys()).intersection(set(actual.keys()))
-    for name in sorted(overlap):
-        reporter.check(EXPECTED[name].lower() == actual[name].lower(),
-                       None,
-                       'Color mis-match for label {0} in {1}: expected {2}, found {3}',
-                       name, repo_url, EXPECTED[name], actual[name])
+    miscolored = sorted(name for name in overlap
+                        if EXPECTED[name].lower() != actual[name].lower())
+    return extra, missing, miscolored
 
 
-def get_labels(repo_url):
+def get_audit_repo_urls(client, org, repos_file):
     """
-    Get actual labels from repository.
+    Get the URLs of the repositories to audit from an organization
+    and/or a file listing repository URLs or owner/name pairs.
+    """
+
+    result = []
+    if org:
+        result.extend(F_REPO_URL.format(*name.split('/', 1))
+                      for name in client.get_org_repos(org))
+    if repos_file:
+        with open(repos_file, 'r', encoding='utf-8') as reader:
+            for line in reader:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                m = P_REPO_NAME.match(line)
+                result.append(F_REPO_URL.format(m.group(1), m.group(2)) if m else line)
+    return result
+
+
+def audit_repos(client, repo_urls, jobs=DEFAULT_JOBS):
+    """
+    Check the labels of many repositories concurrently, returning a
+    list of (repo_url, messages) in the order the URLs were given.  A
+    repository that cannot be read is reported, not fatal.
+    """
+
+    def audit(repo_url):
+        reporter = Reporter()
+        try:
+            check_labels(reporter, repo_url, client)
+        except GitHubError as e:
+            reporter.add(None, str(e))
+        return (repo_url, reporter.messages)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(audit, repo_urls))
+
+
+def report_audit(results, stream=sys.stdout):
+    """
+    Print one aggregated report for an audit, returning True if every
+    repository's labels are as expected.
+    """
+
+    failed = 0
+    for (repo_url, messages) in results:
+        if not messages:
+            print('{0}: OK'.format(repo_url), file=stream)
+            continue
+        failed += 1
+        print('{0}: {1} problem(s)'.format(repo_url, len(messages)), file=stream)
+        for m in sorted(messages, key=Reporter.key):
+            print('    ' + Reporter.pretty(m), file=stream)
+    print('Audited {0} repositories: {1} passed, {2} failed'.format(
+        len(results), len(results) - failed, failed), file=stream)
+    return failed == 0
+
+
+def plan_labels(repo_url, actual, delete_extra=False):
+    """
+    Work out the fewest changes that make a repository's labels match
+    the expected ones: one per missing, miscolored, or (optionally)
+    extra label.
+    """
+
+    extra, missing, miscolored = compare_labels(actual)
+    changes = [LabelChange(repo_url, 'create', name, EXPECTED[name]) for name in missing]
+    changes.extend(LabelChange(repo_url, 'update', name, EXPECTED[name]) for name in miscolored)
+    if delete_extra:
+        changes.extend(LabelChange(repo_url, 'delete', name, None) for name in extra)
+    return changes
+
+
+def apply_change(client, change):
+    """Make a single label change."""
+
+    username, project_name = parse_repo_url(change.repo_url)
+    if change.action == 'create':
+        client.create_label(username, project_name, change.name, change.color)
+    elif change.action == 'update':
+        client.update_label(username, project_name, change.name, change.color)
+    elif change.action == 'delete':
+        client.delete_label(username, project_name, change.name)
+    else:
+        raise ValueError('unknown label change {0}'.format(change.action))
+
+
+def reconcile_repos(client, repo_urls, jobs=DEFAULT_JOBS, apply=False, delete_extra=False):
+    """
+    Plan (and, if 'apply' is true, make) the label changes for many
+    repositories concurrently, returning a list of (repo_url, changes,
+    errors) in the order the URLs were given.
+    """
+
+    def reconcile(repo_url):
+        errors = []
+        try:
+            changes = plan_labels(repo_url, get_labels(repo_url, client), delete_extra)
+        except GitHubError as e:
+            return (repo_url, [], [str(e)])
+        if apply:
+            for change in changes:
+                try:
+                    apply_change(client, change)
+                except GitHubError as e:
+                    errors.append(str(e))
+        return (repo_url, changes, errors)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(reconcile, repo_urls))
+
+
+def report_reconcile(results, applied, stream=sys.stdout):
+    """
+    Print the planned or applied label changes, returning True if
+    there were no errors.
+    """
+
+    verb = 'made' if applied else 'planned'
+    total = 0
+    failed = 0
+    for (repo_url, changes, errors) in results:
+        total += len(changes)
+        failed += bool(errors)
+        if not (changes or errors):
+            print('{0}: OK'.format(repo_url), file=stream)
+            continue
+        print('{0}: {1} change(s) {2}'.format(repo_url, len(changes), verb), file=stream)
+        for change in changes:
+            color = '' if change.color is None else ' ({0})'.format(change.color)
+            print('    {0} "{1}"{2}'.format(change.action, change.name, color), file=stream)
+        for error in errors:
+            print('    ERROR: {0}'.format(error), file=stream)
+    print('{0} change(s) {1} in {2} repositories, {3} with errors'.format(
+        total, verb, len(results), failed), file=stream)
+    return failed == 0
+
+
+def parse_repo_url(repo_url):
+    """
+    Split a repository URL into (user name, project name).
     """
 
     m = P_REPO_URL.match(repo_url)
-    require(
-        m, 'repository URL {0} does not match expected pattern'.format(repo_url))
+    if not m:
+        raise GitHubError(repo_url, 'invalid URL',
+                          'repository URL does not match expected pattern')
 
     username = m.group(1)
     require(username, 'empty username in repository URL {0}'.format(repo_url))
@@ -166,15 +379,19 @@ def get_labels(repo_url):
     require(
         username, 'empty project name in repository URL {0}'.format(repo_url))
 
-    url = F_API_URL.format(username, project_name)
-    r = requests.get(url)
-    require(r.status_code == 200,
-            'Request for {0} failed with {1}'.format(url, r.status_code))
+    return username, project_name
 
-    result = {}
-    for entry in r.json():
-        result[entry['name']] = entry['color']
-    return result
+
+def get_labels(repo_url, client=None):
+    """
+    Get actual labels from repository.
+    """
+
+    username, project_name = parse_repo_url(repo_url)
+    if client is None:
+        with GitHubClient() as client:
+            return client.get_labels(username, project_name)
+    return client.get_labels(username, project_name)
 
 
 if __name__ == '__main__':
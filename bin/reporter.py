@@ -37,6 +37,11 @@ class Reporter:
 
         self.messages.append((location, fmt.format(*args)))
 
+    def extend(self, items):
+        """Append (location, message) pairs that are already formatted."""
+
+        self.messages.extend(items)
+
     @staticmethod
     def pretty(item):
         location, message = item
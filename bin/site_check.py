@@ -0,0 +1,311 @@
+"""
+Check the HTML pages of a generated website.
+"""
+
+
+import os
+import sys
+import json
+import hashlib
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, unquote
+
+from util import require
+from reporter import Reporter
+
+# Where the generated site is.
+DEFAULT_SITE_DIR = '_site'
+
+# How much of a page to feed to the parser at a time.
+CHUNK_SIZE = 64 * 1024
+
+# Attributes that refer to other files, by tag.
+LINK_ATTRIBUTES = {
+    'a': 'href',
+    'area': 'href',
+    'link': 'href',
+    'img': 'src',
+    'script': 'src',
+    'source': 'src',
+    'iframe': 'src',
+    'audio': 'src',
+    'video': 'src',
+    'embed': 'src',
+}
+
+# Elements whose text is not visible content.
+INVISIBLE_ELEMENTS = {'head', 'script', 'style', 'title'}
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    reporter = Reporter()
+    check_site(reporter, args.site_dir, args.baseurl, args.jobs, args.cache_file)
+    reporter.report()
+    if reporter.messages:
+        print('Problems detected.')
+        sys.exit(1)
+    print('No problems found.')
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Check pages of a generated website.""")
+    parser.add_argument('-s', '--site',
+                        default=DEFAULT_SITE_DIR,
+                        dest='site_dir',
+                        help='directory containing the generated site')
+    parser.add_argument('-b', '--baseurl',
+                        default='',
+                        dest='baseurl',
+                        help='prefix of absolute links to pages of this site')
+    parser.add_argument('-j', '--jobs',
+                        default=None,
+                        type=int,
+                        dest='jobs',
+                        help='number of worker processes')
+    parser.add_argument('-c', '--cache',
+                        default=None,
+                        dest='cache_file',
+                        help='file in which to cache per-page results')
+
+    args, extras = parser.parse_known_args()
+    require(not extras,
+            'Unexpected trailing command-line arguments "{0}"'.format(extras))
+    require(os.path.isdir(args.site_dir),
+            'Site directory {0} not found (run "make site" first)'.format(args.site_dir),
+            True)
+
+    return args
+
+
+class PageScanner(HTMLParser):
+    """Collect the facts about a page that the checks need."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.ids = {}
+        self.duplicate_ids = []
+        self.missing_alt = []
+        self.invisible = 0
+        self.has_content = False
+
+    def handle_starttag(self, tag, attrs):
+        line = self.getpos()[0]
+        attrs = dict(attrs)
+        if tag in INVISIBLE_ELEMENTS:
+            self.invisible += 1
+        if tag in ('img', 'video', 'iframe', 'svg'):
+            self.has_content = True
+
+        ident = attrs.get('id')
+        if ident:
+            if ident in self.ids:
+                self.duplicate_ids.append((line, ident))
+            else:
+                self.ids[ident] = line
+
+        name = LINK_ATTRIBUTES.get(tag)
+        if name and attrs.get(name):
+            self.links.append((line, attrs[name]))
+
+        if tag == 'img' and attrs.get('alt') is None:
+            self.missing_alt.append((line, attrs.get('src', '')))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in INVISIBLE_ELEMENTS:
+            self.invisible -= 1
+
+    def handle_endtag(self, tag):
+        if tag in INVISIBLE_ELEMENTS and self.invisible:
+            self.invisible -= 1
+
+    def handle_data(self, data):
+        if not self.invisible and data.strip():
+            self.has_content = True
+
+    def facts(self):
+        """The results of scanning, as JSON-friendly values."""
+
+        return {
+            'links': self.links,
+            'ids': sorted(self.ids),
+            'duplicate_ids': self.duplicate_ids,
+            'missing_alt': self.missing_alt,
+            'empty': not self.has_content,
+        }
+
+
+def scan_page(path):
+    """Stream a page through the scanner, returning its facts."""
+
+    scanner = PageScanner()
+    with open(path, 'r', encoding='utf-8', errors='replace') as reader:
+        for chunk in iter(lambda: reader.read(CHUNK_SIZE), ''):
+            scanner.feed(chunk)
+    scanner.close()
+    return scanner.facts()
+
+
+def file_digest(path):
+    """Hash the contents of a file."""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as reader:
+        for chunk in iter(lambda: reader.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_site(site_dir):
+    """Return the set of all generated files, relative to the site root."""
+
+    result = set()
+    for (dirpath, dirnames, filenames) in os.walk(site_dir):
+        rel_dir = os.path.relpath(dirpath, site_dir)
+        for filename in filenames:
+            path = filename if rel_dir == os.curdir else os.path.join(rel_dir, filename)
+            result.add(path.replace(os.sep, '/'))
+    return result
+
+
+def load_cache(cache_file):
+    """Load cached page facts as {page: {'stamp':..., 'digest':..., 'facts':...}}."""
+
+    if not cache_file:
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as reader:
+            cache = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file, cache):
+    """Save page facts, replacing the cache file atomically."""
+
+    if not cache_file:
+        return
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as writer:
+        json.dump(cache, writer)
+    os.replace(temp_file, cache_file)
+
+
+def scan_site(site_dir, pages, jobs=None, cache_file=None):
+    """
+    Get the facts for every page, returning {page: facts}.  Pages whose
+    contents have not changed since the last run are not parsed again.
+    """
+
+    cache = load_cache(cache_file)
+    result = {}
+    pending = []
+    for page in pages:
+        path = os.path.join(site_dir, page)
+        info = os.stat(path)
+        stamp = [info.st_size, info.st_mtime_ns]
+        entry = cache.get(page)
+        if entry and entry['stamp'] == stamp:
+            result[page] = entry['facts']
+            continue
+        digest = file_digest(path)
+        if entry and entry['digest'] == digest:
+            entry['stamp'] = stamp
+            result[page] = entry['facts']
+            continue
+        pending.append((page, stamp, digest))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            paths = [os.path.join(site_dir, p[0]) for p in pending]
+            for ((page, stamp, digest), facts) in zip(pending, pool.map(scan_page, paths)):
+                cache[page] = {'stamp': stamp, 'digest': digest, 'facts': facts}
+                result[page] = facts
+
+    for page in set(cache) - set(pages):
+        del cache[page]
+    save_cache(cache_file, cache)
+    return result
+
+
+def resolve_link(page, link, baseurl=''):
+    """
+    Turn a link on a page into (target file relative to the site root,
+    fragment), or None if the link is external.  A target of None means
+    the link refers to the page itself.
+    """
+
+    parts = urlsplit(link)
+    if parts.scheme or parts.netloc:
+        return None
+    path = unquote(parts.path)
+    if not path:
+        return (None, parts.fragment)
+
+    if path.startswith('/'):
+        if baseurl and (path == baseurl or path.startswith(baseurl.rstrip('/') + '/')):
+            path = path[len(baseurl.rstrip('/')):]
+        path = path.lstrip('/')
+    else:
+        path = os.path.join(os.path.dirname(page), path).replace(os.sep, '/')
+    target = os.path.normpath(path).replace(os.sep, '/')
+    if target == os.curdir:
+        target = ''
+    if path.endswith('/') or not target:
+        target = (target + '/index.html').lstrip('/')
+    return (target, parts.fragment)
+
+
+def find_target(target, files):
+    """Find the generated file a link target refers to, or None."""
+
+    for candidate in (target, target + '/index.html', target + '.html'):
+        if candidate in files:
+            return candidate
+    return None
+
+
+def check_site(reporter, site_dir, baseurl='', jobs=None, cache_file=None):
+    """Check every page in a generated site."""
+
+    files = index_site(site_dir)
+    pages = sorted(f for f in files if f.endswith('.html'))
+    facts = scan_site(site_dir, pages, jobs, cache_file)
+
+    for page in pages:
+        info = facts[page]
+        filename = os.path.join(site_dir, page)
+        reporter.check(not info['empty'],
+                       filename,
+                       'Page has no content')
+        for (line, ident) in info['duplicate_ids']:
+            reporter.add((filename, line), 'Duplicate id "{0}"', ident)
+        for (line, src) in info['missing_alt']:
+            reporter.add((filename, line), 'Image {0} has no alt text', src)
+        for (line, link) in info['links']:
+            resolved = resolve_link(page, link, baseurl)
+            if resolved is None:
+                continue
+            target, fragment = resolved
+            if target is None:
+                found = page
+            else:
+                found = find_target(target, files)
+                if found is None:
+                    reporter.add((filename, line), 'Broken link to {0}', link)
+                    continue
+            if fragment and found.endswith('.html') and fragment not in facts[found]['ids']:
+                reporter.add((filename, line), 'Link to missing anchor {0}', link)
+
+
+if __name__ == '__main__':
+    main()
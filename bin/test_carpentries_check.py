@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import ast_fixtures
+import carpentries_check
+import reporter
+import util
+from test_repo_check import FakeGitHub
+from test_workshop_check import VALID_HEADER
+import repo_check
+
+
+class TestCarpentriesCheck(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.reporter = reporter.Reporter()
+        patcher = mock.patch('util.parse_markdown', ast_fixtures.parse_recorded)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        util._YAML_CACHE.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def run_checks(self, *argv, pool=None):
+        args = carpentries_check.parse_args(list(argv))
+        return carpentries_check.run_checks(args, self.reporter, pool)
+
+    def make_workshop(self, kind='workshop'):
+        root = os.path.join(self.tempdir, '2020-02-17-euphoria')
+        os.mkdir(root)
+        with open(os.path.join(root, 'index.md'), 'w', encoding='utf-8') as writer:
+            writer.write(VALID_HEADER)
+        with open(os.path.join(root, '_config.yml'), 'w', encoding='utf-8') as writer:
+            writer.write('kind: {0}\ncarpentry: swc\n'.format(kind))
+        return root
+
+    def test_lesson(self):
+        parsed = []
+        load = util.yaml.load
+
+        def counting_load(stream, **kwargs):
+            if hasattr(stream, 'name'):  # a file rather than a header
+                parsed.append(stream.name)
+            return load(stream, **kwargs)
+
+        with mock.patch('util.yaml.load', counting_load):
+            checks = self.run_checks('-s', ast_fixtures.LESSON_DIR, 'all', '-l', '-w')
+        self.assertEqual(checks, ['lesson'])
+        self.assertEqual(parsed, [os.path.join(ast_fixtures.LESSON_DIR, '_config.yml')])
+        self.assertEqual(len(self.reporter.messages), 15)
+
+    def test_parser_pool(self):
+        self.run_checks('-s', ast_fixtures.LESSON_DIR, 'lesson', '-l', '-w')
+        expected = sorted(self.reporter.messages, key=self.reporter.key)
+        self.reporter = reporter.Reporter()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            self.run_checks('-s', ast_fixtures.LESSON_DIR, 'lesson', '-l', '-w', pool=pool)
+        self.assertEqual(sorted(self.reporter.messages, key=self.reporter.key), expected)
+
+    def test_workshop(self):
+        root = self.make_workshop()
+        self.assertEqual(self.run_checks('-s', root, 'all'), ['workshop'])
+        self.assertEqual(self.reporter.messages, [])
+
+    def test_unknown_kind(self):
+        root = self.make_workshop(kind='tutorial')
+        self.assertEqual(self.run_checks('-s', root, 'all'), [])
+        self.assertEqual([message for (_, message) in self.reporter.messages],
+                         ['Missing or unknown kind of repository: tutorial'])
+
+    def test_labels(self):
+        root = self.make_workshop()
+        server = FakeGitHub({'swcarpentry/2020-02-17-euphoria': dict(repo_check.EXPECTED)})
+        self.addCleanup(server.stop)
+        checks = self.run_checks('-s', root, 'all', '--labels', '--api', server.url,
+                                 '--github-cache', os.path.join(self.tempdir, 'cache.json'),
+                                 '--repo', 'https://github.com/swcarpentry/2020-02-17-euphoria/')
+        self.assertEqual(checks, ['workshop', 'repo'])
+        self.assertEqual(self.reporter.messages, [])
+        self.assertEqual(len(server.log), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
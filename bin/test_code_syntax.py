@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import code_syntax
+import reporter
+
+
+class TestLanguages(unittest.TestCase):
+    def test_block_language(self):
+        self.assertEqual(code_syntax.block_language('language-python'), 'python')
+        self.assertEqual(code_syntax.block_language('language-bash'), 'shell')
+        self.assertIsNone(code_syntax.block_language('output'))
+        self.assertIsNone(code_syntax.block_language(None))
+
+    def test_python(self):
+        self.assertIsNone(code_syntax.check_python('%matplotlib inline\nimport os\n!ls\n'))
+        self.assertEqual(code_syntax.check_python('x = 1\nprint "x"\n')[0], 2)
+
+    def test_sql(self):
+        # Tables that do not exist are not syntax errors.
+        self.assertIsNone(code_syntax.check_sql('.mode csv\nSELECT * FROM surveys;\n'
+                                                'SELECT 1; SELECT "a;b";\n-- done\n'))
+        self.assertEqual(code_syntax.check_sql('SELECT 1;\n\nSELEC 2;\n'),
+                         (3, 'SQL syntax error: near "SELEC": syntax error'))
+        self.assertEqual(code_syntax.check_sql('SELECT *\nFROM\n'),
+                         (1, 'SQL syntax error: incomplete input'))
+
+    @unittest.skipIf(code_syntax.BASH is None, 'bash is not installed')
+    def test_shell(self):
+        self.assertIsNone(code_syntax.check_shell('for f in *.txt\ndo\n  wc -l $f\ndone\n'))
+        self.assertEqual(code_syntax.check_shell('if true; then\n  echo\nfi fi\n'),
+                         (3, "Shell syntax error: syntax error near unexpected token `fi'"))
+
+
+class TestCheckCodeBlocks(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tempdir, 'cache.json')
+        self.blocks = [
+            ('a.md', 10, 'python', 'print(1)\n'),
+            ('a.md', 20, 'python', 'x = 1\nif x\n'),
+            ('b.md', 5, 'sql', 'SELECT 1;\n'),
+            ('b.md', 30, 'python', 'x = 1\nif x\n'),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def check(self, blocks):
+        rep = reporter.Reporter()
+        checked = code_syntax.check_code_blocks(rep, blocks, jobs=2, cache_file=self.cache_file)
+        return checked, [location for (location, _) in rep.messages]
+
+    def test_errors_are_located_in_files(self):
+        self.assertEqual(self.check(self.blocks), (3, [('a.md', 21), ('b.md', 31)]))
+
+    def test_unchanged_blocks_are_cached(self):
+        self.check(self.blocks)
+        self.assertEqual(self.check(self.blocks), (0, [('a.md', 21), ('b.md', 31)]))
+        changed = self.blocks[:1] + [('a.md', 20, 'python', 'x = 1\nif x:\n    pass\n')]
+        self.assertEqual(self.check(changed), (1, []))
+
+    def test_messages_with_braces(self):
+        rep = reporter.Reporter()
+        code_syntax.check_code_blocks(rep, [('a.md', 3, 'sql', 'SELECT {1};\n')], jobs=1)
+        self.assertEqual(rep.messages,
+                         [(('a.md', 3), 'SQL syntax error: unrecognized token: "{"')])
+
+
+if __name__ == "__main__":
+    unittest.main()
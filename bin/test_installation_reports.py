@@ -0,0 +1,92 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import installation_reports
+
+
+def make_report(system, failures=(), version='1.0'):
+    """An installation report in which the named checks failed."""
+
+    checks = []
+    for name in ('git', 'python', 'numpy'):
+        entry = {'check': name, 'name': name, 'passed': name not in failures,
+                 'version': None if name in failures else version, 'error': None}
+        if name in failures:
+            entry['error'] = {'check': name, 'message': 'errors finding {0} version'.format(name),
+                              'causes': [{'check': name, 'message': 'could not find {0}\nmore'.format(name),
+                                          'causes': []}]}
+        checks.append(entry)
+    return {'format': 1, 'script_version': '0.2', 'created': '2026-01-01T00:00:00Z',
+            'platform': {'system': system, 'os_version': '11' if system == 'Windows' else None,
+                         'python_version': '3.11.7'},
+            'checks': checks}
+
+
+class TestInstallationReports(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.reports_dir = os.path.join(self.tempdir, 'reports')
+        os.makedirs(self.reports_dir)
+        self.db = installation_reports.open_index(os.path.join(self.tempdir, 'index.sqlite'))
+        for i in range(5):
+            self.write('learner-{0}.json'.format(i),
+                       make_report('Windows' if i < 3 else 'Linux', ['numpy'] if i % 2 else []))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tempdir)
+
+    def write(self, filename, report):
+        with open(os.path.join(self.reports_dir, filename), 'w', encoding='utf-8') as writer:
+            writer.write(report if isinstance(report, str) else json.dumps(report))
+
+    def update(self):
+        return installation_reports.update_index(self.db, self.reports_dir)
+
+    def test_summary(self):
+        self.update()
+        self.assertEqual(installation_reports.failures_by_check(self.db), [('numpy', 2, 5)])
+        self.assertEqual(installation_reports.failures_by_platform(self.db, 'numpy'),
+                         [('Linux', None, None, 1, 1), ('Windows', '11', None, 1, 1)])
+        self.assertEqual(installation_reports.common_causes(self.db, 'numpy'),
+                         [('could not find numpy', 2)])
+        output = io.StringIO()
+        installation_reports.print_summary(self.db, output)
+        self.assertIn('numpy: 2 of 5 failed', output.getvalue())
+        self.assertIn('  Windows 11 (no version): 1 of 1', output.getvalue())
+
+    def test_failures_by_version(self):
+        report = make_report('Windows', version='0.9')
+        report['checks'][2].update(passed=False, error={
+            'check': 'numpy', 'message': 'outdated version of numpy: 0.9', 'causes': []})
+        self.write('learner-old.json', report)
+        self.update()
+        self.assertEqual(installation_reports.failures_by_platform(self.db, 'numpy'),
+                         [('Linux', None, None, 1, 1), ('Windows', '11', None, 1, 1),
+                          ('Windows', '11', '0.9', 1, 1)])
+
+    def test_incremental_update(self):
+        self.assertEqual(self.update(), {'read': 5, 'unchanged': 0, 'removed': 0})
+        self.write('learner-5.json', make_report('Darwin', ['git', 'numpy']))
+        self.write('notes.txt', 'not a report')
+        os.remove(os.path.join(self.reports_dir, 'learner-0.json'))
+        self.assertEqual(self.update(), {'read': 1, 'unchanged': 4, 'removed': 1})
+        self.assertEqual(installation_reports.failures_by_check(self.db),
+                         [('numpy', 3, 5), ('git', 1, 5)])
+
+    def test_unreadable_report(self):
+        self.write('broken.json', '{"checks": [')
+        self.write('strange.json', dict(make_report('Linux'), platform='Linux'))
+        self.update()
+        self.assertEqual(self.update(), {'read': 0, 'unchanged': 7, 'removed': 0})
+        output = io.StringIO()
+        installation_reports.print_summary(self.db, output)
+        self.assertTrue(output.getvalue().startswith('5 report(s), 2 unreadable'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,395 @@
+import io
+import json
+import os
+import sys
+import time
+import shutil
+import subprocess
+import tempfile
+import unittest
+import importlib
+import importlib.util
+from contextlib import redirect_stdout
+from unittest import mock
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      os.pardir, 'setup', 'swc-installation-test-2.py')
+
+
+def load_script():
+    """Import the installation test script (its name is not a module name)."""
+
+    spec = importlib.util.spec_from_file_location('swc_installation_test', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeCommands:
+    """Directory of shell scripts standing in for installed programs."""
+
+    def __init__(self):
+        self.bin_dir = tempfile.mkdtemp()
+        self.old_path = os.environ['PATH']
+        os.environ['PATH'] = self.bin_dir + os.pathsep + self.old_path
+
+    def add(self, command, output='', delay=0, status=0):
+        path = os.path.join(self.bin_dir, command)
+        with open(path, 'w') as writer:
+            writer.write('#!/bin/sh\necho called >> "{0}.log"\nsleep {1}\necho "{2}"\nexit {3}\n'.format(
+                path, delay, output, status))
+        os.chmod(path, 0o755)
+
+    def calls(self, command):
+        try:
+            with open(os.path.join(self.bin_dir, command + '.log')) as reader:
+                return len(reader.readlines())
+        except OSError:
+            return 0
+
+    def remove(self):
+        os.environ['PATH'] = self.old_path
+        shutil.rmtree(self.bin_dir)
+
+
+@unittest.skipIf(sys.platform == 'win32', 'fake commands are shell scripts')
+class TestParallelChecks(unittest.TestCase):
+    def setUp(self):
+        self.commands = FakeCommands()
+        self.script = load_script()
+
+    def tearDown(self):
+        self.commands.remove()
+
+    def run_checks(self, checks, **kwargs):
+        kwargs.setdefault('cache_file', os.path.join(self.commands.bin_dir, 'cache.json'))
+        self.script = load_script()  # a new run of the script
+        output = io.StringIO()
+        with redirect_stdout(output):
+            passed = self.script.check(checks, **kwargs)
+        return passed, output.getvalue()
+
+    def test_probes_run_concurrently_in_order(self):
+        for command in ('git', 'hg', 'sqlite3'):
+            self.commands.add(command, '{0} version 9.9.9'.format(command), delay=0.5)
+        start = time.time()
+        passed, output = self.run_checks(['git', 'hg', 'sqlite3'])
+        self.assertLess(time.time() - start, 1.2)
+        self.assertTrue(passed)
+        lines = output.splitlines()
+        self.assertEqual(lines[:3], ['check Git (git)...\tpass',
+                                     'check Mercurial (hg)...\tpass',
+                                     'check SQLite 3 (sqlite3)...\tpass'])
+
+    def test_shared_dependency_is_probed_once(self):
+        self.commands.add('hg', 'Mercurial version 1.0', delay=0.2)
+        passed, output = self.run_checks(['hg', 'hg', 'hg'])
+        self.assertFalse(passed)
+        self.assertEqual(output.count('fail\n'), 3)
+        self.assertEqual(output.count('outdated version'), 1)
+        self.assertEqual(self.commands.calls('hg'), 1)
+
+    def test_hung_probe_times_out(self):
+        self.commands.add('git', 'git version 9.9.9', delay=30)
+        start = time.time()
+        passed, output = self.run_checks(['git'], timeout=0.5)
+        self.assertLess(time.time() - start, 5)
+        self.assertFalse(passed)
+        self.assertIn('timed out after 0.5 seconds: {0} --version'.format(
+            os.path.join(self.commands.bin_dir, 'git')), output)
+
+    def test_check_stuck_in_python_does_not_block_exit(self):
+        code = '''
+import importlib.util, time
+spec = importlib.util.spec_from_file_location('script', {0!r})
+script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(script)
+class Stuck(script.Dependency):
+    def _check(self):
+        time.sleep(30)
+script.CHECKER['stuck'] = Stuck('stuck')
+script.CHECKER['other'] = Stuck('other')
+print(script.check(['stuck', 'other'], timeout=0.2, total_timeout=0.2,
+                   cache_file=None))
+'''.format(SCRIPT)
+        start = time.time()
+        result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                                universal_newlines=True, timeout=20)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(result.stdout.count('fail\n'), 2)
+        self.assertIn('timed out checking stuck', result.stdout)
+
+    def test_total_timeout(self):
+        self.commands.add('git', 'git version 9.9.9', delay=30)
+        self.commands.add('hg', 'Mercurial version 9.9.9', delay=30)
+        start = time.time()
+        passed, output = self.run_checks(['git', 'hg'], timeout=10, total_timeout=0.5)
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(output.count('fail\n'), 2)
+
+    def test_alternatives_are_cancelled(self):
+        for shell in ('dash', 'ash', 'zsh', 'ksh', 'csh', 'tcsh', 'sh'):
+            self.commands.add(shell, '{0} 1.0'.format(shell), delay=30)
+        self.commands.add('bash', 'GNU bash, version 5.0.0', delay=0.5)
+        start = time.time()
+        passed, output = self.run_checks(['virtual-shell'])
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(passed)
+        self.assertIn('Bourne Again Shell (bash) 5.0.0', output)
+        self.assertEqual(self.commands.calls('dash'), 1)
+
+    def test_missing_commands_are_not_spawned(self):
+        with mock.patch.object(self.script._subprocess, 'Popen') as popen:
+            passed, output = self.run_checks(['kate', 'notepad++'])
+        self.assertFalse(passed)
+        self.assertEqual(popen.call_count, 0)
+        self.assertIn("could not find 'kate' executable", output)
+
+    def test_path_is_indexed_once(self):
+        self.commands.add('git', 'git version 9.9.9')
+        self.commands.add('hg', 'Mercurial version 9.9.9')
+        with mock.patch.object(self.script._os, 'listdir', wraps=os.listdir) as listdir:
+            passed, output = self.run_checks(['git', 'hg', 'kate'])
+        self.assertEqual(listdir.call_count, len(os.environ['PATH'].split(os.pathsep)))
+        self.assertEqual(output.count('pass\n'), 2)
+
+    def test_results_are_cached(self):
+        self.commands.add('git', 'git version 9.9.9')
+        self.commands.add('hg', 'Mercurial version 1.0')
+        first = self.run_checks(['git', 'hg'])
+        second = self.run_checks(['git', 'hg'])
+        self.assertEqual(first, second)
+        self.assertEqual((self.commands.calls('git'), self.commands.calls('hg')), (1, 1))
+
+        self.commands.add('hg', 'Mercurial version 2.5.0')  # upgrade
+        passed, output = self.run_checks(['git', 'hg'])
+        self.assertTrue(passed)
+        self.assertEqual((self.commands.calls('git'), self.commands.calls('hg')), (1, 2))
+
+        self.run_checks(['git', 'hg'], fresh=True)
+        self.assertEqual((self.commands.calls('git'), self.commands.calls('hg')), (2, 3))
+
+    def test_timeouts_are_not_cached(self):
+        self.commands.add('git', 'git version 9.9.9', delay=30)
+        self.run_checks(['git'], timeout=0.2)
+        self.run_checks(['git'], timeout=0.2)
+        self.assertEqual(self.commands.calls('git'), 2)
+
+    def test_json_report(self):
+        self.commands.add('git', 'git version 9.9.9')
+        json_file = os.path.join(self.commands.bin_dir, 'report.json')
+        for _ in range(2):  # the second time, from the cache
+            self.run_checks(['git', 'hg'], json_file=json_file)
+            with open(json_file) as reader:
+                report = json.load(reader)
+            self.assertEqual(report['platform']['python_executable'], sys.executable)
+            self.assertEqual([(c['check'], c['passed'], c['version']) for c in report['checks']],
+                             [('git', True, '9.9.9'), ('hg', False, None)])
+            self.assertEqual(report['checks'][1]['error'],
+                             {'check': 'hg', 'message': "could not find 'hg' executable", 'causes': []})
+
+    def test_json_report_on_stdout(self):
+        self.commands.add('git', 'git version 9.9.9')
+        env = dict(os.environ, HOME=self.commands.bin_dir)
+        result = subprocess.run([sys.executable, SCRIPT, '--json', '-', 'git'], env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        self.assertEqual(result.returncode, 0)
+        report = json.loads(result.stdout)
+        self.assertEqual([(c['check'], c['version']) for c in report['checks']],
+                         [('git', '9.9.9')])
+        self.assertIn('check Git (git)...\tpass', result.stderr)
+
+    def test_interactive_checks_are_detected(self):
+        self.assertTrue(self.script.CHECKER['virtual-editor'].interactive())
+        self.assertFalse(self.script.CHECKER['virtual-browser'].interactive())
+
+
+class TestPackageChecks(unittest.TestCase):
+    def setUp(self):
+        self.site_dir = tempfile.mkdtemp()
+        self.marker = os.path.join(self.site_dir, 'imported')
+        self.add_package('heavy', '2.5.1', 'from . import plot\n')
+        self.add_package('heavy/plot', None, '')
+        self.add_package('tornado', '6.4', 'version = "6.4"\nversion_info = (6, 4, 0, 0)\n')
+        sys.path.insert(0, self.site_dir)
+        importlib.invalidate_caches()
+        self.script = load_script()
+
+    def tearDown(self):
+        sys.path.remove(self.site_dir)
+        for name in ('heavy', 'heavy.plot', 'tornado'):
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.site_dir)
+
+    def add_package(self, package, version, code):
+        """Install a package that records when it is imported."""
+
+        package_dir = os.path.join(self.site_dir, package)
+        os.makedirs(package_dir)
+        with open(os.path.join(package_dir, '__init__.py'), 'w') as writer:
+            writer.write('open({0!r}, "a").write({1!r})\n'.format(self.marker, package))
+            writer.write(code)
+        if version:
+            info_dir = os.path.join(self.site_dir, '{0}-{1}.dist-info'.format(package, version))
+            os.makedirs(info_dir)
+            with open(os.path.join(info_dir, 'METADATA'), 'w') as writer:
+                writer.write('Metadata-Version: 2.1\nName: {0}\nVersion: {1}\n'.format(
+                    package, version))
+
+    def imported(self):
+        return os.path.exists(self.marker)
+
+    def checker(self, package, minimum_version=(2, 0)):
+        return self.script.PythonPackageDependency(
+            package=package, name=package, minimum_version=minimum_version)
+
+    def test_version_from_metadata(self):
+        self.assertEqual(self.checker('heavy').check(), '2.5.1')
+        self.assertFalse(self.imported())
+
+    def test_submodule_found_without_importing_parent(self):
+        self.assertEqual(self.checker('heavy.plot').check(), '2.5.1')
+        self.assertFalse(self.imported())
+
+    def test_missing_package(self):
+        with self.assertRaises(self.script.DependencyError) as context:
+            self.checker('heavy.missing').check()
+        self.assertIn("could not find the 'heavy.missing' package", str(context.exception))
+
+    def test_tornado(self):
+        checker = self.script.TornadoPythonPackage(
+            package='tornado', name='tornado', minimum_version=(6, 5))
+        with self.assertRaises(self.script.DependencyError) as context:
+            checker.check()
+        self.assertIn('outdated version of tornado: 6.4', str(context.exception))
+        self.assertFalse(self.imported())
+
+    def test_deep_imports(self):
+        self.script._deep = True
+        self.assertEqual(self.checker('heavy', None).check(), None)  # no __version__
+        self.assertTrue(self.imported())
+
+
+@unittest.skipIf(sys.platform == 'win32', 'environment layout differs on Windows')
+class TestEnvironments(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.venv = os.path.join(self.tempdir, 'learner-env')
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', self.venv], check=True)
+        site_dir = subprocess.run(
+            [os.path.join(self.venv, 'bin', 'python'), '-c',
+             'import sysconfig; print(sysconfig.get_paths()["purelib"])'],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout.strip()
+        os.makedirs(os.path.join(site_dir, 'zmq', 'sugar'))
+        with open(os.path.join(site_dir, 'zmq', '__init__.py'), 'w') as writer:
+            writer.write('raise ImportError("must not be imported")\n')
+        open(os.path.join(site_dir, 'zmq', 'sugar', '__init__.py'), 'w').close()
+        info_dir = os.path.join(site_dir, 'pyzmq-2.0.0.dist-info')
+        os.makedirs(info_dir)
+        with open(os.path.join(info_dir, 'METADATA'), 'w') as writer:
+            writer.write('Metadata-Version: 2.1\nName: pyzmq\nVersion: 2.0.0\n')
+        self.old_env = os.environ.get('VIRTUAL_ENV')
+        os.environ['VIRTUAL_ENV'] = self.venv
+        self.script = load_script()
+
+    def tearDown(self):
+        if self.old_env is None:
+            del os.environ['VIRTUAL_ENV']
+        else:
+            os.environ['VIRTUAL_ENV'] = self.old_env
+        shutil.rmtree(self.tempdir)
+
+    def test_environment_matrix(self):
+        interpreters = self.script.find_python_interpreters()
+        self.assertEqual(interpreters[0], sys.executable)
+        learner_python = os.path.join(self.venv, 'bin', 'python')
+        self.assertIn(learner_python, interpreters)
+
+        checkers = [self.script.CHECKER[name] for name in ('python', 'pyzmq', 'numpy')]
+        reports = self.script.probe_environments(
+            [sys.executable, learner_python, learner_python + '-missing'], checkers)
+        self.assertEqual([r['executable'] for r in reports],
+                         [sys.executable, learner_python, learner_python + '-missing'])
+        self.assertTrue(reports[1]['packages']['zmq']['found'])
+        self.assertIn('error', reports[2])
+
+        submodules = [self.script.PythonPackageDependency(package=package, name=package)
+                      for package in ('zmq.sugar', 'zmq.missing')]
+        report = self.script.probe_interpreter(learner_python, submodules)
+        self.assertTrue(report['packages']['zmq.sugar']['found'])
+        self.assertFalse(report['packages']['zmq.missing']['found'])
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.script.print_environment_matrix(reports, checkers)
+        rows = {line.split('  ')[0]: line.split() for line in output.getvalue().splitlines()}
+        self.assertEqual(rows['PyZMQ (pyzmq)'][-1:], ['(old)'])
+        self.assertEqual(rows['PyZMQ (pyzmq)'][-2], '2.0.0')
+        self.assertEqual(rows['NumPy (numpy)'][-2:], ['-', '-'])
+        self.assertIn('Could not check these Python installations:', output.getvalue())
+
+
+class TestStartup(unittest.TestCase):
+    # Modules that are slow to import and that not every run needs.
+    LAZY_MODULES = {'distutils', 'subprocess', 'json', 'platform', 'xml',
+                    'concurrent', 'importlib.metadata', 'setuptools'}
+
+    # Budget for everything the script imports before its first output
+    # (in microseconds, generous enough for a slow test machine).
+    BUDGET = 80000
+
+    # Best of how many runs, so that a busy machine (e.g., one running
+    # the tests in parallel) does not make the budget fail spuriously.
+    RUNS = 3
+
+    def import_times(self):
+        """Get (total top-level import time, names imported) for one run."""
+
+        result = subprocess.run([sys.executable, '-S', '-X', 'importtime', SCRIPT, '--help'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        total = 0
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            (_, cumulative, name) = line.split('|')
+            imported.add(name.strip())
+            if not name.startswith('  '):  # top level, so not counted already
+                total += int(cumulative)
+        return total, imported
+
+    def test_import_time(self):
+        runs = [self.import_times() for _ in range(self.RUNS)]
+        imported = runs[0][1]
+        self.assertEqual({m for m in imported if m.split('.')[0] in self.LAZY_MODULES
+                          or m in self.LAZY_MODULES}, set())
+        self.assertLess(min(total for (total, _) in runs), self.BUDGET)
+
+    def test_checkers_are_built_lazily(self):
+        script = load_script()
+        self.assertIn('jupyter', script.CHECKER)
+        self.assertEqual(set(dict.keys(script.CHECKER)), set())
+        script.CHECKER['jupyter'].interactive()
+        self.assertIn('virtual-browser-ipython', set(dict.keys(script.CHECKER)))
+        self.assertEqual(script.CHECKER['mercurial'].minimum_version,
+                         script.CHECKER['hg'].minimum_version)
+
+    def test_failed_factory_can_be_retried(self):
+        script = load_script()
+        attempts = []
+        def factory():
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise RuntimeError('not yet')
+            return script.Dependency(name='flaky')
+        script.CHECKER.register('flaky', factory)
+        with self.assertRaises(RuntimeError):
+            script.CHECKER['flaky']
+        self.assertIn('flaky', script.CHECKER)
+        self.assertEqual(script.CHECKER['flaky'].name, 'flaky')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+import knit_episodes
+import reporter
+
+# Stand-in for R: "knits" an episode by copying it, after a delay, and
+# logs which episodes it was asked to knit.  Each episode gets a figure
+# named after it, and an episode containing 'FAIL' makes it fail.
+STUB_KNITTER = '''import os, sys, time
+(delay, src, dst) = sys.argv[1:]
+with open('knit.log', 'a') as log:
+    log.write(src + '\\n')
+time.sleep(float(delay))
+text = open(src).read()
+if 'FAIL' in text:
+    print('Error in eval(expr): {oops}')
+    sys.exit(1)
+name = os.path.splitext(os.path.basename(src))[0]
+os.makedirs('fig', exist_ok=True)
+open(os.path.join('fig', 'rmd-' + name + '-1.png'), 'w').write(name)
+text += '![plot](../fig/rmd-' + name + '-1.png)\\n'
+open(dst, 'w').write(text.replace('```{r}', '~~~').replace('```', '~~~'))
+'''
+
+EPISODE = '---\ntitle: "Episode {0}"\nsource: Rmd\n---\n\n```{{r}}\n1 + {0}\n```\n'
+
+
+class TestKnitEpisodes(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, '_episodes_rmd'))
+        os.makedirs(os.path.join(self.root, 'bin'))
+        self.write(os.path.join('bin', 'chunk-options.R'), 'library("knitr")\n')
+        self.write('stub_knitter.py', STUB_KNITTER)
+        for i in range(1, 5):
+            self.write(os.path.join('_episodes_rmd', '0{0}-episode.Rmd'.format(i)), EPISODE.format(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        with open(os.path.join(self.root, path), 'w', encoding='utf-8') as writer:
+            writer.write(text)
+
+    def knit(self, delay=0.0, **kwargs):
+        """Knit, returning ({Rmd name: status}, [names knit], reporter)."""
+
+        log = os.path.join(self.root, 'knit.log')
+        if os.path.exists(log):
+            os.remove(log)
+        r = reporter.Reporter()
+        knitter = '"{0}" stub_knitter.py {1}'.format(sys.executable, delay)
+        results = knit_episodes.knit_episodes(self.root, r, knitter=knitter, **kwargs)
+        knit = []
+        if os.path.exists(log):
+            with open(log, 'r', encoding='utf-8') as reader:
+                knit = sorted(os.path.basename(line.strip()) for line in reader)
+        return {os.path.basename(rmd): status for (rmd, status) in results}, knit, r
+
+    def test_unchanged_episodes_are_not_knit_again(self):
+        statuses, knit, _ = self.knit()
+        self.assertEqual(set(statuses.values()), {'knit'})
+        self.assertEqual(len(knit), 4)
+        with open(os.path.join(self.root, '_episodes', '02-episode.md'), encoding='utf-8') as reader:
+            self.assertIn('~~~\n1 + 2\n~~~', reader.read())
+
+        statuses, knit, _ = self.knit()
+        self.assertEqual((set(statuses.values()), knit), ({'cached'}, []))
+
+        self.write(os.path.join('_episodes_rmd', '02-episode.Rmd'), EPISODE.format(22))
+        os.remove(os.path.join(self.root, '_episodes', '03-episode.md'))
+        self.assertEqual(self.knit()[1], ['02-episode.Rmd', '03-episode.Rmd'])
+
+    def test_missing_or_changed_figures_are_knit_again(self):
+        self.knit()
+        os.remove(os.path.join(self.root, 'fig', 'rmd-01-episode-1.png'))
+        self.write(os.path.join('fig', 'rmd-04-episode-1.png'), 'edited')
+        self.assertEqual(self.knit()[1], ['01-episode.Rmd', '04-episode.Rmd'])
+        self.assertEqual(self.knit()[1], [])
+
+    def test_shared_inputs_invalidate_everything(self):
+        self.knit()
+        self.write('renv.lock', '{}\n')
+        self.assertEqual(len(self.knit()[1]), 4)
+        self.write(os.path.join('bin', 'chunk-options.R'), 'library("knitr")\n# changed\n')
+        self.assertEqual(len(self.knit()[1]), 4)
+        self.assertEqual(self.knit()[1], [])
+
+    def test_episodes_are_knit_concurrently(self):
+        start = time.time()
+        statuses, knit, _ = self.knit(delay=0.5, jobs=4)
+        self.assertEqual(len(knit), 4)
+        self.assertLess(time.time() - start, 1.5)
+
+    def test_precheck(self):
+        self.write(os.path.join('_episodes_rmd', '03-episode.Rmd'),
+                   EPISODE.format(3).replace('source: Rmd', 'source: md'))
+        statuses, knit, r = self.knit()
+        self.assertEqual(statuses['03-episode.Rmd'], 'skipped')
+        self.assertNotIn('03-episode.Rmd', knit)
+        self.assertEqual([message for (_, message) in r.messages],
+                         ['episode_rmd source is md not Rmd'])
+
+    def test_failures_are_reported_and_retried(self):
+        self.write(os.path.join('_episodes_rmd', '04-episode.Rmd'), EPISODE.format('FAIL'))
+        statuses, _, r = self.knit()
+        self.assertEqual(statuses['04-episode.Rmd'], 'failed')
+        self.assertIn('{oops}', r.messages[0][1])
+        self.assertEqual(self.knit()[1], ['04-episode.Rmd'])
+
+    def test_setup_runs_only_when_needed(self):
+        setup = '"{0}" -c "open(\'setup.log\', \'a\').write(\'x\')"'.format(sys.executable)
+        self.knit(setup=setup)
+        self.knit(setup=setup)
+        with open(os.path.join(self.root, 'setup.log'), encoding='utf-8') as reader:
+            self.assertEqual(reader.read(), 'x')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,23 @@
+import os
+import json
+import shutil
+import tempfile
 import unittest
+import weakref
+import warnings
+from argparse import Namespace
+from unittest import mock
 
+import ast_fixtures
 import lesson_check
 import reporter
 
+# Test lesson whose Markdown has recorded ASTs.
+LESSON_DIR = ast_fixtures.LESSON_DIR
+
+# Its shared file of reference links.
+LINKS_FILE = os.path.join(LESSON_DIR, '_includes', 'links.md')
+
 
 class TestFileList(unittest.TestCase):
     def setUp(self):
@@ -14,6 +29,345 @@ class TestFileList(unittest.TestCase):
         lesson_check.check_fileset('', self.reporter, lesson_check.REQUIRED_FILES)
         self.assertEqual(len(self.reporter.messages), 0)
 
+    def check_episodes(self, *names):
+        filenames = list(lesson_check.REQUIRED_FILES)
+        filenames.extend(os.path.join('_episodes', name) for name in names)
+        lesson_check.check_fileset('', self.reporter, filenames)
+        return [message for (_, message) in self.reporter.messages]
+
+    def test_consecutive_episodes(self):
+        self.assertEqual(self.check_episodes('01-intro.md', '02-next.md'), [])
+
+    def test_badly_formatted_episode_name(self):
+        self.assertEqual(self.check_episodes('01-intro.md', 'intro.md'),
+                         ['Episode _episodes/intro.md has badly-formatted filename'])
+
+    def test_duplicate_and_missing_episodes(self):
+        self.assertEqual(self.check_episodes('01-intro.md', '01-again.md', '03-last.md'),
+                         ["Duplicate episode numbers ['01', '01', '03'] vs ['01', '03']",
+                          'Missing or non-consecutive episode numbers [1, 1, 3]'])
+
+    def test_missing_required_file(self):
+        lesson_check.check_fileset('', self.reporter, ['index.md'])
+        self.assertIn((None, 'Missing required file setup.md'), self.reporter.messages)
+
+
+class TestReferences(unittest.TestCase):
+    def setUp(self):
+        self.reporter = reporter.Reporter()
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_shared_links_file(self):
+        references = lesson_check.read_references(self.reporter, LINKS_FILE)
+        self.assertEqual(sorted(references), ['git', 'python', 'shell'])
+        self.assertEqual(self.reporter.messages, [])
+
+    def test_duplicates(self):
+        path = os.path.join(self.tempdir, 'links.md')
+        with open(path, 'w', encoding='utf-8') as writer:
+            writer.write('[a]: https://example.org/a\n\n[a]: https://example.org/b\n'
+                         '[b]: https://example.org/b\n')
+        references = lesson_check.read_references(self.reporter, path)
+        self.assertEqual(references, {'a': 'https://example.org/b', 'b': 'https://example.org/b'})
+        self.assertEqual([message for (_, message) in self.reporter.messages],
+                         ['Duplicate reference name a at line 3',
+                          'Duplicate definition of URL https://example.org/b at line 4'])
+
+    def test_remote_theme(self):
+        with mock.patch.dict(lesson_check.CONFIG, {'remote_theme': 'carpentries/carpentries-theme'}):
+            self.assertEqual(lesson_check.read_references(self.reporter, None), {})
+
+
+class TestCheckers(unittest.TestCase):
+    """Check the test lesson using recorded ASTs instead of the parser."""
+
+    def setUp(self):
+        patcher = mock.patch('util.parse_markdown', ast_fixtures.parse_recorded)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reporter = reporter.Reporter()
+
+    def make_args(self, **kwargs):
+        args = Namespace(source_dir=LESSON_DIR, parser=None, reporter=self.reporter,
+                         line_lengths=False, trailing_whitespace=False,
+                         reference_path=LINKS_FILE, references={'git': '', 'python': '', 'shell': ''})
+        for (key, value) in kwargs.items():
+            setattr(args, key, value)
+        return args
+
+    def messages(self):
+        """Messages with locations relative to the test lesson."""
+
+        result = []
+        for (location, message) in sorted(self.reporter.messages, key=self.reporter.key):
+            if isinstance(location, tuple):
+                location = (os.path.relpath(location[0], LESSON_DIR), location[1])
+            elif location is not None:
+                location = os.path.relpath(location, LESSON_DIR)
+            result.append((location, message))
+        return result
+
+    def check(self, path, method=None, **kwargs):
+        """Run one check (or all of them) on one file of the test lesson."""
+
+        filename = os.path.join(LESSON_DIR, path)
+        checker = lesson_check.create_checker(self.make_args(**kwargs), filename,
+                                              lesson_check.read_markdown(None, filename))
+        getattr(checker, method or 'check')()
+        return self.messages()
+
+    def test_clean_episode(self):
+        self.assertEqual(self.check(os.path.join('_episodes', '01-introduction.md'),
+                                    line_lengths=True, trailing_whitespace=True), [])
+
+    def test_checker_classes(self):
+        expected = {
+            'README.md': lesson_check.CheckNonJekyll,
+            'index.md': lesson_check.CheckIndex,
+            'reference.md': lesson_check.CheckReference,
+            os.path.join('_episodes', '03-break.md'): lesson_check.CheckEpisode,
+            os.path.join('_extras', 'guide.md'): lesson_check.CheckGeneric,
+        }
+        for (path, cls) in expected.items():
+            filename = os.path.join(LESSON_DIR, path)
+            checker = lesson_check.create_checker(self.make_args(), filename,
+                                                  lesson_check.read_markdown(None, filename))
+            self.assertIs(type(checker), cls)
+
+    def test_metadata(self):
+        for path in ('index.md', 'README.md', 'CONTRIBUTING.md', 'reference.md'):
+            self.check(path, 'check_metadata')
+        self.assertEqual(self.messages(), [
+            ('CONTRIBUTING.md', 'Unexpected metadata'),
+            ('reference.md', 'metadata layout is page not reference'),
+        ])
+
+    def test_missing_metadata(self):
+        self.assertEqual(self.check(os.path.join('_extras', 'guide.md'), 'check_metadata'),
+                         [(os.path.join('_extras', 'guide.md'), 'Missing metadata entirely')])
+
+    def test_episode_metadata(self):
+        self.assertEqual(self.check(os.path.join('_episodes', '03-break.md'), 'check_metadata'), [])
+        problems = os.path.join('_episodes', '02-problems.md')
+        layout = os.path.join('_episodes', '04-layout.md')
+        self.check(problems, 'check_metadata')
+        self.check(layout, 'check_metadata')
+        self.assertEqual(self.messages(), [
+            (problems, '"teaching" has wrong type in metadata '
+                       "(<class 'str'> instead of <class 'int'>)"),
+            (problems, 'Missing metadata field keypoints'),
+            (layout, 'Unknown episode layout "page"'),
+        ])
+
+    def test_line_lengths(self):
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_line_lengths'), [])
+        self.assertEqual(self.check(path, 'check_line_lengths', line_lengths=True),
+                         [(path, 'Line(s) too long: 10')])
+
+    def test_trailing_whitespace(self):
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_trailing_whitespace'), [])
+        self.assertEqual(self.check(path, 'check_trailing_whitespace', trailing_whitespace=True),
+                         [(path, 'Line(s) end with whitespace: 11')])
+
+    def test_blockquote_classes(self):
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_blockquote_classes'),
+                         [((path, 16), 'Unknown or missing blockquote type exercise')])
+
+    def test_codeblock_classes(self):
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_codeblock_classes'),
+                         [((path, 21), 'Unknown or missing code block type None'),
+                          ((path, 25), 'Unknown or missing code block type sql')])
+
+    def test_terms(self):
+        scanner = lesson_check.TermScanner([
+            {'terms': ['line', 'lesson'], 'message': 'Avoid "{0}"'},
+            {'terms': ['known kind'], 'message': 'Write {{kind}}, not "{0}"'},
+            {'terms': ['this'], 'message': 'Never "{0}"', 'case_sensitive': True}])
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_terms', terms=scanner), [
+            ((path, 10), 'Avoid "line"'),
+            ((path, 11), 'Avoid "line"'),
+            ((path, 12), 'Avoid "lesson"'),
+            ((path, 18), 'Write {kind}, not "known kind"'),
+        ])
+
+    def test_collect_code_blocks(self):
+        filename = os.path.join(LESSON_DIR, '_episodes', '01-introduction.md')
+        args = self.make_args(code_blocks=[])
+        checker = lesson_check.create_checker(args, filename,
+                                              lesson_check.read_markdown(None, filename))
+        checker.collect_code_blocks()
+        self.assertEqual(args.code_blocks, [(filename, 15, 'python', 'print(1 + 2)\n')])
+
+    def test_defined_link_references(self):
+        self.assertEqual(self.check(os.path.join('_extras', 'discuss.md'),
+                                    'check_defined_link_references'), [])
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_defined_link_references'), [
+            (path, 'Internally-defined links may be missing definitions: '
+                   '"a missing lesson"=>"nowhere"')])
+
+    def test_reference_inclusion(self):
+        self.assertEqual(self.check(os.path.join('_episodes', '04-layout.md'),
+                                    'check_reference_inclusion'), [])
+        path = os.path.join('_episodes', '02-problems.md')
+        self.assertEqual(self.check(path, 'check_reference_inclusion', reference_path=None), [])
+        self.assertEqual(self.check(path, 'check_reference_inclusion'),
+                         [(path, 'episode does not include "links.md"')])
+
+    def test_whole_lesson(self):
+        args = self.make_args(line_lengths=True, trailing_whitespace=True)
+        args.references = lesson_check.read_references(self.reporter, LINKS_FILE)
+        filenames = lesson_check.check_all_markdown(args)
+        lesson_check.check_fileset(LESSON_DIR, self.reporter, filenames)
+        self.assertEqual(len(filenames), 11)
+        messages = self.messages()
+        self.assertEqual(len(messages), 15)
+        self.assertEqual(messages[:2], [
+            (None, 'Missing required file ' + os.path.join(LESSON_DIR, 'CODE_OF_CONDUCT.md')),
+            (None, 'Missing required file ' + os.path.join(LESSON_DIR, 'LICENSE.md'))])
+
+
+class TestAstFixtures(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.lesson_dir = os.path.join(self.tempdir, 'lesson')
+        self.ast_dir = os.path.join(self.tempdir, 'ast')
+        os.makedirs(os.path.join(self.lesson_dir, '_episodes'))
+        self.write(os.path.join('_episodes', '01-intro.md'), '---\ntitle: Intro\n---\nText\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, path, text):
+        with open(os.path.join(self.lesson_dir, path), 'w', encoding='utf-8') as writer:
+            writer.write(text)
+
+    def refresh(self):
+        def parse(parser, body):
+            return {'type': 'root', 'value': body}
+        with mock.patch('util.parse_markdown', parse), \
+                mock.patch('ast_fixtures.parser_version', return_value='2.4.0'):
+            return ast_fixtures.refresh('parser.rb', self.lesson_dir, self.ast_dir)
+
+    def test_refresh(self):
+        self.assertEqual(self.refresh(), (1, 0))
+        (name,) = [n for n in os.listdir(self.ast_dir) if n.endswith(ast_fixtures.AST_SUFFIX)]
+        with open(os.path.join(self.ast_dir, name), 'rb') as reader:
+            recorded = reader.read()
+        self.assertEqual(ast_fixtures.load_ast('\nText\n', self.ast_dir),
+                         {'type': 'root', 'value': '\nText\n'})
+
+        # Unchanged files are recorded identically; stale recordings are removed.
+        self.write(os.path.join('_episodes', '01-intro.md'), '---\ntitle: Intro\n---\nMore\n')
+        self.write('index.md', 'Text\n')
+        self.assertEqual(self.refresh(), (2, 1))
+        self.write(os.path.join('_episodes', '01-intro.md'), '---\ntitle: Intro\n---\nText\n')
+        self.assertEqual(self.refresh(), (2, 1))
+        with open(os.path.join(self.ast_dir, name), 'rb') as reader:
+            self.assertEqual(reader.read(), recorded)
+
+    def test_manifest(self):
+        self.refresh()
+        with open(os.path.join(self.ast_dir, ast_fixtures.MANIFEST_FILE)) as reader:
+            self.assertEqual(json.load(reader), {'kramdown': '2.4.0'})
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            ast_fixtures.load_ast('\nText\n', self.ast_dir)
+
+        # Recordings that the parser did not make are flagged.
+        os.remove(os.path.join(self.ast_dir, ast_fixtures.MANIFEST_FILE))
+        ast_fixtures._checked_dirs.discard(self.ast_dir)
+        with self.assertWarns(UserWarning):
+            ast_fixtures.load_ast('\nText\n', self.ast_dir)
+
+    def test_missing_recording(self):
+        with self.assertRaises(SystemExit):
+            ast_fixtures.load_ast('never recorded', self.ast_dir)
+
+    def test_stale_recordings(self):
+        self.refresh()
+        self.write('index.md', 'Text\n')
+        with mock.patch('util.parse_markdown', lambda parser, body: {'type': 'root'}):
+            stale = ast_fixtures.stale_recordings('parser.rb', self.lesson_dir, self.ast_dir)
+        self.assertEqual(stale, [os.path.join(self.lesson_dir, '_episodes', '01-intro.md'),
+                                 os.path.join(self.lesson_dir, 'index.md')])
+
+    @unittest.skipUnless(ast_fixtures.parser_available(), 'Markdown parser gems are not installed')
+    def test_recordings_match_parser(self):
+        self.assertEqual(ast_fixtures.stale_recordings(ast_fixtures.PARSER), [])
+
+
+class Node(dict):
+    """AST node that can be tracked with a weak reference."""
+
+    __hash__ = object.__hash__
+
+
+class TestTermScanner(unittest.TestCase):
+    def test_matches(self):
+        scanner = lesson_check.TermScanner([
+            {'terms': ['just', 'of course'], 'message': 'Avoid "{0}"'},
+            {'terms': ['FIXME', 'Github'], 'message': 'Fix {0}', 'case_sensitive': True}])
+        text = 'Just do it.\nOf\n  course, justice is FIXME fixme github Github.'
+        self.assertEqual(list(scanner.scan(text)), [
+            (0, 'Avoid "Just"'), (12, 'Avoid "Of course"'), (36, 'Fix FIXME'), (55, 'Fix Github')])
+
+    def test_many_terms(self):
+        terms = ['term{0}'.format(i) for i in range(3000)]
+        scanner = lesson_check.TermScanner([{'terms': terms, 'message': '{0}'}])
+        text = 'term12 term2999 term30000 determ5 Term7'
+        self.assertEqual([m for (_, m) in scanner.scan(text)], ['term12', 'term2999', 'Term7'])
+
+    def test_terms_file(self):
+        scanner = lesson_check.read_terms(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'terminology.yml'))
+        self.assertEqual([m for (_, m) in scanner.scan('Simply push it to Github.')],
+                         ['Dismissive word "Simply": it can make learners feel they are '
+                          'missing something',
+                          'Spelling "Github": write "GitHub"'])
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tempdir, '_episodes'))
+        for i in range(1, 6):
+            path = os.path.join(self.tempdir, '_episodes', '{0:02d}-topic.md'.format(i))
+            with open(path, 'w', encoding='utf-8') as writer:
+                writer.write('text\n')
+        self.live = weakref.WeakSet()
+        self.most_live = 0
+        self.original = lesson_check.read_markdown
+        lesson_check.read_markdown = self.fake_read_markdown
+
+    def tearDown(self):
+        lesson_check.read_markdown = self.original
+        shutil.rmtree(self.tempdir)
+
+    def fake_read_markdown(self, parser, path):
+        self.most_live = max(self.most_live, len(self.live))
+        doc = Node(type='root', children=[])
+        self.live.add(doc)
+        return {'metadata': None, 'metadata_len': 0, 'text': 'text\n',
+                'lines': [(1, 'text', 4)], 'doc': doc}
+
+    def test_files_are_released_after_checking(self):
+        args = Namespace(source_dir=self.tempdir, parser=None, reporter=reporter.Reporter(),
+                         line_lengths=True, trailing_whitespace=True,
+                         reference_path=None, references={})
+        filenames = lesson_check.check_all_markdown(args)
+        self.assertEqual(len(filenames), 5)
+        self.assertEqual(self.most_live, 0)
+        self.assertEqual(len(args.reporter.messages), 5)  # no metadata in any episode
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,153 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+
+import ast_fixtures
+import link_check
+import reporter
+
+# How long slow pages take to answer (in seconds).
+SLOW = 0.3
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    """Pages that resolve, redirect, are slow, or are missing."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.answer(head=True)
+
+    def do_GET(self):
+        self.answer(head=False)
+
+    def answer(self, head):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path, time.monotonic()))
+        path = self.path
+        if path.startswith('/slow'):
+            time.sleep(SLOW)
+            self.send(200)
+        elif path.startswith('/ok'):
+            self.send(200)
+        elif path == '/no-head':
+            self.send(405 if head else 200)
+        elif path == '/moved':
+            self.send(301, '/ok')
+        elif path == '/loop':
+            self.send(302, '/loop')
+        elif path == '/hang':
+            time.sleep(2 * SLOW)
+            self.send(200)
+        else:
+            self.send(404)
+
+    def send(self, status, location=None):
+        self.send_response(status)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class TestLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeSiteHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,),
+                                       daemon=True)
+        self.thread.start()
+        self.url = 'http://{0}:{1}'.format(*self.server.server_address)
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tempdir, 'links.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tempdir)
+
+    def check(self, paths, **kwargs):
+        kwargs.setdefault('interval', 0)
+        kwargs.setdefault('timeout', SLOW)
+        urls = [self.url + p for p in paths]
+        problems, requested = link_check.check_urls(urls, **kwargs)
+        return {url[len(self.url):]: problem for (url, problem) in problems.items()}, requested
+
+    def test_problems(self):
+        problems, requested = self.check(['/ok', '/no-head', '/moved', '/loop',
+                                          '/missing', '/hang'])
+        self.assertEqual(requested, 6)
+        self.assertEqual(problems, {'/loop': 'too many redirects',
+                                    '/missing': 'status 404 Not Found',
+                                    '/hang': 'timed out after 0.3 seconds'})
+        methods = [m for (m, p, _) in self.server.requests if p == '/no-head']
+        self.assertEqual(methods, ['HEAD', 'GET'])
+
+    def test_checked_concurrently(self):
+        start = time.monotonic()
+        problems, _ = self.check(['/slow/{0}'.format(i) for i in range(8)], jobs=8,
+                                 timeout=5)
+        self.assertEqual(problems, {})
+        self.assertLess(time.monotonic() - start, 4 * SLOW)
+
+    def test_requests_to_one_host_are_spaced_out(self):
+        self.check(['/ok/{0}'.format(i) for i in range(4)], jobs=4, interval=0.1)
+        starts = sorted(t for (_, _, t) in self.server.requests)
+        gaps = [b - a for (a, b) in zip(starts, starts[1:])]
+        self.assertEqual(len(gaps), 3)
+        self.assertGreater(min(gaps), 0.08)
+
+    def test_cache(self):
+        paths = ['/ok', '/missing']
+        self.assertEqual(self.check(paths, cache_file=self.cache_file)[1], 2)
+        # Only the broken URL is checked again.
+        problems, requested = self.check(paths, cache_file=self.cache_file)
+        self.assertEqual((list(problems), requested), (['/missing'], 1))
+        # Until the cached result is too old.
+        self.assertEqual(self.check(paths, cache_file=self.cache_file, ttl=0)[1], 2)
+
+    def test_each_use_is_reported(self):
+        rep = reporter.Reporter()
+        missing = self.url + '/missing'
+        urls = {self.url + '/ok': [('a.md', 3)], missing: [('a.md', 5), 'b.md']}
+        link_check.check_links(rep, urls, interval=0, timeout=SLOW)
+        message = 'Broken link {0}: status 404 Not Found'.format(missing)
+        self.assertEqual(rep.messages, [(('a.md', 5), message), ('b.md', message)])
+
+
+class TestCollectUrls(unittest.TestCase):
+    def test_fixture_lesson(self):
+        lesson = ast_fixtures.LESSON_DIR
+        links_file = os.path.join(lesson, '_includes', 'links.md')
+        with mock.patch('util.parse_markdown', ast_fixtures.parse_recorded):
+            urls = link_check.collect_urls(lesson, None, links_file)
+        self.assertEqual(urls, {
+            'https://git-scm.com/': [(links_file, 3)],
+            'https://swcarpentry.github.io/shell-novice/': [(links_file, 4)],
+            'https://www.python.org/': [(links_file, 5)],
+            'https://example.org/image.png': [
+                (os.path.join(lesson, '_episodes', '02-problems.md'), 14)],
+        })
+
+    def test_find_links(self):
+        doc = {'type': 'root', 'children': [
+            {'type': 'a', 'attr': {'href': 'https://example.org/a#one'},
+             'options': {'location': 2}},
+            {'type': 'p', 'children': [
+                {'type': 'a', 'attr': {'href': '../setup/'}, 'options': {'location': 3}},
+                {'type': 'a', 'attr': {'href': 'https://example.org/a#two'}}]}]}
+        self.assertEqual(link_check.find_links(doc, 10),
+                         [('https://example.org/a#one', 12), ('../setup/', 13),
+                          ('https://example.org/a#two', None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import repo_check
+import reporter
+from github_client import GitHubClient, GitHubError
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Serve a small subset of the GitHub API from the server's state."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.log.append(('GET', self.path))
+        time.sleep(server.latency)
+        if not server.take_rate_limit(self):
+            return
+
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        pieces = parts.path.strip('/').split('/')
+        if len(pieces) == 4 and pieces[0] == 'repos' and pieces[3] == 'labels':
+            key = '{0}/{1}'.format(pieces[1], pieces[2])
+            if key not in server.repos:
+                return self.send_json(404, {'message': 'Not Found'})
+            items = [{'name': n, 'color': c} for (n, c) in sorted(server.repos[key].items())]
+        elif len(pieces) == 3 and pieces[0] == 'orgs' and pieces[2] == 'repos':
+            items = [{'full_name': key, 'archived': key in server.archived}
+                     for key in sorted(server.repos) if key.startswith(pieces[1] + '/')]
+        else:
+            return self.send_json(404, {'message': 'Not Found'})
+
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        body = items[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(items):
+            headers['Link'] = '<http://{0}:{1}{2}?per_page={3}&page={4}>; rel="next"'.format(
+                *server.server_address, parts.path, per_page, page + 1)
+        self.send_json(200, body, headers)
+
+    def do_POST(self):
+        self.change('POST')
+
+    def do_PATCH(self):
+        self.change('PATCH')
+
+    def do_DELETE(self):
+        self.change('DELETE')
+
+    def change(self, method):
+        """Create, update, or delete a label."""
+
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        with server.lock:
+            server.log.append((method, self.path))
+            if server.transient_failures:
+                server.transient_failures -= 1
+                return self.send_json(502, {'message': 'Bad Gateway'})
+        if not server.take_rate_limit(self):
+            return
+
+        pieces = [unquote(p) for p in urlsplit(self.path).path.strip('/').split('/')]
+        labels = server.repos.get('{0}/{1}'.format(pieces[1], pieces[2]))
+        if labels is None or pieces[3] != 'labels':
+            return self.send_json(404, {'message': 'Not Found'})
+        with server.lock:
+            if method == 'POST':
+                if data['name'] in labels:
+                    return self.send_json(422, {'message': 'Validation Failed'})
+                labels[data['name']] = data['color']
+                return self.send_json(201, {'name': data['name'], 'color': data['color']})
+            name = pieces[4]
+            if name not in labels:
+                return self.send_json(404, {'message': 'Not Found'})
+            if method == 'PATCH':
+                labels[name] = data['color']
+                return self.send_json(200, {'name': name, 'color': data['color']})
+            del labels[name]
+            self.send_response(204)
+            self.end_headers()
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        etag = '"{0}"'.format(hashlib.sha1(data).hexdigest())
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, data = 304, b''
+        self.server.statuses.append(status)
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Remaining', str(self.server.remaining))
+        self.send_header('X-RateLimit-Reset', str(self.server.reset_at))
+        for (key, value) in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGitHub(ThreadingHTTPServer):
+    """Local stand-in for the GitHub API with latency and rate limits."""
+
+    def __init__(self, repos, latency=0.0, limit=1000, window=0.2):
+        super().__init__(('127.0.0.1', 0), FakeGitHubHandler)
+        self.repos = repos
+        self.archived = set()
+        self.transient_failures = 0
+        self.latency = latency
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = time.time() + window
+        self.lock = threading.Lock()
+        self.log = []
+        self.statuses = []
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address)
+
+    def take_rate_limit(self, handler):
+        """Use up one request, answering 403 if none are left."""
+
+        with self.lock:
+            if time.time() >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = time.time() + self.window
+            if self.remaining == 0:
+                exhausted = True
+            else:
+                self.remaining -= 1
+                exhausted = False
+        if exhausted:
+            handler.send_json(403, {'message': 'API rate limit exceeded'})
+            return False
+        return True
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TestGitHubClient(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tempdir, 'cache.json')
+        labels = dict(repo_check.EXPECTED)
+        labels.update({'extra {0}'.format(i): '000000' for i in range(200)})
+        self.server = FakeGitHub({'swcarpentry/shell-novice': labels})
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tempdir)
+
+    def client(self, **kwargs):
+        return GitHubClient(api_url=self.server.url, cache_file=self.cache_file, **kwargs)
+
+    def test_all_pages_are_fetched(self):
+        with self.client() as client:
+            labels = client.get_labels('swcarpentry', 'shell-novice')
+        self.assertEqual(len(labels), 220)
+        self.assertEqual(len(self.server.log), 3)
+
+    def test_unchanged_labels_use_cache(self):
+        with self.client() as client:
+            first = client.get_labels('swcarpentry', 'shell-novice')
+        with self.client() as client:
+            second = client.get_labels('swcarpentry', 'shell-novice')
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.statuses, [200, 200, 200, 304, 304, 304])
+
+    def test_rate_limit_waits_for_reset(self):
+        self.server.limit = self.server.remaining = 2
+        with self.client(reserve=-1) as client:  # never back off early
+            labels = client.get_labels('swcarpentry', 'shell-novice')
+        self.assertEqual(len(labels), 220)
+        self.assertEqual(self.server.statuses, [200, 200, 403, 200])
+
+    def test_missing_repository(self):
+        with self.client() as client:
+            with self.assertRaises(GitHubError) as context:
+                client.get_labels('swcarpentry', 'no-such-lesson')
+        self.assertEqual(context.exception.status, 404)
+
+    def test_check_labels(self):
+        r = reporter.Reporter()
+        with self.client() as client:
+            repo_check.check_labels(r, 'https://github.com/swcarpentry/shell-novice/', client)
+        self.assertEqual(len(r.messages), 1)
+        self.assertTrue(r.messages[0][1].startswith('Extra label(s)'))
+
+
+class TestAudit(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        good = dict(repo_check.EXPECTED)
+        bad = dict(repo_check.EXPECTED)
+        del bad['type:bug']
+        bad['help wanted'] = 'ffffff'
+        bad['wontfix'] = '000000'
+        repos = {'swcarpentry/lesson-{0:02d}'.format(i): good for i in range(12)}
+        repos['swcarpentry/lesson-05'] = bad
+        repos['swcarpentry/old-lesson'] = bad
+        self.server = FakeGitHub(repos, latency=0.05, limit=6, window=0.3)
+        self.server.archived.add('swcarpentry/old-lesson')
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tempdir)
+
+    def test_org_audit(self):
+        with GitHubClient(api_url=self.server.url, reserve=2) as client:
+            urls = repo_check.get_audit_repo_urls(client, 'swcarpentry', None)
+            results = repo_check.audit_repos(client, urls, jobs=4)
+        self.assertEqual(len(results), 12)
+        self.assertNotIn(403, self.server.statuses)
+        failed = [(url, messages) for (url, messages) in results if messages]
+        self.assertEqual([url for (url, _) in failed],
+                         ['https://github.com/swcarpentry/lesson-05/'])
+        self.assertEqual(sorted(m[1].split(' ')[0] for m in failed[0][1]),
+                         ['Color', 'Extra', 'Missing'])
+
+    def test_repos_file(self):
+        repos_file = os.path.join(self.tempdir, 'repos.txt')
+        with open(repos_file, 'w', encoding='utf-8') as writer:
+            writer.write('# lessons\nswcarpentry/lesson-01\n'
+                         'https://github.com/swcarpentry/missing/\n')
+        with GitHubClient(api_url=self.server.url) as client:
+            urls = repo_check.get_audit_repo_urls(client, None, repos_file)
+            results = repo_check.audit_repos(client, urls)
+        self.assertEqual(results[0], ('https://github.com/swcarpentry/lesson-01/', []))
+        self.assertIn('failed with 404', results[1][1][0][1])
+
+
+class TestReconcile(unittest.TestCase):
+    def setUp(self):
+        repos = {}
+        for i in range(6):
+            labels = dict(repo_check.EXPECTED)
+            if i % 2:
+                del labels['type:bug']
+                labels['help wanted'] = 'ffffff'
+                labels['wontfix'] = '000000'
+            repos['swcarpentry/lesson-{0:02d}'.format(i)] = labels
+        self.server = FakeGitHub(repos, latency=0.01)
+        self.urls = [repo_check.F_REPO_URL.format(*name.split('/')) for name in sorted(repos)]
+
+    def tearDown(self):
+        self.server.stop()
+
+    def writes(self):
+        return [entry for entry in self.server.log if entry[0] != 'GET']
+
+    def reconcile(self, **kwargs):
+        with GitHubClient(api_url=self.server.url) as client:
+            return repo_check.reconcile_repos(client, self.urls, jobs=3, **kwargs)
+
+    def test_dry_run_makes_no_changes(self):
+        results = self.reconcile()
+        self.assertEqual(self.writes(), [])
+        self.assertEqual([len(changes) for (_, changes, _) in results], [0, 2, 0, 2, 0, 2])
+
+    def test_one_call_per_difference(self):
+        results = self.reconcile(apply=True, delete_extra=True)
+        self.assertTrue(all(not errors for (_, _, errors) in results))
+        self.assertEqual(len(self.writes()), 9)
+        for labels in self.server.repos.values():
+            self.assertEqual(labels, repo_check.EXPECTED)
+        again = self.reconcile(apply=True, delete_extra=True)
+        self.assertEqual(sum(len(changes) for (_, changes, _) in again), 0)
+        self.assertEqual(len(self.writes()), 9)
+
+    def test_transient_failures_are_retried(self):
+        self.server.transient_failures = 1
+        self.urls = self.urls[1:2]
+        results = self.reconcile(apply=True)
+        self.assertEqual(results[0][2], [])
+        self.assertEqual(self.server.repos['swcarpentry/lesson-01']['type:bug'],
+                         repo_check.EXPECTED['type:bug'])
+        self.assertIn('wontfix', self.server.repos['swcarpentry/lesson-01'])
+
+    def test_create_is_idempotent(self):
+        with GitHubClient(api_url=self.server.url) as client:
+            client.create_label('swcarpentry', 'lesson-00', 'type:bug', '123456')
+        self.assertEqual(self.server.repos['swcarpentry/lesson-00']['type:bug'], '123456')
+
+
+if __name__ == "__main__":
+    unittest.main()
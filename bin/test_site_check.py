@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import site_check
+import reporter
+
+# A small generated site: {path: contents}.
+SITE = {
+    'index.html': '''<html>
+<head><title>Home</title></head>
+<body>
+<h1 id="top">Home</h1>
+<a href="missing.html">Missing page</a>
+<a href="about/#nowhere">Missing anchor</a>
+<a href="about/#team">Team</a>
+<a href="#top">Top</a>
+<a href="https://example.org/">Elsewhere</a>
+<img src="logo.png">
+<img src="logo.png" alt="Logo">
+</body>
+</html>
+''',
+    'about/index.html': '''<html>
+<body>
+<p id="team">The team</p>
+<p id="team">The team again</p>
+<a href="../">Home</a>
+</body>
+</html>
+''',
+    'empty.html': '''<html>
+<head><title>Nothing here</title><script>var x = 1;</script></head>
+<body>
+</body>
+</html>
+''',
+    'logo.png': 'not really an image',
+}
+
+
+class SerialPool:
+    """Stand-in for a process pool that records the pages it scans."""
+
+    scanned = []
+
+    def __init__(self, max_workers=None):
+        SerialPool.scanned = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def map(self, func, paths):
+        SerialPool.scanned.extend(paths)
+        return map(func, paths)
+
+
+class TestResolveLink(unittest.TestCase):
+    def test_links(self):
+        self.assertIsNone(site_check.resolve_link('index.html', 'https://example.org/'))
+        self.assertEqual(site_check.resolve_link('index.html', '#top'), (None, 'top'))
+        self.assertEqual(site_check.resolve_link('about/index.html', '../'),
+                         ('index.html', ''))
+        self.assertEqual(site_check.resolve_link('a/b.html', 'c%20d.html#x'),
+                         ('a/c d.html', 'x'))
+        self.assertEqual(site_check.resolve_link('a/b.html', '/lesson/setup/', '/lesson'),
+                         ('setup/index.html', ''))
+
+
+class TestCheckSite(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.site_dir = os.path.join(self.tempdir, '_site')
+        for (path, text) in SITE.items():
+            path = os.path.join(self.site_dir, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as writer:
+                writer.write(text)
+        self.cache_file = os.path.join(self.tempdir, 'cache.json')
+        SerialPool.scanned = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def check(self):
+        """Check the site, returning messages with locations relative to it."""
+
+        rep = reporter.Reporter()
+        site_check.check_site(rep, self.site_dir, jobs=2, cache_file=self.cache_file)
+        result = []
+        for (location, message) in sorted(rep.messages, key=rep.key):
+            if isinstance(location, tuple):
+                location = (os.path.relpath(location[0], self.site_dir), location[1])
+            else:
+                location = os.path.relpath(location, self.site_dir)
+            result.append((location, message))
+        return result
+
+    def expected(self):
+        return [
+            ((os.path.join('about', 'index.html'), 4), 'Duplicate id "team"'),
+            ('empty.html', 'Page has no content'),
+            (('index.html', 5), 'Broken link to missing.html'),
+            (('index.html', 6), 'Link to missing anchor about/#nowhere'),
+            (('index.html', 10), 'Image logo.png has no alt text'),
+        ]
+
+    def test_problems(self):
+        self.assertEqual(self.check(), self.expected())
+
+    def test_cache_is_reused(self):
+        self.check()
+        # Touching a page changes its timestamp but not its contents.
+        os.utime(os.path.join(self.site_dir, 'index.html'))
+        with mock.patch('site_check.ProcessPoolExecutor', SerialPool):
+            self.assertEqual(self.check(), self.expected())
+        self.assertEqual(SerialPool.scanned, [])
+
+    def test_changed_page_is_scanned_again(self):
+        self.check()
+        with open(os.path.join(self.site_dir, 'empty.html'), 'w', encoding='utf-8') as writer:
+            writer.write('<p>Something</p>\n')
+        with mock.patch('site_check.ProcessPoolExecutor', SerialPool):
+            self.assertEqual(self.check(), [m for m in self.expected()
+                                            if m[1] != 'Page has no content'])
+        self.assertEqual(SerialPool.scanned, [os.path.join(self.site_dir, 'empty.html')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import util
+
+
+CONFIG = '''[core]
+	bare = false
+[remote "origin"]
+	url = git@github.com:carpentries/2020-02-17-euphoria.git
+	fetch = +refs/heads/*:refs/remotes/origin/*
+[remote "upstream"]
+	url = "https://github.com/carpentries/workshop-template" ; the template
+[branch "gh-pages"]
+	remote = origin
+'''
+
+
+class TestGitMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tempdir, 'checkout')
+        git_dir = os.path.join(self.repo, '.git')
+        os.makedirs(os.path.join(git_dir, 'refs', 'heads'))
+        self.write(git_dir, 'config', CONFIG)
+        self.write(git_dir, 'HEAD', 'ref: refs/heads/gh-pages\n')
+        self.write(git_dir, 'packed-refs',
+                   '# pack-refs with: peeled fully-peeled sorted\n'
+                   '1111111111111111111111111111111111111111 refs/heads/gh-pages\n')
+        util.read_git_metadata.cache_clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        util.read_git_metadata.cache_clear()
+
+    def write(self, *path_and_text):
+        path = os.path.join(*path_and_text[:-1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as writer:
+            writer.write(path_and_text[-1])
+
+    def test_checkout(self):
+        metadata = util.read_git_metadata(self.repo)
+        self.assertEqual(metadata['remotes'], {
+            'origin': 'git@github.com:carpentries/2020-02-17-euphoria.git',
+            'upstream': 'https://github.com/carpentries/workshop-template'})
+        self.assertEqual(metadata['branch'], 'gh-pages')
+        self.assertEqual(metadata['commit'], '1' * 40)
+        self.assertEqual(util.get_repo_slug(self.repo), '2020-02-17-euphoria')
+        self.assertEqual(util.get_repo_slug(self.repo, 'upstream'), 'workshop-template')
+
+    def test_callers_cannot_change_the_cache(self):
+        metadata = util.read_git_metadata(self.repo)
+        metadata['remotes']['origin'] = 'https://example.org/other.git'
+        metadata['branch'] = 'main'
+        self.assertEqual(util.get_git_branch(self.repo), 'gh-pages')
+        self.assertEqual(util.get_repo_slug(self.repo), '2020-02-17-euphoria')
+        self.assertEqual(util.read_git_metadata(self.repo)['remotes']['origin'],
+                         'git@github.com:carpentries/2020-02-17-euphoria.git')
+
+    def test_worktree(self):
+        git_dir = os.path.join(self.repo, '.git', 'worktrees', 'other')
+        self.write(git_dir, 'HEAD', 'ref: refs/heads/feature\n')
+        self.write(git_dir, 'commondir', '../..\n')
+        self.write(self.repo, '.git', 'refs', 'heads', 'feature', '2' * 40 + '\n')
+        worktree = os.path.join(self.tempdir, 'other')
+        self.write(worktree, '.git', 'gitdir: {0}\n'.format(git_dir))
+        self.assertEqual(util.get_git_branch(worktree), 'feature')
+        self.assertEqual(util.read_git_metadata(worktree)['commit'], '2' * 40)
+        self.assertEqual(util.get_repo_slug(worktree), '2020-02-17-euphoria')
+
+    def test_not_a_checkout(self):
+        plain = os.path.join(self.tempdir, 'plain')
+        os.mkdir(plain)
+        self.assertIsNone(util.read_git_metadata(plain))
+        self.assertIsNone(util.get_git_remote_url(plain))
+        self.assertEqual(util.get_repo_slug(plain), 'plain')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import validation_service
+from test_workshop_check import VALID_HEADER
+
+# The header of VALID_HEADER, without the '---' lines or the body.
+HEADER_ONLY = VALID_HEADER.split('---')[1]
+
+EPISODE_HEADER = '''title: Introduction
+teaching: 5
+exercises: 5
+questions: ["Why?"]
+objectives: ["Learn."]
+keypoints: ["Learned."]
+'''
+
+
+class TestValidationService(unittest.TestCase):
+    def setUp(self):
+        self.server = validation_service.ValidationServer(('127.0.0.1', 0))
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,),
+                                       daemon=True)
+        self.thread.start()
+        self.url = 'http://{0}:{1}'.format(*self.server.server_address)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, path, text=None):
+        data = None if text is None else text.encode('utf-8')
+        try:
+            with urlopen(self.url + path, data=data, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_workshop_header(self):
+        status, result = self.request('/workshop', HEADER_ONLY)
+        self.assertEqual((status, result['valid'], result['issues']), (200, True, []))
+        status, result = self.request('/workshop', HEADER_ONLY.replace('"fr"', '"xx"'))
+        self.assertFalse(result['valid'])
+        self.assertEqual([i['message'].split(':')[0] for i in result['issues']],
+                         ['country invalid', 'language invalid'])
+
+    def test_workshop_file(self):
+        status, result = self.request('/workshop', VALID_HEADER)
+        self.assertTrue(result['valid'])
+        status, result = self.request('/workshop', VALID_HEADER.replace('id="setup"', ''))
+        self.assertEqual(result['issues'],
+                         [{'location': 'posted', 'message': 'Missing required section "setup"'}])
+
+    def test_episode(self):
+        self.assertTrue(self.request('/lesson/episode', EPISODE_HEADER)[1]['valid'])
+        self.assertTrue(self.request('/lesson/episode',
+                                     'layout: break\ntitle: Coffee\nbreak: 15\n')[1]['valid'])
+        status, result = self.request('/lesson/episode',
+                                      '---\n' + EPISODE_HEADER.replace('teaching: 5\n', '') +
+                                      '---\nBody\n')
+        self.assertEqual([i['message'] for i in result['issues']],
+                         ['Missing metadata field teaching'])
+        self.assertFalse(self.request('/lesson/episode', '[not, a, mapping]')[1]['valid'])
+
+    def test_errors(self):
+        self.assertEqual(self.request('/nowhere', 'x')[0], 404)
+        self.assertEqual(self.request('/nowhere')[0], 404)
+        self.assertEqual(self.request('/workshop', 'x' * (validation_service.MAX_BODY + 1))[0], 413)
+
+    def test_checker_failure_is_a_server_error(self):
+        def broken(text):
+            raise TypeError('unhashable type')
+        with mock.patch.dict(validation_service.ENDPOINTS, {'/workshop': broken}):
+            status, result = self.request('/workshop', HEADER_ONLY)
+        self.assertEqual((status, result), (500, {'error': 'Unable to check: TypeError: '
+                                                           'unhashable type'}))
+        workshop = self.request('/stats')[1]['paths']['/workshop']
+        self.assertEqual((workshop['errors'], workshop['invalid']), (1, 0))
+
+    def test_concurrent_requests_are_counted(self):
+        texts = [HEADER_ONLY, HEADER_ONLY.replace('"fr"', '"xx"')] * 20
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda text: self.request('/workshop', text), texts))
+        self.assertEqual([r[1]['valid'] for r in results], [True, False] * 20)
+
+        status, stats = self.request('/stats')
+        self.assertEqual(stats['requests'], 40)
+        workshop = stats['paths']['/workshop']
+        self.assertEqual((workshop['requests'], workshop['invalid'], workshop['errors']),
+                         (40, 20, 0))
+        self.assertLessEqual(workshop['mean_check_ms'], workshop['max_check_ms'])
+        self.assertLessEqual(workshop['mean_check_ms'], workshop['mean_request_ms'])
+
+
+if __name__ == "__main__":
+    unittest.main()
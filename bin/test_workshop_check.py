@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import workshop_check
+import reporter
+
+
+# A header that passes every check.
+VALID_HEADER = '''---
+layout: workshop
+venue: "Euphoric State University"
+address: "Room A, 123 Forth Street, Blimingen, Euphoria"
+country: "fr"
+language: "fr"
+latitude: "45"
+longitude: "-1"
+humandate: "Feb 17-18, 2020"
+humantime: "9:00 am - 4:30 pm"
+startdate: 2020-02-17
+enddate: 2020-02-18
+instructor: ["Kay McNulty", "Betty Jennings"]
+helper: ["Marlyn Wescoff"]
+email: ["marlyn.wescoff@example.org"]
+collaborative_notes: https://pad.carpentries.org/2020-02-17-euphoria
+eventbrite: "1234567890"
+---
+<h2 id="general">General Information</h2>
+<h2 id="code-of-conduct">Code of Conduct</h2>
+<h2 id="schedule">Schedule</h2>
+<h2 id="setup">Setup</h2>
+'''
+
+# The workshop template's own index page (full of FIXMEs).
+TEMPLATE_INDEX = os.path.join(os.path.dirname(__file__), os.pardir, 'index.md')
+
+
+class TestValidateHeader(unittest.TestCase):
+    def check_file(self, text):
+        r = reporter.Reporter()
+        workshop_check.check_file(r, 'index.md', text)
+        return r.messages
+
+    def test_valid_header_has_no_issues(self):
+        self.assertEqual(self.check_file(VALID_HEADER), [])
+
+    def test_issues_match_reporter(self):
+        with open(TEMPLATE_INDEX, encoding='utf-8') as reader:
+            text = reader.read()
+        _, header, _ = workshop_check.split_metadata('index.md', text)
+        issues = workshop_check.validate_header(header)
+        self.assertTrue(issues)
+        self.assertEqual(issues, self.check_file(text))
+
+    def test_bad_values_reported(self):
+        text = VALID_HEADER.replace('"fr"', '"xx"').replace('layout: workshop\n',
+                                                            'layout: workshop\nextra: 1\n')
+        _, header, _ = workshop_check.split_metadata('index.md', text)
+        messages = [issue.message for issue in workshop_check.validate_header(header)]
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(messages[0].startswith('country invalid'))
+        self.assertTrue(messages[1].startswith('language invalid'))
+        self.assertEqual(messages[2], "Superfluous categories: offending entries ['extra']")
+
+    def test_unhashable_values_reported(self):
+        text = VALID_HEADER.replace('country: "fr"', 'country: ["us"]').replace(
+            'language: "fr"', 'language: {en: 1}')
+        _, header, _ = workshop_check.split_metadata('index.md', text)
+        messages = [issue.message for issue in workshop_check.validate_header(header)]
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(messages[0].startswith('country invalid'))
+        self.assertTrue(messages[1].startswith('language invalid'))
+        self.assertEqual(self.check_file(text), workshop_check.validate_header(header))
+
+
+class TestBodyScanner(unittest.TestCase):
+    def setUp(self):
+        self.includes_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.includes_dir, 'swc'))
+        open(os.path.join(self.includes_dir, 'swc', 'setup.html'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.includes_dir)
+
+    def scan(self, body):
+        body = VALID_HEADER.split('---', 2)[2] + body
+        return workshop_check.scan_body('index.md', body, 10, self.includes_dir)
+
+    def test_valid_body_has_no_issues(self):
+        self.assertEqual(self.scan('<article class="tab-pane active"></article>\n'
+                                   '{% include swc/setup.html %}\n'), [])
+
+    def test_tab_classes(self):
+        issues = self.scan('<article class="tab-pane" id="shell-macos">\n</article>\n')
+        self.assertEqual(issues, [workshop_check.Issue(
+            ('index.md', 16), 'Tab <article> is missing class(es) active')])
+
+    def test_missing_include(self):
+        issues = self.scan('text\n{% include dc/setup.html %}\n')
+        self.assertEqual(issues, [workshop_check.Issue(
+            ('index.md', 17), 'Included file "dc/setup.html" not found in _includes')])
+
+    def test_commented_out_markup_is_ignored(self):
+        self.assertEqual(self.scan('{% comment %}\n<article class="x"></article>\n'
+                                   '{% include missing.html %}\n{% endcomment %}\n'), [])
+
+    def test_template_index_is_clean(self):
+        with open(TEMPLATE_INDEX, encoding='utf-8') as reader:
+            issues = workshop_check.validate_index(TEMPLATE_INDEX, reader.read())
+        self.assertFalse([i for i in issues if i.location is not None])
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.good = self.make_workshop('2020-02-17-euphoria', VALID_HEADER)
+        self.bad = self.make_workshop('bad-slug', VALID_HEADER)
+        self.cache_file = os.path.join(self.tempdir, 'cache.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def make_workshop(self, name, index):
+        root = os.path.join(self.tempdir, name)
+        os.mkdir(root)
+        with open(os.path.join(root, 'index.md'), 'w', encoding='utf-8') as writer:
+            writer.write(index)
+        with open(os.path.join(root, '_config.yml'), 'w', encoding='utf-8') as writer:
+            writer.write('kind: workshop\ncarpentry: swc\n')
+        return root
+
+    def test_bad_slug_does_not_abort_batch(self):
+        results = workshop_check.check_batch([self.bad, self.good], jobs=2)
+        self.assertEqual([r[0] for r in results], [self.bad, self.good])
+        self.assertEqual(len(results[0][1]), 1)
+        self.assertIn('does not match the required slug format', results[0][1][0].message)
+        self.assertEqual(results[1][1], [])
+
+    def test_unchanged_workshops_are_cached(self):
+        first = workshop_check.check_batch([self.good, self.bad], cache_file=self.cache_file)
+        self.assertEqual([r[2] for r in first], [False, False])
+        with open(os.path.join(self.bad, 'index.md'), 'a', encoding='utf-8') as writer:
+            writer.write('changed\n')
+        second = workshop_check.check_batch([self.good, self.bad], cache_file=self.cache_file)
+        self.assertEqual([r[2] for r in second], [True, False])
+        self.assertEqual([r[1] for r in first], [r[1] for r in second])
+
+    def test_cached_line_locations(self):
+        located = self.make_workshop('2020-03-01-located', VALID_HEADER +
+                                     '<article class="tab-pane" id="x">\n</article>\n')
+        first = workshop_check.check_batch([located, self.bad], cache_file=self.cache_file)
+        second = workshop_check.check_batch([located, self.bad], cache_file=self.cache_file)
+        self.assertEqual([r[2] for r in second], [True, True])
+        self.assertEqual([r[1] for r in first], [r[1] for r in second])
+        self.assertEqual(second[0][1][0].location,
+                         (os.path.join(located, 'index.md'), 23))
+        stream = io.StringIO()
+        self.assertFalse(workshop_check.report_batch(second, stream))
+        self.assertIn('Tab <article> is missing class(es) active', stream.getvalue())
+
+    def test_bad_workshop_does_not_abort_records(self):
+        broken = self.make_workshop('2020-04-01-broken', VALID_HEADER)
+        with open(os.path.join(broken, '_config.yml'), 'w', encoding='utf-8') as writer:
+            writer.write('- not a mapping\n')
+        stream = io.StringIO()
+        failures = workshop_check.write_records([self.good, broken], stream, jobs=2)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([r['slug'] for r in records], ['2020-02-17-euphoria'])
+        self.assertEqual([root for (root, _) in failures], [broken])
+        self.assertIn('AttributeError', failures[0][1])
+
+        # A bad value is an invalid record, not a failure.
+        listed = self.make_workshop('2020-05-01-listed', VALID_HEADER.replace(
+            'country: "fr"', 'country: ["fr"]'))
+        stream = io.StringIO()
+        self.assertEqual(workshop_check.write_records([listed], stream), [])
+        self.assertFalse(json.loads(stream.getvalue())['valid'])
+        (issue,) = workshop_check.check_batch([listed])[0][1]
+        self.assertTrue(issue.message.startswith('country invalid'))
+
+    def test_key_covers_helper_modules(self):
+        self.assertEqual([os.path.basename(p) for p in workshop_check.CHECKER_FILES],
+                         ['workshop_check.py', 'util.py', 'reporter.py'])
+        helper = os.path.join(self.tempdir, 'helper.py')
+        keys = []
+        for text in ('x = 1\n', 'x = 2\n'):
+            with open(helper, 'w', encoding='utf-8') as writer:
+                writer.write(text)
+            workshop_check.checker_digest.cache_clear()
+            with mock.patch.object(workshop_check, 'CHECKER_FILES', [helper]):
+                keys.append(workshop_check.workshop_key(self.good))
+        workshop_check.checker_digest.cache_clear()
+        self.assertNotEqual(keys[0], keys[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import workshop_index
+from test_workshop_check import VALID_HEADER
+
+
+class TestWorkshopIndex(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.roots = [self.make_workshop('2020-02-17-euphoria', VALID_HEADER),
+                      self.make_workshop('2020-03-01-blimingen',
+                                         VALID_HEADER.replace('2020-02-1', '2020-03-0'))]
+        self.db = workshop_index.open_index(os.path.join(self.tempdir, 'index.sqlite'))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tempdir)
+
+    def make_workshop(self, name, index):
+        root = os.path.join(self.tempdir, name)
+        os.mkdir(root)
+        with open(os.path.join(root, 'index.md'), 'w', encoding='utf-8') as writer:
+            writer.write(index)
+        with open(os.path.join(root, '_config.yml'), 'w', encoding='utf-8') as writer:
+            writer.write('kind: workshop\ncarpentry: swc\n')
+        return root
+
+    def test_only_changed_workshops_are_parsed(self):
+        counts = workshop_index.update_index(self.db, self.roots)
+        self.assertEqual(counts['parsed'], 2)
+        os.utime(os.path.join(self.roots[0], 'index.md'))
+        with open(os.path.join(self.roots[1], 'index.md'), 'a', encoding='utf-8') as writer:
+            writer.write('changed\n')
+        counts = workshop_index.update_index(self.db, self.roots)
+        self.assertEqual((counts['parsed'], counts['unchanged']), (1, 1))
+
+    def test_date_and_location_queries(self):
+        workshop_index.update_index(self.db, self.roots)
+        found = workshop_index.workshops_between(self.db, '2020-02-18', '2020-02-28')
+        self.assertEqual([r['slug'] for r in found], ['2020-02-17-euphoria'])
+        self.assertEqual(found[0]['instructor'], ['Kay McNulty', 'Betty Jennings'])
+        self.assertEqual(len(workshop_index.workshops_near(self.db, 45.5, -1.5, 1)), 2)
+        self.assertEqual(workshop_index.workshops_near(self.db, 0, 0, 1), [])
+
+    def test_bad_workshop_does_not_abort_update(self):
+        bad = self.make_workshop('2020-04-01-broken', VALID_HEADER)
+        with open(os.path.join(bad, '_config.yml'), 'w', encoding='utf-8') as writer:
+            writer.write('- not a mapping\n')
+        counts = workshop_index.update_index(self.db, [bad] + self.roots)
+        self.assertEqual(counts['parsed'], 2)
+        self.assertEqual([root for (root, _) in counts['failures']], [bad])
+        self.assertIn('AttributeError', counts['failures'][0][1])
+        found = workshop_index.workshops_between(self.db, '2020-01-01', '2020-12-31')
+        self.assertEqual(len(found), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
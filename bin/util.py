@@ -1,6 +1,9 @@
 import sys
 import os
+import re
+import copy
 import json
+from functools import lru_cache
 from subprocess import Popen, PIPE
 
 # Import this way to produce a more useful error message.
@@ -10,7 +13,12 @@ except ImportError:
     print('Unable to import YAML module: please install PyYAML', file=sys.stderr)
     sys.exit(1)
 
-__all__ = ['check_unwanted_files', 'load_yaml', 'read_markdown', 'require']
+__all__ = ['check_unwanted_files', 'get_git_branch', 'get_git_remote_url',
+           'get_repo_slug', 'load_yaml', 'parse_markdown', 'read_git_config',
+           'read_git_metadata', 'read_markdown', 'require']
+
+# YAML loader: the C implementation (much faster) if PyYAML has it.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 # Files that shouldn't be present.
 UNWANTED_FILES = [
@@ -34,11 +42,7 @@ def read_markdown(parser, path):
              for (i, line) in enumerate(body.split('\n'))]
 
     # Parse Markdown.
-    cmd = 'bundle exec ruby {0}'.format(parser)
-    p = Popen(cmd, shell=True, stdin=PIPE, stdout=PIPE,
-              close_fds=True, universal_newlines=True, encoding='utf-8')
-    stdout_data, stderr_data = p.communicate(body)
-    doc = json.loads(stdout_data)
+    doc = parse_markdown(parser, body)
 
     return {
         'metadata': metadata_yaml,
@@ -49,6 +53,18 @@ def read_markdown(parser, path):
     }
 
 
+def parse_markdown(parser, body):
+    """
+    Run the Markdown parser on the body of a file, returning its AST.
+    """
+
+    cmd = 'bundle exec ruby {0}'.format(parser)
+    p = Popen(cmd, shell=True, stdin=PIPE, stdout=PIPE,
+              close_fds=True, universal_newlines=True, encoding='utf-8')
+    stdout_data, stderr_data = p.communicate(body)
+    return json.loads(stdout_data)
+
+
 def split_metadata(path, text):
     """
     Get raw (text) metadata, metadata as YAML, and rest of body.
@@ -63,7 +79,7 @@ def split_metadata(path, text):
         metadata_raw = pieces[1]
         text = pieces[2]
         try:
-            metadata_yaml = yaml.load(metadata_raw, Loader=yaml.SafeLoader)
+            metadata_yaml = yaml.load(metadata_raw, Loader=YAML_LOADER)
         except yaml.YAMLError as e:
             message = 'Unable to parse YAML header in {0}:\n{1}'
             print(message.format(path, e), file=sys.stderr)
@@ -71,15 +87,28 @@ def split_metadata(path, text):
     return metadata_raw, metadata_yaml, text
 
 
+# Parsed YAML files as {absolute path: ((size, mtime), data)}, so that a
+# file used by several checks in one process is only parsed once.
+_YAML_CACHE = {}
+
+
 def load_yaml(filename):
     """
     Wrapper around YAML loading so that 'import yaml' is only needed
-    in one file.
+    in one file.  A file is only parsed again if it has changed, and
+    every caller gets its own copy of the data.
     """
 
+    path = os.path.abspath(filename)
     try:
-        with open(filename, 'r', encoding='utf-8') as reader:
-            return yaml.load(reader, Loader=yaml.SafeLoader)
+        info = os.stat(path)
+        stamp = (info.st_size, info.st_mtime_ns)
+        cached = _YAML_CACHE.get(path)
+        if cached is None or cached[0] != stamp:
+            with open(filename, 'r', encoding='utf-8') as reader:
+                cached = (stamp, yaml.load(reader, Loader=YAML_LOADER))
+            _YAML_CACHE[path] = cached
+        return copy.deepcopy(cached[1])
     except yaml.YAMLError as e:
         message = 'ERROR: Unable to load YAML file {0}:\n{1}'
         print(message.format(filename, e), file=sys.stderr)
@@ -101,6 +130,198 @@ def check_unwanted_files(dir_path, reporter):
                        "Unwanted file found")
 
 
+# Pattern to match a section header in a Git config file => (section, subsection).
+P_GIT_CONFIG_SECTION = re.compile(r'^\[\s*([\w.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+
+# Pattern to match a variable in a Git config file => (name, value).
+P_GIT_CONFIG_VARIABLE = re.compile(r'^([A-Za-z][\w-]*)\s*(?:=\s*(.*))?$')
+
+# Pattern to match the project name at the end of a remote URL.
+P_GIT_REMOTE_PROJECT = re.compile(r'[:/]([^/:]+?)(?:\.git)?/?$')
+
+
+def read_git_config(path):
+    """
+    Read a Git config file, returning {(section, subsection): {name: [values]}}.
+    Section and variable names are lower-cased; the subsection (e.g., the
+    remote name in [remote "origin"]) is None if absent.  A missing file
+    is treated as empty.
+    """
+
+    result = {}
+    values = None
+    try:
+        with open(path, 'r', encoding='utf-8') as reader:
+            lines = reader.readlines()
+    except OSError:
+        return result
+
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        m = P_GIT_CONFIG_SECTION.match(line)
+        if m:
+            section, subsection = m.group(1).lower(), m.group(2)
+            if subsection is None and '.' in section:  # [section.subsection]
+                section, subsection = section.split('.', 1)
+            values = result.setdefault((section, subsection), {})
+            continue
+        m = P_GIT_CONFIG_VARIABLE.match(line)
+        if m and values is not None:
+            value = 'true' if m.group(2) is None else _parse_git_config_value(m.group(2))
+            values.setdefault(m.group(1).lower(), []).append(value)
+    return result
+
+
+def _parse_git_config_value(text):
+    """Remove quotes, escapes, and trailing comments from a config value."""
+
+    result = []
+    quoted = False
+    escapes = {'n': '\n', 't': '\t', 'b': '\b', '\\': '\\', '"': '"'}
+    chars = iter(text)
+    for c in chars:
+        if c == '\\':
+            c = next(chars, '')
+            result.append(escapes.get(c, c))
+        elif c == '"':
+            quoted = not quoted
+        elif c in '#;' and not quoted:
+            break
+        else:
+            result.append(c)
+    return ''.join(result).strip()
+
+
+def _read_first_line(path):
+    """Contents of the first line of a small file, or None."""
+
+    try:
+        with open(path, 'r', encoding='utf-8') as reader:
+            return reader.readline().strip()
+    except OSError:
+        return None
+
+
+def _find_git_dirs(repo_dir):
+    """
+    Find (git_dir, common_dir) for a checkout.  'git_dir' holds HEAD; it
+    may be a 'gitdir:' file's target (as for worktrees and submodules),
+    in which case config and shared refs live in 'common_dir'.
+    """
+
+    path = os.path.join(repo_dir, '.git')
+    if os.path.isfile(path):
+        line = _read_first_line(path) or ''
+        if not line.startswith('gitdir:'):
+            return None, None
+        path = os.path.join(repo_dir, line[len('gitdir:'):].strip())
+    if not os.path.isdir(path):
+        return None, None
+    git_dir = os.path.normpath(path)
+
+    common_dir = git_dir
+    common = _read_first_line(os.path.join(git_dir, 'commondir'))
+    if common:
+        common_dir = os.path.normpath(os.path.join(git_dir, common))
+    return git_dir, common_dir
+
+
+def _resolve_ref(git_dir, common_dir, ref):
+    """Find the commit a ref points to, looking at loose refs first and
+    then packed refs."""
+
+    for d in (git_dir, common_dir):
+        sha = _read_first_line(os.path.join(d, *ref.split('/')))
+        if sha:
+            return sha
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'r', encoding='utf-8') as reader:
+            for line in reader:
+                if line.startswith(('#', '^')):
+                    continue
+                pieces = line.split()
+                if len(pieces) == 2 and pieces[1] == ref:
+                    return pieces[0]
+    except OSError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=None)
+def _read_git_metadata(repo_dir):
+    git_dir, common_dir = _find_git_dirs(repo_dir)
+    if git_dir is None:
+        return None
+
+    config = read_git_config(os.path.join(common_dir, 'config'))
+    remotes = {sub: values['url'][-1]
+               for ((section, sub), values) in config.items()
+               if section == 'remote' and sub and 'url' in values}
+
+    head = _read_first_line(os.path.join(git_dir, 'HEAD')) or ''
+    branch = None
+    if head.startswith('ref:'):
+        ref = head[len('ref:'):].strip()
+        if ref.startswith('refs/heads/'):
+            branch = ref[len('refs/heads/'):]
+        commit = _resolve_ref(git_dir, common_dir, ref)
+    else:
+        commit = head or None
+
+    return {
+        'git_dir': git_dir,
+        'common_dir': common_dir,
+        'remotes': remotes,
+        'branch': branch,
+        'commit': commit,
+    }
+
+
+def read_git_metadata(repo_dir):
+    """
+    Read a checkout's Git metadata without running Git, returning
+    {'git_dir', 'common_dir', 'remotes': {name: url}, 'branch', 'commit'},
+    or None if the directory is not a checkout.  Results are cached per
+    checkout; call read_git_metadata.cache_clear() after changing one.
+    Every caller gets its own copy, so changing it does not change the
+    cache.
+    """
+
+    return copy.deepcopy(_read_git_metadata(os.path.realpath(repo_dir)))
+
+
+read_git_metadata.cache_clear = _read_git_metadata.cache_clear
+
+
+def get_git_remote_url(repo_dir, remote='origin'):
+    """URL of a checkout's remote, or None."""
+
+    metadata = _read_git_metadata(os.path.realpath(repo_dir))
+    return metadata['remotes'].get(remote) if metadata else None
+
+
+def get_git_branch(repo_dir):
+    """Name of the checked-out branch, or None (e.g., if HEAD is detached)."""
+
+    metadata = _read_git_metadata(os.path.realpath(repo_dir))
+    return metadata['branch'] if metadata else None
+
+
+def get_repo_slug(repo_dir, remote='origin'):
+    """
+    Name of the repository a checkout belongs to: the project name in
+    the remote's URL if there is one, otherwise the directory's name.
+    """
+
+    url = get_git_remote_url(repo_dir, remote)
+    m = P_GIT_REMOTE_PROJECT.search(url) if url else None
+    if m:
+        return m.group(1)
+    return os.path.basename(os.path.realpath(repo_dir))
+
+
 def require(condition, message, fatal=False):
     """Fail if condition not met."""
 
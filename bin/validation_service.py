@@ -0,0 +1,235 @@
+"""
+Serve the workshop and lesson metadata checks over HTTP, so that other
+systems (such as a registration form) can validate headers without
+starting a new process for each one.
+
+POST the text of a YAML header, or of a whole file starting with a
+'---' header, to one of the paths in ENDPOINTS.  The response is JSON:
+
+    {"valid": true|false, "issues": [{"location": ..., "message": ...}],
+     "check_ms": time taken by the checks}
+
+If the checks themselves fail, the status is 500 and the response is
+{"error": message} instead, so that it cannot be mistaken for a verdict.
+
+GET /stats returns counts of requests and their latencies.
+"""
+
+
+import sys
+import json
+import time
+import threading
+from argparse import ArgumentParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from util import split_metadata
+from reporter import Reporter
+import lesson_check
+import workshop_check
+
+# Where to listen by default.
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8642
+
+# Largest request body accepted (in bytes).
+MAX_BODY = 256 * 1024
+
+# Key under which requests for unknown paths are counted.
+OTHER_PATHS = 'other'
+
+# Name used as the location of problems in posted text.
+POSTED_FILENAME = 'posted'
+
+
+def main():
+    """Main driver."""
+
+    args = parse_args()
+    server = ValidationServer((args.host, args.port))
+    print('Serving on http://{0}:{1}/'.format(*server.server_address), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args():
+    """Parse command-line arguments."""
+
+    parser = ArgumentParser(description="""Serve workshop and lesson metadata checks over HTTP.""")
+    parser.add_argument('--host',
+                        default=DEFAULT_HOST,
+                        dest='host',
+                        help='address to listen on')
+    parser.add_argument('-p', '--port',
+                        default=DEFAULT_PORT,
+                        type=int,
+                        dest='port',
+                        help='port to listen on')
+    return parser.parse_args()
+
+
+def parse_submission(text):
+    """
+    Split posted text into (raw header, header, body).  Text that starts
+    with '---' is a whole file; anything else is the header alone, and
+    the body is None.  The header is None if it is not valid YAML.
+    """
+
+    if text.startswith('---'):
+        raw, header, body = split_metadata(POSTED_FILENAME, text)
+        if raw is not None:
+            return raw, header, body
+    raw, header, _ = split_metadata(POSTED_FILENAME, '---\n' + text + '\n---\n')
+    return raw, header, None
+
+
+def validate_workshop(text):
+    """Check a workshop's index.md header (and body, if given)."""
+
+    raw, header, body = parse_submission(text)
+    if not isinstance(header, dict):
+        return [workshop_check.Issue(None, 'Header is not a YAML mapping')]
+    issues = workshop_check.find_blank_lines(raw) + \
+        workshop_check.VALIDATOR.validate_header(header)
+    if body is not None:
+        issues += workshop_check.scan_body(POSTED_FILENAME, body, raw.count('\n'))
+    return issues
+
+
+def validate_episode(text):
+    """Check a lesson episode's metadata."""
+
+    _, header, _ = parse_submission(text)
+    reporter = Reporter()
+    if not isinstance(header, dict):
+        reporter.add(POSTED_FILENAME, 'Missing metadata entirely')
+    else:
+        lesson_check.check_episode_metadata(reporter, POSTED_FILENAME, header)
+    return reporter.messages
+
+
+# Validators by request path.
+ENDPOINTS = {
+    '/workshop': validate_workshop,
+    '/lesson/episode': validate_episode,
+}
+
+
+class ServiceStats:
+    """Thread-safe counts and latencies of requests, by path."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.paths = {}
+
+    def record(self, path, status, check_seconds, total_seconds, invalid=False):
+        with self.lock:
+            entry = self.paths.setdefault(path, {
+                'requests': 0, 'errors': 0, 'invalid': 0,
+                'check_seconds': 0.0, 'max_check_seconds': 0.0, 'total_seconds': 0.0})
+            entry['requests'] += 1
+            entry['invalid'] += invalid
+            entry['errors'] += status >= 400
+            entry['check_seconds'] += check_seconds
+            entry['max_check_seconds'] = max(entry['max_check_seconds'], check_seconds)
+            entry['total_seconds'] += total_seconds
+
+    def snapshot(self):
+        """Counts and mean/maximum latencies (in milliseconds) as a dict."""
+
+        with self.lock:
+            paths = {}
+            for (path, entry) in self.paths.items():
+                n = entry['requests']
+                paths[path] = {
+                    'requests': n,
+                    'errors': entry['errors'],
+                    'invalid': entry['invalid'],
+                    'mean_check_ms': 1000 * entry['check_seconds'] / n,
+                    'max_check_ms': 1000 * entry['max_check_seconds'],
+                    'mean_request_ms': 1000 * entry['total_seconds'] / n,
+                }
+            return {'uptime_seconds': time.time() - self.started,
+                    'requests': sum(p['requests'] for p in paths.values()),
+                    'paths': paths}
+
+
+class ValidationHandler(BaseHTTPRequestHandler):
+    """Answer validation and statistics requests."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        start = time.perf_counter()
+        if self.path == '/stats':
+            path, status, body = self.path, 200, self.server.stats.snapshot()
+        else:
+            path, status, body = OTHER_PATHS, 404, {'error': 'Unknown path {0}'.format(self.path)}
+        self.server.stats.record(path, status, 0.0, time.perf_counter() - start)
+        self.send_json(status, body)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        (status, body, check_seconds) = self.validate()
+        self.server.stats.record(self.path if self.path in ENDPOINTS else OTHER_PATHS, status,
+                                 check_seconds, time.perf_counter() - start,
+                                 bool(body.get('issues')))
+        self.send_json(status, body)
+
+    def validate(self):
+        """Run the validator for the request path, returning
+        (status, response body, seconds taken by the checks)."""
+
+        validator = ENDPOINTS.get(self.path)
+        if validator is None:
+            return 404, {'error': 'Unknown path {0}'.format(self.path)}, 0.0
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            return 413, {'error': 'Request body is too large'}, 0.0
+        try:
+            text = self.rfile.read(length).decode('utf-8')
+        except UnicodeDecodeError:
+            return 400, {'error': 'Request body is not UTF-8'}, 0.0
+
+        start = time.perf_counter()
+        try:
+            issues = validator(text)
+        except Exception as e:
+            check_seconds = time.perf_counter() - start
+            return 500, {'error': 'Unable to check: {0}: {1}'.format(type(e).__name__, e)}, \
+                check_seconds
+        check_seconds = time.perf_counter() - start
+        return 200, {'valid': not issues,
+                     'issues': [{'location': location, 'message': message}
+                                for (location, message) in issues],
+                     'check_ms': 1000 * check_seconds}, check_seconds
+
+    def send_json(self, status, body):
+        """Send a JSON response."""
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ValidationServer(ThreadingHTTPServer):
+    """HTTP server that answers each request in its own thread."""
+
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, ValidationHandler)
+        self.stats = ServiceStats()
+
+
+if __name__ == '__main__':
+    main()
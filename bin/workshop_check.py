@@ -6,8 +6,15 @@ docstrings on the checking functions for a summary of the checks.
 import sys
 import os
 import re
+import json
+import hashlib
+from argparse import ArgumentParser
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
-from util import split_metadata, load_yaml, check_unwanted_files
+from functools import lru_cache
+from html.parser import HTMLParser
+from util import split_metadata, load_yaml, check_unwanted_files, get_repo_slug, UNWANTED_FILES
 from reporter import Reporter
 
 # Metadata field patterns.
@@ -17,11 +24,38 @@ EVENTBRITE_PATTERN = r'\d{9,10}'
 URL_PATTERN = r'https?://.+'
 SLUG_PATTERN = r'\d{4}-\d{2}-\d{2}-[A-z0-9\-\_]+'
 
+# Compiled versions of the patterns above.
+P_EMAIL = re.compile(EMAIL_PATTERN)
+P_HUMANTIME = re.compile(HUMANTIME_PATTERN)
+P_EVENTBRITE = re.compile(EVENTBRITE_PATTERN)
+P_URL = re.compile(URL_PATTERN)
+P_SLUG = re.compile(SLUG_PATTERN)
+
 # Defaults.
 CARPENTRIES = ("dc", "swc", "lc", "cp")
 DEFAULT_CONTACT_EMAIL = 'team@carpentries.org'
 
-USAGE = 'Usage: "workshop_check.py path/to/root/directory"'
+USAGE = 'Usage: "workshop_check.py path/to/root/directory [more/root/directories...]"'
+
+# Files whose contents determine the result of checking a workshop.
+WORKSHOP_FILES = ['index.md', '_config.yml']
+
+# Source files whose code determines the result of checking a workshop
+# (this checker and the helpers it uses to parse files and report problems).
+CHECKER_FILES = [os.path.abspath(__file__)] + \
+    [sys.modules[f.__module__].__file__ for f in (split_metadata, Reporter)]
+
+# Sections (by id) that every workshop home page must have.
+REQUIRED_SECTIONS = ['general', 'code-of-conduct', 'schedule', 'setup']
+
+# Classes that every tab (<article>) must carry.
+TAB_CLASSES = ['active', 'tab-pane']
+
+# Pattern to match Liquid tags => (tag name, arguments).
+P_LIQUID_TAG = re.compile(r'{%-?\s*(\w+)\s*(.*?)\s*-?%}', re.DOTALL)
+
+# Fields copied from _config.yml into workshop records.
+RECORD_CONFIG_FIELDS = ['kind', 'carpentry', 'curriculum', 'flavor', 'pilot', 'title']
 
 # Country and language codes.  Note that codes mean different things: 'ar'
 # is 'Arabic' as a language but 'Argentina' as a country.
@@ -69,6 +103,14 @@ ISO_LANGUAGE = [
     'yo', 'za', 'zh', 'zu'
 ]
 
+# Sets of the codes above for fast membership tests (the lists are kept
+# for their order in error messages).
+ISO_COUNTRY_CODES = frozenset(ISO_COUNTRY)
+ISO_LANGUAGE_CODES = frozenset(ISO_LANGUAGE)
+
+# A single problem found in a workshop: same shape as a Reporter message.
+Issue = namedtuple('Issue', ['location', 'message'])
+
 
 def look_for_fixme(func):
     """Decorator to fail test if text argument starts with "FIXME"."""
@@ -93,14 +135,14 @@ def check_layout(layout):
 def check_country(country):
     '''"country" must be a lowercase ISO-3166 two-letter code.'''
 
-    return country in ISO_COUNTRY
+    return isinstance(country, str) and country in ISO_COUNTRY_CODES
 
 
 @look_for_fixme
 def check_language(language):
     '''"language" must be a lowercase ISO-639 two-letter code.'''
 
-    return language in ISO_LANGUAGE
+    return isinstance(language, str) and language in ISO_LANGUAGE_CODES
 
 
 @look_for_fixme
@@ -143,7 +185,7 @@ def check_humantime(time):
     workshop, such as '09:00 - 16:00'.
     """
 
-    return bool(re.match(HUMANTIME_PATTERN, time.replace(' ', '')))
+    return bool(P_HUMANTIME.match(time.replace(' ', '')))
 
 
 def check_date(this_date):
@@ -215,7 +257,7 @@ def check_emails(emails):
     # YAML automatically loads list-like strings as lists.
     if (isinstance(emails, list) and len(emails) >= 0):
         for email in emails:
-            if ((not bool(re.match(EMAIL_PATTERN, email))) or (email == DEFAULT_CONTACT_EMAIL)):
+            if ((not bool(P_EMAIL.match(email))) or (email == DEFAULT_CONTACT_EMAIL)):
                 return False
     else:
         return False
@@ -232,7 +274,7 @@ def check_eventbrite(eventbrite):
     if isinstance(eventbrite, int):
         return True
     else:
-        return bool(re.match(EVENTBRITE_PATTERN, eventbrite))
+        return bool(P_EVENTBRITE.match(eventbrite))
 
 
 @look_for_fixme
@@ -241,7 +283,7 @@ def check_collaborative_notes(collaborative_notes):
     'collaborative_notes' must be a valid URL.
     """
 
-    return bool(re.match(URL_PATTERN, collaborative_notes))
+    return bool(P_URL.match(collaborative_notes))
 
 
 @look_for_fixme
@@ -319,66 +361,200 @@ REQUIRED = {k for k in HANDLERS if HANDLERS[k][0]}
 OPTIONAL = {k for k in HANDLERS if not HANDLERS[k][0]}
 
 
-def check_blank_lines(reporter, raw):
+def find_blank_lines(raw):
     """
-    Blank lines are not allowed in category headers.
+    Return a list of issues for blank lines in the raw header.
     """
 
     lines = [(i, x) for (i, x) in enumerate(
         raw.strip().split('\n')) if not x.strip()]
-    reporter.check(not lines,
-                   None,
-                   'Blank line(s) in header: {0}',
-                   ', '.join(["{0}: {1}".format(i, x.rstrip()) for (i, x) in lines]))
+    if not lines:
+        return []
+    return [Issue(None, 'Blank line(s) in header: {0}'.format(
+        ', '.join(["{0}: {1}".format(i, x.rstrip()) for (i, x) in lines])))]
 
 
-def check_categories(reporter, left, right, msg):
+class HeaderValidator:
     """
-    Report differences (if any) between two sets of categories.
+    Validate workshop headers without a Reporter.
+
+    The handler table is compiled once into one closure per field, so a
+    single validator can be reused for any number of headers.
     """
 
-    diff = left - right
-    reporter.check(len(diff) == 0,
-                   None,
-                   '{0}: offending entries {1}',
-                   msg, sorted(list(diff)))
+    def __init__(self, handlers=HANDLERS):
+        """Compile the handler table."""
+
+        self.required = frozenset(k for k in handlers if handlers[k][0])
+        self.known = frozenset(handlers)
+        self.fields = [self._compile(category, *handlers[category])
+                       for category in handlers]
+
+    @staticmethod
+    def _compile(category, required, handler, message):
+        """Create the closure that checks a single field."""
+
+        def check(header):
+            if category in header:
+                value = header[category]
+                if (required or value) and not handler(value):
+                    return Issue(None, '{0}\n    actual value "{1}"'.format(
+                        message, value))
+            elif required:
+                return Issue(None,
+                             'Missing mandatory key "{0}"'.format(category))
+            return None
+
+        return check
+
+    def validate_header(self, header):
+        """
+        Check a parsed header, returning a list of issues (empty if the
+        header is valid).
+        """
+
+        # If the category is in the header and is either required or
+        # we have actual data (as opposed to a commented-out entry), we
+        # check it.  If it *isn't* in the header but is required, report
+        # an error.
+        issues = []
+        for check in self.fields:
+            issue = check(header)
+            if issue is not None:
+                issues.append(issue)
+
+        # Check whether we have missing or too many categories.
+        seen_categories = set(header.keys())
+        for (diff, msg) in ((self.required - seen_categories,
+                             'Missing categories'),
+                            (seen_categories - self.known,
+                             'Superfluous categories')):
+            if diff:
+                issues.append(Issue(None, '{0}: offending entries {1}'.format(
+                    msg, sorted(diff))))
+
+        return issues
+
+
+# Shared validator built from HANDLERS.
+VALIDATOR = HeaderValidator()
+
+
+def validate_header(header):
+    """
+    Check a parsed workshop header, returning a list of issues.  The
+    results are the same as the command-line tool reports for the
+    header, but nothing is printed and the program never exits.
+    """
 
+    return VALIDATOR.validate_header(header)
 
-def check_file(reporter, path, data):
+
+class BodyScanner(HTMLParser):
     """
-    Get header from file, call all other functions, and check file for
-    validity.
+    Check the HTML structure of a workshop page's body as it is parsed:
+    tabs must carry the right classes, required sections must be
+    present, and included files must exist.  Anything inside a Liquid
+    {% comment %} block is ignored.
+    """
+
+    def __init__(self, path, offset=0, includes_dir=None):
+        """Set up scanning of the body of the page at 'path', whose first
+        line is line 'offset' + 1 of the file."""
+
+        super().__init__(convert_charrefs=True)
+        self.path = path
+        self.line_offset = offset
+        self.includes_dir = includes_dir
+        self.in_comment = False
+        self.ids = set()
+        self.issues = []
+
+    def location(self, extra_lines=0):
+        """(path, line) of the current position in the file."""
+
+        return (self.path, self.line_offset + self.getpos()[0] + extra_lines)
+
+    def handle_starttag(self, tag, attrs):
+        if self.in_comment:
+            return
+        attrs = dict(attrs)
+        if attrs.get('id'):
+            self.ids.add(attrs['id'])
+        if tag == 'article':
+            classes = (attrs.get('class') or '').split()
+            missing = [c for c in TAB_CLASSES if c not in classes]
+            if missing:
+                self.issues.append(Issue(self.location(),
+                                         'Tab <article> is missing class(es) {0}'.format(
+                                             ', '.join(missing))))
+
+    def handle_data(self, data):
+        for m in P_LIQUID_TAG.finditer(data):
+            name, argument = m.group(1), m.group(2)
+            if name == 'comment':
+                self.in_comment = True
+            elif name == 'endcomment':
+                self.in_comment = False
+            elif name == 'include' and not self.in_comment:
+                self.check_include(argument.split()[0] if argument else '',
+                                   data.count('\n', 0, m.start()))
+
+    def check_include(self, filename, extra_lines):
+        """Check that an included file exists (if we know where to look)."""
+
+        if self.includes_dir is None or '{' in filename:
+            return
+        if not os.path.isfile(os.path.join(self.includes_dir, filename)):
+            self.issues.append(Issue(self.location(extra_lines),
+                                     'Included file "{0}" not found in _includes'.format(
+                                         filename)))
+
+    def close(self):
+        """Finish parsing and check for required sections."""
+
+        super().close()
+        for section in REQUIRED_SECTIONS:
+            if section not in self.ids:
+                self.issues.append(Issue(self.path,
+                                         'Missing required section "{0}"'.format(section)))
+
+
+def scan_body(path, body, offset=0, includes_dir=None):
+    """
+    Check the HTML structure of a page body, returning a list of issues.
+    """
+
+    scanner = BodyScanner(path, offset, includes_dir)
+    scanner.feed(body)
+    scanner.close()
+    return scanner.issues
+
+
+def validate_index(path, data):
+    """
+    Check the text of a workshop's index file (header and body) in a
+    single pass, returning a list of issues.
     """
 
-    # Get metadata as text and as YAML.
     raw, header, body = split_metadata(path, data)
+    offset = 0 if raw is None else raw.count('\n')
+    includes_dir = os.path.join(os.path.dirname(path), '_includes')
+    if not os.path.isdir(includes_dir):
+        includes_dir = None
 
-    # Do we have any blank lines in the header?
-    check_blank_lines(reporter, raw)
+    return find_blank_lines(raw) + \
+        VALIDATOR.validate_header(header) + \
+        scan_body(path, body, offset, includes_dir)
 
-    # Look through all header entries.  If the category is in the input
-    # file and is either required or we have actual data (as opposed to
-    # a commented-out entry), we check it.  If it *isn't* in the header
-    # but is required, report an error.
-    for category in HANDLERS:
-        required, handler, message = HANDLERS[category]
-        if category in header:
-            if required or header[category]:
-                reporter.check(handler(header[category]),
-                               None,
-                               '{0}\n    actual value "{1}"',
-                               message, header[category])
-        elif required:
-            reporter.add(None,
-                         'Missing mandatory key "{0}"',
-                         category)
-
-    # Check whether we have missing or too many categories
-    seen_categories = set(header.keys())
-    check_categories(reporter, REQUIRED, seen_categories,
-                     'Missing categories')
-    check_categories(reporter, seen_categories, REQUIRED.union(OPTIONAL),
-                     'Superfluous categories')
+
+def check_file(reporter, path, data):
+    """
+    Get header from file, call all other functions, and check file for
+    validity.
+    """
+
+    reporter.extend(validate_index(path, data))
 
 
 def check_config(reporter, filename):
@@ -401,10 +577,16 @@ def check_config(reporter, filename):
                    carpentry)
 
 
-def check_slug(reporter, filename, repo_dir):
+def check_slug(reporter, filename, repo_dir, fatal=True):
+    '''
+    Check that the repository name is a valid workshop slug.  An
+    invalid slug for a core lesson program stops the program unless
+    'fatal' is false, in which case it is reported like any other error.
+    '''
+
     config = load_yaml(filename)
 
-    repo_name = os.path.basename(os.path.realpath(repo_dir))
+    repo_name = get_repo_slug(repo_dir)
 
     carpentry = config.get('carpentry', None)
 
@@ -416,7 +598,10 @@ def check_slug(reporter, filename, repo_dir):
                 'Please rename your repository to a valid slug using the rename option in the "Settings" menu.'
             )
 
-            if not bool(re.match(SLUG_PATTERN, repo_name)):
+            if not bool(P_SLUG.match(repo_name)):
+                if not fatal:
+                    reporter.add(None, fail_msg, repo_name, slugfmt)
+                    return
                 print(fail_msg.format(repo_name, slugfmt))
                 sys.exit(1)
 
@@ -427,20 +612,328 @@ def check_slug(reporter, filename, repo_dir):
                 'please rename your repository to a valid slug using the rename option in the "Settings" menu.'
             )
 
-            reporter.check(bool(re.match(SLUG_PATTERN, repo_name)),
+            reporter.check(bool(P_SLUG.match(repo_name)),
                 None,
                 warn_msg,
                 repo_name, slugfmt)
 
 
-def main():
-    '''Run as the main program.'''
+def check_workshop(root_dir):
+    '''
+    Check a single workshop, returning a list of issues.  Problems that
+    would stop the command-line tool (including unreadable files) are
+    reported as issues instead, so that one bad workshop cannot abort
+    a batch.
+    '''
+
+    index_file = os.path.join(root_dir, 'index.md')
+    config_file = os.path.join(root_dir, '_config.yml')
 
-    if len(sys.argv) != 2:
+    reporter = Reporter()
+    try:
+        check_config(reporter, config_file)
+        check_slug(reporter, config_file, root_dir, fatal=False)
+        check_unwanted_files(root_dir, reporter)
+        with open(index_file, encoding='utf-8') as reader:
+            check_file(reporter, index_file, reader.read())
+    except Exception as e:
+        reporter.add(None, 'Unable to check workshop: {0}: {1}',
+                     type(e).__name__, e)
+    return [Issue(*m) for m in reporter.messages]
+
+
+@lru_cache(maxsize=None)
+def checker_digest():
+    '''Hash the code of the checker (see CHECKER_FILES).'''
+
+    digest = hashlib.sha256()
+    for path in CHECKER_FILES:
+        with open(path, 'rb') as reader:
+            data = reader.read()
+        digest.update(b'%d:' % len(data))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def workshop_key(root_dir):
+    '''
+    Hash everything that the result of checking a workshop depends on:
+    the checker's code, the workshop files, the repository name (for
+    the slug check), and which unwanted files are present.
+    '''
+
+    digest = hashlib.sha256()
+    digest.update(checker_digest().encode('utf-8'))
+    for filename in WORKSHOP_FILES:
+        path = os.path.join(root_dir, filename)
+        try:
+            with open(path, 'rb') as reader:
+                data = reader.read()
+            digest.update(b'%d:' % len(data))
+            digest.update(data)
+        except OSError:
+            digest.update(b'-')
+    digest.update(get_repo_slug(root_dir).encode('utf-8'))
+    for filename in UNWANTED_FILES:
+        digest.update(b'1' if os.path.exists(os.path.join(root_dir, filename)) else b'0')
+    return digest.hexdigest()
+
+
+def _check_root(root_dir):
+    '''Worker for check_batch: return (key, issues) for one workshop.'''
+
+    return workshop_key(root_dir), check_workshop(root_dir)
+
+
+def load_cache(cache_file):
+    '''
+    Load cached batch results as {root: {'key': hash, 'issues': [...]}}.
+    A missing or damaged cache is treated as empty.
+    '''
+
+    if not cache_file:
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as reader:
+            cache = json.load(reader)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_file, cache):
+    '''Save batch results, replacing the cache file atomically.'''
+
+    if not cache_file:
+        return
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as writer:
+        json.dump(cache, writer, indent=1, sort_keys=True)
+    os.replace(temp_file, cache_file)
+
+
+def check_batch(roots, jobs=None, cache_file=None):
+    '''
+    Check many workshops in a process pool, returning a list of
+    (root, issues, cached) in the order the roots were given.  Roots
+    whose files have not changed since the last run are taken from the
+    cache without being checked again.
+    '''
+
+    cache = load_cache(cache_file)
+    results = {}
+    pending = []
+    for root in roots:
+        entry = cache.get(os.path.abspath(root))
+        try:
+            key = workshop_key(root)
+        except OSError:
+            key = None
+        if entry and key and entry.get('key') == key:
+            # JSON turns (path, line) locations into lists.
+            results[root] = ([Issue(tuple(loc) if isinstance(loc, list) else loc, message)
+                              for (loc, message) in entry['issues']], True)
+        elif root not in pending:
+            pending.append(root)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [(root, pool.submit(_check_root, root)) for root in pending]
+            for (root, future) in futures:
+                try:
+                    key, issues = future.result()
+                except Exception as e:
+                    issues = [Issue(None, 'Unable to check workshop: {0}: {1}'.format(
+                        type(e).__name__, e))]
+                else:
+                    cache[os.path.abspath(root)] = {'key': key, 'issues': issues}
+                results[root] = (issues, False)
+
+    save_cache(cache_file, cache)
+    return [(root,) + results[root] for root in roots]
+
+
+def report_batch(results, stream=sys.stdout):
+    '''
+    Print one aggregated report for a batch, returning True if every
+    workshop passed.
+    '''
+
+    failed = 0
+    cached = 0
+    for (root, issues, from_cache) in results:
+        cached += from_cache
+        if not issues:
+            print('{0}: OK'.format(root), file=stream)
+            continue
+        failed += 1
+        print('{0}: {1} problem(s)'.format(root, len(issues)), file=stream)
+        for issue in sorted(issues, key=Reporter.key):
+            print('    ' + Reporter.pretty(issue).replace('\n', '\n    '), file=stream)
+    print('Checked {0} workshop(s): {1} passed, {2} failed ({3} cached)'.format(
+        len(results), len(results) - failed, failed, cached), file=stream)
+    return failed == 0
+
+
+def normalize_value(category, value):
+    '''
+    Convert a header value to a plain JSON-friendly form: placeholders
+    and empty values become None, dates become YYYY-MM-DD strings, and
+    coordinates become floats.
+    '''
+
+    if isinstance(value, str) and value.lstrip().startswith('FIXME'):
+        return None
+    if value in ('', [], None):
+        return None
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    if category in ('latitude', 'longitude'):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if category == 'eventbrite':
+        return str(value)
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return value
+
+
+def workshop_record(root_dir):
+    '''
+    Parse a workshop's index.md header and _config.yml into a single
+    flat record suitable for a calendar or map feed.
+    '''
+
+    index_file = os.path.join(root_dir, 'index.md')
+    config_file = os.path.join(root_dir, '_config.yml')
+
+    record = {
+        'root': os.path.abspath(root_dir),
+        'slug': get_repo_slug(root_dir),
+    }
+
+    config = load_yaml(config_file) or {}
+    for field in RECORD_CONFIG_FIELDS:
+        record[field] = normalize_value(field, config.get(field, None))
+
+    try:
+        with open(index_file, encoding='utf-8') as reader:
+            _, header, _ = split_metadata(index_file, reader.read())
+    except OSError:
+        header = None
+    if not isinstance(header, dict):
+        header = {}
+    for category in HANDLERS:
+        record[category] = normalize_value(category, header.get(category, None))
+
+    record['valid'] = bool(header) and not VALIDATOR.validate_header(header)
+    return record
+
+
+def workshop_records(roots, jobs=None):
+    '''
+    Parse many workshops in a process pool, yielding (root, record,
+    error) in the order the roots were given.  If a workshop cannot be
+    parsed, its record is None and the error says why, so that one bad
+    workshop cannot abort the others.
+    '''
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [(root, pool.submit(workshop_record, root)) for root in roots]
+        for (root, future) in futures:
+            try:
+                record, error = future.result(), None
+            except Exception as e:
+                record, error = None, 'Unable to read workshop: {0}: {1}'.format(
+                    type(e).__name__, e)
+            yield root, record, error
+
+
+def write_records(roots, stream, jobs=None):
+    '''
+    Write one JSON record per workshop to a stream (JSON Lines),
+    returning [(root, error)] for the workshops that could not be read.
+    '''
+
+    failures = []
+    for (root, record, error) in workshop_records(roots, jobs):
+        if error is None:
+            print(json.dumps(record, sort_keys=True), file=stream)
+        else:
+            failures.append((root, error))
+    return failures
+
+
+def report_failures(failures, stream=sys.stderr):
+    '''Print the workshops that could not be read, returning True if none.'''
+
+    for (root, error) in failures:
+        print('{0}: {1}'.format(root, error), file=stream)
+    return not failures
+
+
+def parse_args():
+    '''Parse command-line arguments.'''
+
+    parser = ArgumentParser(description='''Check workshop websites.''',
+                            usage=USAGE)
+    parser.add_argument('roots',
+                        nargs='*',
+                        help='workshop root directories')
+    parser.add_argument('-f', '--roots-file',
+                        default=None,
+                        dest='roots_file',
+                        help='file listing workshop root directories, one per line')
+    parser.add_argument('-j', '--jobs',
+                        default=None,
+                        type=int,
+                        dest='jobs',
+                        help='number of worker processes for batch checks')
+    parser.add_argument('-c', '--cache',
+                        default=None,
+                        dest='cache_file',
+                        help='file in which to cache batch results')
+    parser.add_argument('--records',
+                        default=None,
+                        dest='records_file',
+                        help='write normalized workshop records as JSON Lines ("-" for stdout)')
+
+    args = parser.parse_args()
+    if args.roots_file:
+        with open(args.roots_file, 'r', encoding='utf-8') as reader:
+            args.roots.extend(line.strip() for line in reader
+                              if line.strip() and not line.startswith('#'))
+    if not args.roots:
         print(USAGE, file=sys.stderr)
         sys.exit(1)
+    args.batch = (len(args.roots) > 1) or bool(args.roots_file) or bool(args.cache_file)
+
+    return args
+
+
+def main():
+    '''Run as the main program.'''
 
-    root_dir = sys.argv[1]
+    args = parse_args()
+    if args.records_file:
+        if args.records_file == '-':
+            failures = write_records(args.roots, sys.stdout, args.jobs)
+        else:
+            with open(args.records_file, 'w', encoding='utf-8') as writer:
+                failures = write_records(args.roots, writer, args.jobs)
+        if not report_failures(failures):
+            sys.exit(1)
+        return
+
+    if args.batch:
+        results = check_batch(args.roots, args.jobs, args.cache_file)
+        if not report_batch(results):
+            sys.exit(1)
+        return
+
+    root_dir = args.roots[0]
     index_file = os.path.join(root_dir, 'index.md')
     config_file = os.path.join(root_dir, '_config.yml')
 
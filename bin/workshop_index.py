@@ -0,0 +1,209 @@
+'''Build an incremental index of workshop metadata for calendar and map
+feeds.  Only workshops whose files have changed since the last build are
+parsed again; everything else is read from the index.
+'''
+
+
+import sys
+import os
+import json
+import sqlite3
+from argparse import ArgumentParser
+
+from workshop_check import WORKSHOP_FILES, workshop_key, workshop_records, report_failures
+
+USAGE = 'Usage: "workshop_index.py -d index.sqlite [-o feed.jsonl] path/to/root/directory..."'
+
+# Table of workshop records, with indexes for date and location queries.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workshops (
+    root TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    slug TEXT,
+    carpentry TEXT,
+    startdate TEXT,
+    enddate TEXT,
+    latitude REAL,
+    longitude REAL,
+    valid INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workshops_by_date ON workshops (startdate, enddate);
+CREATE INDEX IF NOT EXISTS workshops_by_location ON workshops (latitude, longitude);
+'''
+
+
+def main():
+    '''Run as the main program.'''
+
+    args = parse_args()
+    db = open_index(args.index_file)
+    counts = update_index(db, args.roots, jobs=args.jobs, prune=not args.keep)
+    if args.feed_file == '-':
+        write_feed(db, sys.stdout)
+    elif args.feed_file:
+        with open(args.feed_file, 'w', encoding='utf-8') as writer:
+            write_feed(db, writer)
+    db.close()
+    print('Indexed {0} workshop(s): {1} parsed, {2} unchanged, {3} removed, {4} failed'.format(
+        len(args.roots), counts['parsed'], counts['unchanged'], counts['removed'],
+        len(counts['failures'])),
+        file=sys.stderr)
+    if not report_failures(counts['failures']):
+        sys.exit(1)
+
+
+def parse_args():
+    '''Parse command-line arguments.'''
+
+    parser = ArgumentParser(description='''Build an index of workshop metadata.''',
+                            usage=USAGE)
+    parser.add_argument('roots',
+                        nargs='*',
+                        help='workshop root directories')
+    parser.add_argument('-d', '--database',
+                        required=True,
+                        dest='index_file',
+                        help='SQLite file holding the index')
+    parser.add_argument('-f', '--roots-file',
+                        default=None,
+                        dest='roots_file',
+                        help='file listing workshop root directories, one per line')
+    parser.add_argument('-j', '--jobs',
+                        default=None,
+                        type=int,
+                        dest='jobs',
+                        help='number of worker processes for parsing')
+    parser.add_argument('-k', '--keep',
+                        default=False,
+                        action='store_true',
+                        dest='keep',
+                        help='keep workshops that are not listed on this run')
+    parser.add_argument('-o', '--output',
+                        default=None,
+                        dest='feed_file',
+                        help='write the feed as JSON Lines ("-" for stdout)')
+
+    args = parser.parse_args()
+    if args.roots_file:
+        with open(args.roots_file, 'r', encoding='utf-8') as reader:
+            args.roots.extend(line.strip() for line in reader
+                              if line.strip() and not line.startswith('#'))
+    return args
+
+
+def open_index(index_file):
+    '''Open (creating if necessary) the index database.'''
+
+    db = sqlite3.connect(index_file)
+    db.executescript(SCHEMA)
+    return db
+
+
+def file_stamp(root_dir):
+    '''
+    Cheap summary of a workshop's files (size and modification time)
+    used to skip hashing workshops that have not been touched.
+    '''
+
+    stamp = []
+    for filename in WORKSHOP_FILES:
+        try:
+            info = os.stat(os.path.join(root_dir, filename))
+            stamp.append([info.st_size, info.st_mtime_ns])
+        except OSError:
+            stamp.append(None)
+    return json.dumps(stamp)
+
+
+def update_index(db, roots, jobs=None, prune=True):
+    '''
+    Bring the index up to date for the given workshops, returning counts
+    of workshops parsed, unchanged, and removed, and (under 'failures')
+    [(root, error)] for workshops that could not be parsed.  A workshop
+    is parsed again only if its files' contents have changed; if only
+    their timestamps have changed, just the stored stamp is updated.  A
+    workshop that cannot be parsed is dropped from the index (so that
+    stale data is not published) and the others are indexed as usual.
+    '''
+
+    known = {row[0]: (row[1], row[2]) for row in
+             db.execute('SELECT root, stamp, digest FROM workshops')}
+    counts = {'parsed': 0, 'unchanged': 0, 'removed': 0, 'failures': []}
+    changed = []
+    for root in roots:
+        path = os.path.abspath(root)
+        stamp = file_stamp(path)
+        if path in known and known[path][0] == stamp:
+            counts['unchanged'] += 1
+            continue
+        digest = workshop_key(path)
+        if path in known and known[path][1] == digest:
+            db.execute('UPDATE workshops SET stamp = ? WHERE root = ?', (stamp, path))
+            counts['unchanged'] += 1
+            continue
+        changed.append((path, stamp, digest))
+
+    if changed:
+        records = workshop_records([c[0] for c in changed], jobs)
+        for ((path, stamp, digest), (_, record, error)) in zip(changed, records):
+            if error is not None:
+                db.execute('DELETE FROM workshops WHERE root = ?', (path,))
+                counts['failures'].append((path, error))
+                continue
+            db.execute('INSERT OR REPLACE INTO workshops VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                       (path, stamp, digest, record['slug'], record['carpentry'],
+                        record['startdate'], record['enddate'],
+                        record['latitude'], record['longitude'],
+                        int(record['valid']), json.dumps(record, sort_keys=True)))
+            counts['parsed'] += 1
+
+    if prune:
+        listed = {os.path.abspath(root) for root in roots}
+        for path in set(known) - listed:
+            db.execute('DELETE FROM workshops WHERE root = ?', (path,))
+            counts['removed'] += 1
+
+    db.commit()
+    return counts
+
+
+def workshops_between(db, start, end):
+    '''
+    Records of workshops overlapping the dates 'start' to 'end'
+    (YYYY-MM-DD strings), in date order.
+    '''
+
+    rows = db.execute('SELECT record FROM workshops '
+                      'WHERE startdate <= ? AND COALESCE(enddate, startdate) >= ? '
+                      'ORDER BY startdate, root',
+                      (end, start))
+    return [json.loads(row[0]) for row in rows]
+
+
+def workshops_near(db, latitude, longitude, degrees):
+    '''
+    Records of workshops within a box 'degrees' wide in each direction
+    around a location.
+    '''
+
+    rows = db.execute('SELECT record FROM workshops '
+                      'WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? '
+                      'ORDER BY startdate, root',
+                      (latitude - degrees, latitude + degrees,
+                       longitude - degrees, longitude + degrees))
+    return [json.loads(row[0]) for row in rows]
+
+
+def write_feed(db, stream, valid_only=True):
+    '''Write workshop records in date order as JSON Lines.'''
+
+    query = 'SELECT record FROM workshops {0} ORDER BY startdate, root'.format(
+        'WHERE valid' if valid_only else '')
+    for (record,) in db.execute(query):
+        print(record, file=stream)
+
+
+if __name__ == '__main__':
+    main()
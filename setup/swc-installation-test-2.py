@@ -30,7 +30,9 @@ dependency.
 
 # The CHECKER dictionary stores information about all the dependencies
 # and CHECKS stores list of the dependencies which are to be checked in
-# the current workshop.
+# the current workshop.  Each checker in CHECKER is only built when it
+# is first needed, and modules that not every run needs are imported
+# when they are first used, so that the script starts quickly.
 
 # In the "__name__ == '__main__'" block, we launch all the checks with
 # check() function, which prints information about the tests as they run
@@ -43,8 +45,7 @@ dependency.
 
 from __future__ import print_function  # for Python 2.6 compatibility
 
-import distutils.ccompiler as _distutils_ccompiler
-import fnmatch as _fnmatch
+import functools as _functools
 try:  # Python 2.7 and 3.x
     import importlib as _importlib
 except ImportError:  # Python 2.6 and earlier
@@ -58,27 +59,58 @@ except ImportError:  # Python 2.6 and earlier
                 module = getattr(module, n)
             return module
     _importlib = _Importlib()
-import logging as _logging
 import os as _os
-import platform as _platform
 import re as _re
-import shlex as _shlex
-import subprocess as _subprocess
 import sys as _sys
-try:  # Python 3.x
-    import urllib.parse as _urllib_parse
-except ImportError:  # Python 2.x
-    import urllib as _urllib_parse  # for quote()
-import xml.etree.ElementTree as _element_tree
+import threading as _threading
+import time as _time
 
 
-if not hasattr(_shlex, 'quote'):  # Python versions older than 3.3
-    # Use the undocumented pipes.quote()
-    import pipes as _pipes
-    _shlex.quote = _pipes.quote
+class _LazyModule (object):
+    """Stand-in for a module that is imported when it is first used
 
-
-__version__ = '0.1'
+    Most runs only need a few of the modules this script can use, so
+    importing them all up front would just delay the first output.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = _importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+_element_tree = _LazyModule('xml.etree.ElementTree')
+_fnmatch = _LazyModule('fnmatch')
+_json = _LazyModule('json')
+_platform = _LazyModule('platform')
+_queue = _LazyModule('queue')
+_shlex = _LazyModule('shlex')
+_signal = _LazyModule('signal')
+_subprocess = _LazyModule('subprocess')
+if _sys.version_info >= (3, 2):
+    _futures = _LazyModule('concurrent.futures')
+else:  # Python 2.x, where checks run one at a time
+    _futures = None
+if _sys.version_info >= (3, 8):
+    _importlib_machinery = _LazyModule('importlib.machinery')
+    _importlib_metadata = _LazyModule('importlib.metadata')
+    _importlib_util = _LazyModule('importlib.util')
+else:  # Python packages are checked by importing them
+    _importlib_metadata = None
+
+
+def _quote(arg):
+    "Quote a command-line argument for display"
+    try:  # Python 3.3 and later
+        return _shlex.quote(arg)
+    except AttributeError:  # use the undocumented pipes.quote()
+        return _importlib.import_module('pipes').quote(arg)
+
+
+__version__ = '0.2'
 
 # Comment out any entries you don't need
 CHECKS = [
@@ -121,10 +153,93 @@ CHECKS = [
     #'mayavi.mlab',
     ]
 
-CHECKER = {}
+class _Checkers (dict):
+    """Registry of checkers, each built the first time it is needed
+
+    register(check, factory, **kwargs) arranges for CHECKER[check] to
+    be factory(**kwargs).  Otherwise this behaves like a dictionary.
+    """
+    def __init__(self):
+        super(_Checkers, self).__init__()
+        self._factories = {}
+        self._lock = _threading.RLock()  # factories may need other checkers
+
+    def register(self, check, factory, **kwargs):
+        self._factories[check] = _functools.partial(factory, **kwargs)
+
+    def __missing__(self, name):
+        with self._lock:
+            if dict.__contains__(self, name):  # built by another thread
+                return dict.__getitem__(self, name)
+            checker = self._factories[name]()
+            # only forget the factory once it has worked, so a check
+            # whose factory fails can still be tried again
+            del self._factories[name]
+            self[name] = checker
+            return checker
+
+    def _build_all(self):
+        for name in list(self._factories):
+            self[name]
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self._factories
+
+    def __iter__(self):
+        self._build_all()
+        return super(_Checkers, self).__iter__()
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._factories)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self):
+        self._build_all()
+        return super(_Checkers, self).keys()
+
+    def values(self):
+        self._build_all()
+        return super(_Checkers, self).values()
+
+    def items(self):
+        self._build_all()
+        return super(_Checkers, self).items()
+
+
+CHECKER = _Checkers()
+
+# How many checks to run at the same time
+JOBS = 8
+
+# Longest (in seconds) to wait for a single command to report its version
+PROBE_TIMEOUT = 15
+
+# Longest (in seconds) to spend on all the checks, not counting time
+# spent waiting for the user
+TOTAL_TIMEOUT = 120
+
+# Where to remember results, so that re-running the test after
+# installing something only probes what has changed
+CACHE_FILE = _os.path.expanduser(
+    _os.path.join('~', '.swc-installation-test-cache.json'))
+
+_probe_timeout = PROBE_TIMEOUT
+_deep = False  # import Python packages instead of reading their metadata
+_deadline = None  # when the time for all the checks runs out
+_pool = None  # thread pool for the current run of check(), if any
+_local = _threading.local()  # per-thread cancellation scope
+_executables = None  # (PATH, {name: [paths]}) built by _executable_index()
+_executables_lock = _threading.Lock()
+_cache = None  # _ResultCache for the current run of check(), if any
+_json_stream = None  # where '--json -' writes, if not sys.stdout
 
 _ROOT_PATH = _os.sep
-if _platform.system() == 'win32':
+if _sys.platform == 'win32':
     _ROOT_PATH = 'c:\\'
 
 
@@ -204,22 +319,32 @@ class DependencyError (Exception):
         self._message = message
     message = property(_get_message, _set_message)
 
-    def __init__(self, checker, message, causes=None):
+    def __init__(self, checker, message, causes=None, cacheable=True):
         super(DependencyError, self).__init__(message)
         self.checker = checker
         self.message = message
         if causes is None:
             causes = []
         self.causes = causes
+        self.cacheable = cacheable  # False for e.g. timeouts
+
+    def is_cacheable(self):
+        "Return True unless this failure may not happen next time"
+        for cause in self.causes:
+            if not cause.is_cacheable():
+                return False
+        return self.cacheable
 
     def get_url(self):
         system = _platform.system()
-        version = None
+        version = ''
         for pversion in (
             'linux_distribution',
             'mac_ver',
             'win32_ver',
             ):
+            if not hasattr(_platform, pversion):  # removed in Python 3.8
+                continue
             value = getattr(_platform, pversion)()
             if value[0]:
                 version = value[0]
@@ -247,25 +372,410 @@ class DependencyError (Exception):
         return '\n'.join(lines)
 
 
-def check(checks=None):
+class _ResultCache (object):
+    """Results of earlier runs, saved in a file in the home directory
+
+    Each entry records a checker's result along with a key describing
+    what was probed (e.g. the executable's path, size and modification
+    time), and is only used while that key still matches.
+    """
+    def __init__(self, path, fresh=False):
+        self.path = path
+        self._lock = _threading.Lock()
+        self._entries = {}
+        self._changed = False
+        if not fresh:
+            try:
+                with open(path, 'r') as f:
+                    data = _json.load(f)
+                if data.get('version') == __version__:
+                    self._entries = data['results']
+            except (IOError, OSError, ValueError, KeyError, AttributeError):
+                pass  # missing or unreadable, so start again
+
+    def get(self, name, key):
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry and entry['key'] == key:
+            return entry
+        return None
+
+    def put(self, name, key, version=None, error=None):
+        "Remember a version, or the DependencyError from a failed check"
+        entry = {'key': key, 'version': version, 'error': None}
+        if error is not None:
+            entry['error'] = error.message
+            entry['causes'] = [
+                {'text': str(cause), 'info': _error_info(cause)}
+                for cause in error.causes]
+        with self._lock:
+            self._entries[name] = entry
+            self._changed = True
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            data = {'version': __version__, 'results': self._entries}
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                _json.dump(data, f, indent=1, sort_keys=True)
+            getattr(_os, 'replace', _os.rename)(temp_path, self.path)
+        except (IOError, OSError):
+            pass  # caching is only an optimization
+
+
+class _CachedCause (object):
+    "The cause of a failure, as remembered from an earlier run"
+    def __init__(self, text, info):
+        self.text = text
+        self.info = info  # as made by _error_info()
+
+    def __str__(self):
+        return self.text
+
+    def is_cacheable(self):
+        return True
+
+
+def _stamp(path):
+    "Summarize a file so that we notice when it changes"
+    info = _os.stat(path)
+    return [path, info.st_mtime, info.st_size]
+
+
+class _Cancelled (Exception):
+    "Raised when a probe is abandoned because its result is not needed"
+    pass
+
+
+class _Scope (object):
+    """A group of speculative probes that can be cancelled together
+
+    Scopes nest: cancelling a scope also cancels the scopes created
+    while checking its probes.
+    """
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._cancelled = False
+        self._lock = _threading.Lock()
+        self._processes = []
+        self._futures = []
+        self._children = []
+        if parent is not None:
+            parent._add(parent._children, self)
+
+    def _add(self, collection, item):
+        "Add to one of our collections, returning False if cancelled"
+        with self._lock:
+            if not self._cancelled:
+                collection.append(item)
+                return True
+        return False
+
+    def cancelled(self):
+        return self._cancelled or (
+            self.parent is not None and self.parent.cancelled())
+
+    def add_future(self, future):
+        if not self._add(self._futures, future):
+            future.cancel()
+
+    def add_process(self, process):
+        if not self._add(self._processes, process):
+            _kill(process)
+
+    def remove_process(self, process):
+        with self._lock:
+            if process in self._processes:
+                self._processes.remove(process)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            futures = list(self._futures)
+            processes = list(self._processes)
+            children = list(self._children)
+        for future in futures:
+            future.cancel()
+        for process in processes:
+            _kill(process)
+        for child in children:
+            child.cancel()
+
+
+def _current_scope():
+    return getattr(_local, 'scope', None)
+
+
+def _new_process_group():
+    "Popen arguments that start a command in its own process group"
+    if _os.name != 'posix':
+        return {}
+    if _sys.version_info >= (3, 2):
+        return {'start_new_session': True}
+    return {'preexec_fn': _os.setsid}
+
+
+def _kill(process):
+    "Kill a probe, along with anything it started (e.g. a launcher script)"
+    try:
+        if _os.name == 'posix':
+            _os.killpg(process.pid, _signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:  # already finished
+        pass
+
+
+def _index_executables(search_path):
+    "Map each file name in the PATH directories to its paths, in order"
+    index = {}
+    for directory in search_path.split(_os.pathsep):
+        try:
+            names = _os.listdir(directory or _os.curdir)
+        except OSError:  # missing or unreadable directory
+            continue
+        for name in names:
+            if _os.name == 'nt':
+                name = name.lower()
+            index.setdefault(name, []).append(_os.path.join(directory, name))
+    return index
+
+
+def _executable_index():
+    "Return {name: [paths]} for the current PATH, indexing it if needed"
+    global _executables
+    search_path = _os.environ.get('PATH', _os.defpath)
+    with _executables_lock:
+        if _executables is None or _executables[0] != search_path:
+            _executables = (search_path, _index_executables(search_path))
+        return _executables[1]
+
+
+def _is_executable(path):
+    return _os.path.isfile(path) and _os.access(path, _os.X_OK)
+
+
+def _find_executable(command):
+    """Return the path to run for a command, or None if it isn't installed
+
+    The first call lists every directory in PATH, so that looking for
+    the many commands that usually aren't installed costs nothing.
+    Commands given as paths (e.g. under Program Files) are looked up
+    directly.
+    """
+    if _os.path.dirname(command):
+        if _is_executable(command):
+            return command
+        return None
+    if _os.name == 'nt':
+        command = command.lower()
+    for path in _executable_index().get(command, []):
+        if _is_executable(path):
+            return path
+    return None
+
+
+def _run(args, stdin=None, timeout=None, scope=None):
+    """Run a command, returning (status, stdout, stderr, timed_out)
+
+    The command is killed if it takes longer than 'timeout' seconds or
+    if 'scope' is cancelled.  Raises OSError if it can't be started.
+    """
+    if stdin:
+        popen_stdin = _subprocess.PIPE
+    else:
+        popen_stdin = None
+    p = _subprocess.Popen(
+        args, stdin=popen_stdin,
+        stdout=_subprocess.PIPE, stderr=_subprocess.PIPE,
+        universal_newlines=True, **_new_process_group())
+    timed_out = []
+    def kill():
+        if p.poll() is None:
+            timed_out.append(True)
+            _kill(p)
+    timer = None
+    if timeout is not None:
+        timer = _threading.Timer(timeout, kill)
+        timer.daemon = True
+        timer.start()
+    if scope is not None:
+        scope.add_process(p)
+    try:
+        stdout,stderr = p.communicate(stdin)
+        status = p.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if scope is not None:
+            scope.remove_process(p)
+    return (status, stdout, stderr, bool(timed_out))
+
+
+def _time_left():
+    "Return how long the next probe may take, in seconds"
+    timeout = _probe_timeout
+    if _deadline is not None:
+        timeout = min(timeout, _deadline - _time.time())
+    return max(timeout, 0)
+
+
+def _extend_deadline(seconds):
+    "Don't count time spent waiting for the user against the time budget"
+    global _deadline
+    if _deadline is not None:
+        _deadline += seconds
+
+
+def _speculate(scope, dependency):
+    "Check a dependency whose result may turn out not to be needed"
+    _local.scope = scope
+    try:
+        if not scope.cancelled():
+            dependency.check()
+    except (DependencyError, _Cancelled):
+        pass  # the caller reports errors if it does need the result
+    finally:
+        _local.scope = None
+
+
+class _DaemonThreadPool (object):
+    """A thread pool whose threads don't keep the script running
+
+    concurrent.futures joins its worker threads when the interpreter
+    exits, so a check stuck in Python code (e.g. importing a broken
+    package) would stop the script from exiting even after check() has
+    given up on it.  These workers are daemon threads, so they are
+    simply abandoned.
+    """
+    def __init__(self, max_workers):
+        self._queue = _queue.Queue()
+        self._threads = []
+        for i in range(max_workers):
+            thread = _threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        future = _futures.Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:  # shut down
+                return
+            future,fn,args,kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True):
+        for thread in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def check(checks=None, jobs=JOBS, timeout=PROBE_TIMEOUT,
+          total_timeout=TOTAL_TIMEOUT, deep=False, cache_file=CACHE_FILE,
+          fresh=False, json_file=None):
+    """Run the checks, printing a line for each as it finishes
+
+    Non-interactive checks run concurrently in a pool of 'jobs'
+    threads, but results are printed in the order the checks were
+    given.  Checks that may prompt the user run in this thread when
+    their turn comes, so prompts do not get mixed up with other output.
+
+    Each command gets 'timeout' seconds to report its version, and all
+    the checks together get 'total_timeout' seconds.  Commands that
+    take longer are killed and their checks fail.
+
+    Python packages are found and their versions read from their
+    installed metadata, without running any of their code.  With
+    'deep', they are imported instead, which is slower but also catches
+    packages that are installed but broken.
+
+    Results are remembered in 'cache_file' (if not None) and reused
+    while whatever was probed stays the same.  With 'fresh', earlier
+    results are ignored.
+
+    If 'json_file' is given, a machine-readable report is also written
+    there (see json_report()); '-' means standard output.
+    """
+    global _pool, _probe_timeout, _deadline, _deep, _cache
     successes = []
     failures = []
+    results = []
     if not checks:
         checks = CHECKS
+    checkers = []
     for check in checks:
         try:
-            checker = CHECKER[check]
+            checkers.append(CHECKER[check])
         except KeyError as e:
             raise InvalidCheck(check)# from e
-        _sys.stdout.write('check {0}...\t'.format(checker.full_name()))
-        try:
-            version = checker.check()
-        except DependencyError as e:
-            failures.append(e)
-            _sys.stdout.write('fail\n')
-        else:
-            _sys.stdout.write('pass\n')
-            successes.append((checker, version))
+    _probe_timeout = timeout
+    _deep = deep
+    if cache_file:
+        _cache = _ResultCache(cache_file, fresh=fresh)
+    _deadline = _time.time() + total_timeout
+    futures = {}
+    if _futures is not None and jobs > 1:
+        _pool = _DaemonThreadPool(max_workers=jobs)
+        for checker in checkers:
+            if checker not in futures and not checker.interactive():
+                futures[checker] = _pool.submit(checker.check)
+    hung = False
+    try:
+        for checker in checkers:
+            _sys.stdout.write('check {0}...\t'.format(checker.full_name()))
+            _sys.stdout.flush()
+            try:
+                if checker in futures:
+                    # probes are killed when they run out of time, so
+                    # this only waits longer for a check that is stuck
+                    # in Python code (e.g. importing a package)
+                    wait = _deadline - _time.time() + _probe_timeout
+                    try:
+                        version = futures[checker].result(
+                            timeout=max(wait, 0))
+                    except _futures.TimeoutError:
+                        hung = True
+                        raise DependencyError(
+                            checker=checker,
+                            message='timed out checking {0}'.format(
+                                checker.full_name()))
+                else:
+                    version = checker.check()
+            except DependencyError as e:
+                failures.append(e)
+                results.append((checker, None, e))
+                _sys.stdout.write('fail\n')
+            else:
+                _sys.stdout.write('pass\n')
+                successes.append((checker, version))
+                results.append((checker, version, None))
+    finally:
+        if _pool is not None:
+            _pool.shutdown(wait=not hung)
+            _pool = None
+        if _cache is not None:
+            _cache.save()
+            _cache = None
+    if json_file:
+        write_json_report(json_file, results)
     if successes:
         print('\nSuccesses:\n')
         for checker,version in successes:
@@ -284,6 +794,78 @@ def check(checks=None):
     return True
 
 
+def _error_info(error):
+    "Describe a failure and its causes for json_report()"
+    if isinstance(error, _CachedCause):
+        return error.info
+    return {
+        'check': error.checker.name,
+        'message': error.message,
+        'causes': [_error_info(cause) for cause in error.causes],
+        }
+
+
+def _platform_info():
+    "Describe this computer for json_report(), without personal details"
+    info = {
+        'system': _platform.system(),
+        'release': _platform.release(),
+        'machine': _platform.machine(),
+        'os_version': None,
+        'python_version': _platform.python_version(),
+        'python_executable': _sys.executable,
+        }
+    if info['system'] == 'Darwin':
+        info['os_version'] = _platform.mac_ver()[0]
+    elif info['system'] == 'Windows':
+        info['os_version'] = _platform.win32_ver()[1]
+    elif hasattr(_platform, 'freedesktop_os_release'):  # Python 3.10+
+        try:
+            release = _platform.freedesktop_os_release()
+            info['os_version'] = release.get(
+                'PRETTY_NAME', release.get('NAME'))
+        except OSError:
+            pass
+    return info
+
+
+def json_report(results):
+    """Build a report of results [(checker, version, error), ...]
+
+    The report is a dictionary ready for JSON, so that instructors can
+    collect and summarize reports from a whole workshop.
+    """
+    checks = []
+    for checker,version,error in results:
+        entry = {
+            'check': checker.name,
+            'name': checker.full_name(),
+            'passed': error is None,
+            'version': version,
+            'error': None,
+            }
+        if error is not None:
+            entry['error'] = _error_info(error)
+        checks.append(entry)
+    return {
+        'format': 1,
+        'script_version': __version__,
+        'created': _time.strftime('%Y-%m-%dT%H:%M:%SZ', _time.gmtime()),
+        'platform': _platform_info(),
+        'checks': checks,
+        }
+
+
+def write_json_report(path, results):
+    "Write json_report(results) to a file, or to stdout for '-'"
+    text = _json.dumps(json_report(results), indent=2, sort_keys=True)
+    if path == '-':
+        (_json_stream or _sys.stdout).write(text + '\n')
+    else:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+
+
 class Dependency (object):
     def __init__(self, name, long_name=None, minimum_version=None,
                  version_delimiter='.', and_dependencies=None,
@@ -299,6 +881,9 @@ class Dependency (object):
             or_dependencies = []
         self.or_dependencies = or_dependencies
         self._check_error = None
+        self._checked = False
+        self._version = None
+        self._lock = _threading.RLock()
 
     def __str__(self):
         return '<{0} {1}>'.format(type(self).__name__, self.name)
@@ -310,14 +895,73 @@ class Dependency (object):
             return '{0} ({1})'.format(self.long_name, self.name)
 
     def check(self):
-        if self._check_error:
-            raise self._check_error
-        try:
-            self._check_dependencies()
+        # The lock makes threads that need the same dependency wait for
+        # a single probe instead of all running it.  Dependencies form
+        # a tree, so holding it while checking dependencies is safe.
+        with self._lock:
+            if self._check_error:
+                raise self._check_error
+            if self._checked:
+                return self._version
+            try:
+                self._check_dependencies()
+                version = self._check_cached()
+            except DependencyError as e:
+                self._check_error = e  # cache for future calls
+                raise
+            self._version = version
+            self._checked = True
+            return version
+
+    def _check_cached(self):
+        "Like _check(), but reuse the result of an earlier run if we can"
+        key = None
+        if _cache is not None:
+            key = self._cache_key()
+        if key is None:
             return self._check()
+        # as it will be read back from the cache file (tuples become lists)
+        key = _json.loads(_json.dumps(
+            [type(self).__name__, self.minimum_version, key]))
+        entry = _cache.get(self.name, key)
+        if entry is not None:
+            if entry['error'] is not None:
+                raise DependencyError(
+                    checker=self, message=entry['error'],
+                    causes=[_CachedCause(cause['text'], cause['info'])
+                            for cause in entry.get('causes', [])])
+            return entry['version']
+        try:
+            version = self._check()
         except DependencyError as e:
-            self._check_error = e  # cache for future calls
+            if e.is_cacheable():
+                _cache.put(self.name, key, error=e)
             raise
+        _cache.put(self.name, key, version=version)
+        return version
+
+    def _cache_key(self):
+        """Return a JSON-friendly description of what _check() probes
+
+        The cached result of _check() is reused while this stays the
+        same.  None means the result should not be cached.
+        """
+        return None
+
+    def dependencies(self):
+        "Iterate through the checkers this checker depends on"
+        for dependency in (
+                list(self.and_dependencies) + list(self.or_dependencies)):
+            if not hasattr(dependency, 'check'):
+                dependency = CHECKER[dependency]
+            yield dependency
+
+    def interactive(self):
+        "Return True if checking this dependency may prompt the user"
+        for dependency in self.dependencies():
+            if dependency.interactive():
+                return True
+        return False
 
     def _check_dependencies(self):
         for dependency in self.and_dependencies:
@@ -334,19 +978,24 @@ class Dependency (object):
                     causes=[e])
         self.or_pass = None
         or_errors = []
-        for dependency in self.or_dependencies:
-            if not hasattr(dependency, 'check'):
-                dependency = CHECKER[dependency]
-            try:
-                version = dependency.check()
-            except DependencyError as e:
-                or_errors.append(e)
-            else:
-                self.or_pass = {
-                    'dependency': dependency,
-                    'version': version,
-                    }
-                break  # no need to test other dependencies
+        scope = self._start_or_dependencies()
+        try:
+            for dependency in self.or_dependencies:
+                if not hasattr(dependency, 'check'):
+                    dependency = CHECKER[dependency]
+                try:
+                    version = dependency.check()
+                except DependencyError as e:
+                    or_errors.append(e)
+                else:
+                    self.or_pass = {
+                        'dependency': dependency,
+                        'version': version,
+                        }
+                    break  # no need to test other dependencies
+        finally:
+            if scope is not None:
+                scope.cancel()  # stop probing the alternatives
         if self.or_dependencies and not self.or_pass:
             raise DependencyError(
                 checker=self,
@@ -355,6 +1004,28 @@ class Dependency (object):
                     ).format(self.full_name()),
                     causes=or_errors)
 
+    def _start_or_dependencies(self):
+        """Start probing the later alternatives in the background
+
+        The alternatives are still considered in order, but while the
+        first is being checked the rest are already running.  Returns
+        a scope that cancels the probes that are no longer needed, or
+        None if there is nothing to start.
+        """
+        if _pool is None or len(self.or_dependencies) < 2:
+            return None
+        scope = _Scope(parent=_current_scope())
+        for dependency in self.or_dependencies[1:]:
+            if not hasattr(dependency, 'check'):
+                dependency = CHECKER[dependency]
+            if not dependency.interactive():
+                try:
+                    scope.add_future(
+                        _pool.submit(_speculate, scope, dependency))
+                except RuntimeError:  # pool shut down
+                    break
+        return scope
+
     def _check(self):
         version = self._get_version()
         parsed_version = None
@@ -406,7 +1077,10 @@ class VirtualDependency (Dependency):
 
 
 class CommandDependency (Dependency):
-    exe_extension = _distutils_ccompiler.new_compiler().exe_extension
+    if _os.name == 'nt':
+        exe_extension = '.exe'
+    else:
+        exe_extension = ''
 
     def __init__(self, command, paths=None, version_options=('--version',),
                  stdin=None, version_regexp=None, version_stream='stdout',
@@ -430,28 +1104,39 @@ class CommandDependency (Dependency):
             command = self.command + (self.exe_extension or '')
         if not stdin:
             stdin = self.stdin
-        if stdin:
-            popen_stdin = _subprocess.PIPE
-        else:
-            popen_stdin = None
+        command_line = '{0} {1}'.format(
+            command,
+            ' '.join(_quote(arg) for arg in self.version_options))
+        timeout = _time_left()
+        if timeout <= 0:
+            raise DependencyError(
+                checker=self,
+                message='ran out of time before running: {0}'.format(
+                    command_line),
+                cacheable=False)
+        scope = _current_scope()
+        if scope is not None and scope.cancelled():
+            raise _Cancelled(self)
         try:
-            p = _subprocess.Popen(
-                [command] + list(self.version_options), stdin=popen_stdin,
-                stdout=_subprocess.PIPE, stderr=_subprocess.PIPE,
-                universal_newlines=True)
+            status,stdout,stderr,timed_out = _run(
+                [command] + list(self.version_options), stdin=stdin,
+                timeout=timeout, scope=scope)
         except OSError as e:
             raise DependencyError(
                 checker=self,
                 message="could not find '{0}' executable".format(command),
                 )# from e
-        stdout,stderr = p.communicate(stdin)
-        status = p.wait()
+        if timed_out:
+            raise DependencyError(
+                checker=self,
+                message='timed out after {0:g} seconds: {1}'.format(
+                    timeout, command_line),
+                cacheable=False)
+        if scope is not None and scope.cancelled():
+            raise _Cancelled(self)
         if status not in expect:
             lines = [
-                "failed to execute: {0} {1}".format(
-                    command,
-                    ' '.join(_shlex.quote(arg)
-                             for arg in self.version_options)),
+                "failed to execute: {0}".format(command_line),
                 'status: {0}'.format(status),
                 ]
             for name,string in [('stdout', stdout), ('stderr', stderr)]:
@@ -468,14 +1153,40 @@ class CommandDependency (Dependency):
                 return string
         raise NotImplementedError(self.version_stream)
 
-    def _get_version_stream(self, **kwargs):
+    def _get_paths(self):
+        "Return the places the command might be"
         paths = [self.command + (self.exe_extension or '')]
         if self.exe_extension:
             paths.append(self.command)  # also look at the extension-less path
         if self.paths:
             paths.extend(self.paths)
+        return paths
+
+    def _find_executables(self):
+        "Return the installed executables that might be the command"
+        executables = []
+        for path in self._get_paths():
+            executable = _find_executable(path)
+            if executable and executable not in executables:
+                executables.append(executable)
+        return executables
+
+    def _cache_key(self):
+        executables = self._find_executables()
+        if not executables:
+            return None  # failing is quick anyway
+        return [_stamp(path) for path in executables]
+
+    def _get_version_stream(self, **kwargs):
+        paths = self._get_paths()
+        executables = self._find_executables()
+        if not executables:
+            raise DependencyError(
+                checker=self,
+                message="could not find '{0}' executable".format(
+                    "' or '".join(paths)))
         or_errors = []
-        for path in paths:
+        for path in executables:
             try:
                 return self._get_command_version_stream(command=path, **kwargs)
             except DependencyError as e:
@@ -511,6 +1222,9 @@ class VersionPlistCommandDependency (CommandDependency):
     def _get_command_version_stream(self, *args, **kwargs):
         raise NotImplementedError()
 
+    def _cache_key(self):
+        return None  # reading the file is as quick as checking it
+
     def _get_version_stream(self, *args, **kwargs):
         raise NotImplementedError()
 
@@ -568,11 +1282,18 @@ class UserTaskDependency (Dependency):
         super(UserTaskDependency, self).__init__(**kwargs)
         self.prompt = prompt
 
+    def interactive(self):
+        return True
+
     def _check(self):
-        if _sys.version_info >= (3, ):
-            result = input(self.prompt)
-        else:  # Python 2.x
-            result = raw_input(self.prompt)
+        start = _time.time()
+        try:
+            if _sys.version_info >= (3, ):
+                result = input(self.prompt)
+            else:  # Python 2.x
+                result = raw_input(self.prompt)
+        finally:
+            _extend_deadline(_time.time() - start)
         return self._check_result(result)
 
     def _check_result(self, result):
@@ -675,7 +1396,7 @@ class PythonDependency (Dependency):
 
 
 class PythonPackageDependency (Dependency):
-    def __init__(self, package, **kwargs):
+    def __init__(self, package, distribution=None, **kwargs):
         if 'name' not in kwargs:
             kwargs['name'] = package
         if 'and_dependencies' not in kwargs:
@@ -684,8 +1405,70 @@ class PythonPackageDependency (Dependency):
             kwargs['and_dependencies'].append('python')
         super(PythonPackageDependency, self).__init__(**kwargs)
         self.package = package
+        if not distribution:  # the name used by pip, if different
+            distribution = package.split('.')[0]
+        self.distribution = distribution
+
+    def _cache_key(self):
+        if _importlib_metadata is None:
+            return None
+        try:
+            spec = self._find_package(self.package)
+        except DependencyError:
+            return None  # failing is quick anyway
+        origin = None
+        if spec.origin and _os.path.isfile(spec.origin):
+            origin = _stamp(spec.origin)
+        try:
+            version = _importlib_metadata.version(self.distribution)
+        except _importlib_metadata.PackageNotFoundError:
+            version = None
+        return [_sys.executable, _deep, origin, version]
 
     def _get_version(self):
+        if not _deep:
+            version = self._get_version_from_metadata()
+            if version is not None:
+                return version
+        return self._get_version_from_import()
+
+    def _get_version_from_metadata(self):
+        """Find the package and read its version without importing it
+
+        Returns None if that isn't possible (e.g. on Python older than
+        3.8, or for a package installed without metadata), in which
+        case the package is imported after all.
+        """
+        if _importlib_metadata is None:
+            return None
+        self._find_package(self.package)
+        try:
+            return _importlib_metadata.version(self.distribution)
+        except _importlib_metadata.PackageNotFoundError:
+            return None
+
+    def _find_package(self, package):
+        """Locate a module without running it (or its parent packages)
+        """
+        parts = package.split('.')
+        try:
+            spec = _importlib_util.find_spec(parts[0])
+        except (ImportError, ValueError):
+            spec = None
+        for part in parts[1:]:
+            if spec is None or not spec.submodule_search_locations:
+                spec = None
+                break
+            spec = _importlib_machinery.PathFinder.find_spec(
+                part, list(spec.submodule_search_locations))
+        if spec is None:
+            raise DependencyError(
+                checker=self,
+                message="could not find the '{0}' package for {1}".format(
+                    package, self.full_name()))
+        return spec
+
+    def _get_version_from_import(self):
         package = self._get_package(self.package)
         return self._get_version_from_package(package)
 
@@ -706,9 +1489,17 @@ class PythonPackageDependency (Dependency):
             version = None
         return version
 
+    def _get_version_in_environment(self, package, report):
+        """Return the version found by probe_interpreter()
+
+        'package' is the child's report for this package and 'report'
+        its report for the whole environment.
+        """
+        return package['version']
+
 
 class MercurialPythonPackage (PythonPackageDependency):
-    def _get_version(self):
+    def _get_version_from_import(self):
         try:  # mercurial >= 1.2
             package = _importlib.import_module('mercurial.util')
         except ImportError as e:  # mercurial <= 1.1.2
@@ -723,17 +1514,31 @@ class TornadoPythonPackage (PythonPackageDependency):
         return package.version
 
     def _get_parsed_version(self):
+        if not _deep:
+            return None  # parse the version string from the metadata
         package = self._get_package(self.package)
         return package.version_info
 
 
 class SQLitePythonPackage (PythonPackageDependency):
+    def _get_version_from_metadata(self):
+        if _importlib_metadata is None:
+            return None
+        # sqlite3 is in the standard library, but the extension module
+        # behind it is missing if Python was built without SQLite
+        self._find_package(self.package)
+        self._find_package('_sqlite3')
+        return _sys.version
+
     def _get_version_from_package(self, package):
         return _sys.version
 
     def _get_parsed_version(self):
         return _sys.version_info
 
+    def _get_version_in_environment(self, package, report):
+        return report['version']
+
 
 def _program_files_paths(*args):
     "Utility for generating MS Windows search paths"
@@ -745,7 +1550,7 @@ def _program_files_paths(*args):
     return paths
 
 
-CHECKER['python'] = PythonDependency()
+CHECKER.register('python', PythonDependency)
 
 
 for command,long_name,minimum_version,paths in [
@@ -782,22 +1587,23 @@ for command,long_name,minimum_version,paths in [
         ]:
     if not long_name:
         long_name = command
-    CHECKER[command] = CommandDependency(
-        command=command, paths=paths, long_name=long_name,
+    CHECKER.register(
+        command, CommandDependency, command=command, paths=paths, long_name=long_name,
         minimum_version=minimum_version)
 del command, long_name, minimum_version, paths  # cleanup namespace
 
 
-CHECKER['make'] = MakeDependency(command='make', minimum_version=None)
+CHECKER.register(
+    'make', MakeDependency, command='make', minimum_version=None)
 
 
-CHECKER['easy_install'] = EasyInstallDependency(
-    command='easy_install', long_name='Setuptools easy_install',
+CHECKER.register(
+    'easy_install', EasyInstallDependency, command='easy_install', long_name='Setuptools easy_install',
     minimum_version=None)
 
 
-CHECKER['py.test'] = CommandDependency(
-    command='py.test', version_stream='stderr',
+CHECKER.register(
+    'py.test', CommandDependency, command='py.test', version_stream='stderr',
     minimum_version=None)
 
 
@@ -823,16 +1629,78 @@ for paths,name,long_name in [
         ]:
     if not long_name:
         long_name = name
-    CHECKER[name] = VersionPlistCommandDependency(
+    CHECKER.register(
+        name, VersionPlistCommandDependency,
         command=None, paths=paths, name=name, long_name=long_name)
 del paths, name, long_name  # cleanup namespace
 
 
+def _ipython_browser():
+    "Build the check for a browser that can run the Jupyter notebook"
+    return VirtualDependency(
+        name='virtual-browser-ipython',
+        long_name='Jupyter-compatible web browser',
+        or_dependencies=[
+            CommandDependency(
+                command=CHECKER['firefox'].command,
+                paths=CHECKER['firefox'].paths,
+                name='{0}-for-ipython'.format(
+                    CHECKER['firefox'].name),
+                long_name='{0} for IPython'.format(
+                    CHECKER['firefox'].long_name),
+                minimum_version=(6, 0)),
+            CommandDependency(
+                command=CHECKER['google-chrome'].command,
+                paths=CHECKER['google-chrome'].paths,
+                name='{0}-for-ipython'.format(
+                    CHECKER['google-chrome'].name),
+                long_name='{0} for IPython'.format(
+                    CHECKER['google-chrome'].long_name),
+                minimum_version=(13, 0)),
+            CommandDependency(
+                command=CHECKER['chromium'].command,
+                paths=CHECKER['chromium'].paths,
+                name='{0}-for-ipython'.format(
+                    CHECKER['chromium'].name),
+                long_name='{0} for IPython'.format(
+                    CHECKER['chromium'].long_name),
+                minimum_version=(13, 0)),
+            VersionPlistCommandDependency(
+                command=CHECKER['safari'].command,
+                paths=CHECKER['safari'].paths,
+                key=CHECKER['safari'].key,
+                name='{0}-for-ipython'.format(
+                    CHECKER['safari'].name),
+                long_name='{0} for IPython'.format(
+                    CHECKER['safari'].long_name),
+                minimum_version=(5, 0)),
+        ])
+
+
+CHECKER.register('virtual-browser-ipython', _ipython_browser)
+
+
+def _same_minimum_version(checker_class, version_of, **kwargs):
+    """Build a checker needing the same minimum version as another check
+
+    Looking the other check up when this one is built (rather than when
+    it is registered) keeps CHECKER from building it at import time.
+    """
+    return checker_class(
+        minimum_version=CHECKER[version_of].minimum_version, **kwargs)
+
+
+# Distributions (as named by pip) providing packages with other names
+_PACKAGE_DISTRIBUTIONS = {
+    'jinja2': 'Jinja2',
+    'zmq': 'pyzmq',
+    }
+
+
 for package,name,long_name,minimum_version,and_dependencies in [
-        ('nose', None, 'Nose Python package',
-         CHECKER['nosetests'].minimum_version, None),
-        ('pytest', None, 'pytest Python package',
-         CHECKER['py.test'].minimum_version, None),
+        # a minimum version given as a string is that of the named check
+        ('nose', None, 'Nose Python package', 'nosetests', None),
+        ('pytest', None, 'pytest Python package', 'py.test', None),
         ('jinja2', 'jinja', 'Jinja', (2, 6), None),
         ('zmq', 'pyzmq', 'PyZMQ', (2, 1, 4), None),
         ('jupyter', None, 'Jupyter',
@@ -842,44 +1710,7 @@ for package,name,long_name,minimum_version,and_dependencies in [
              'jinja',
              'tornado',
              'pyzmq',
-             VirtualDependency(
-                 name='virtual-browser-ipython',
-                 long_name='Jupyter-compatible web browser',
-                 or_dependencies=[
-                     CommandDependency(
-                         command=CHECKER['firefox'].command,
-                         paths=CHECKER['firefox'].paths,
-                         name='{0}-for-ipython'.format(
-                             CHECKER['firefox'].name),
-                         long_name='{0} for IPython'.format(
-                             CHECKER['firefox'].long_name),
-                         minimum_version=(6, 0)),
-                     CommandDependency(
-                         command=CHECKER['google-chrome'].command,
-                         paths=CHECKER['google-chrome'].paths,
-                         name='{0}-for-ipython'.format(
-                             CHECKER['google-chrome'].name),
-                         long_name='{0} for IPython'.format(
-                             CHECKER['google-chrome'].long_name),
-                         minimum_version=(13, 0)),
-                     CommandDependency(
-                         command=CHECKER['chromium'].command,
-                         paths=CHECKER['chromium'].paths,
-                         name='{0}-for-ipython'.format(
-                             CHECKER['chromium'].name),
-                         long_name='{0} for IPython'.format(
-                             CHECKER['chromium'].long_name),
-                         minimum_version=(13, 0)),
-                     VersionPlistCommandDependency(
-                         command=CHECKER['safari'].command,
-                         paths=CHECKER['safari'].paths,
-                         key=CHECKER['safari'].key,
-                         name='{0}-for-ipython'.format(
-                             CHECKER['safari'].name),
-                         long_name='{0} for IPython'.format(
-                             CHECKER['safari'].long_name),
-                         minimum_version=(5, 0)),
-                 ]),
+             'virtual-browser-ipython',
          ]),
         ('argparse', None, 'Argparse', None, None),
         ('numpy', None, 'NumPy', None, None),
@@ -899,31 +1730,38 @@ for package,name,long_name,minimum_version,and_dependencies in [
     kwargs = {}
     if and_dependencies:
         kwargs['and_dependencies'] = and_dependencies
-    CHECKER[name] = PythonPackageDependency(
-        package=package, name=name, long_name=long_name,
-        minimum_version=minimum_version, **kwargs)
+    if isinstance(minimum_version, str):
+        factory = _same_minimum_version
+        kwargs['checker_class'] = PythonPackageDependency
+        kwargs['version_of'] = minimum_version
+    else:
+        factory = PythonPackageDependency
+        kwargs['minimum_version'] = minimum_version
+    CHECKER.register(
+        name, factory, package=package, distribution=_PACKAGE_DISTRIBUTIONS.get(package),
+        name=name, long_name=long_name, **kwargs)
 # cleanup namespace
-del package, name, long_name, minimum_version, and_dependencies, kwargs
+del package, name, long_name, minimum_version, and_dependencies, kwargs, factory
 
 
-CHECKER['mercurial'] = MercurialPythonPackage(
-    package='mercurial.util', name='mercurial',
-    long_name='Mercurial Python package',
-    minimum_version=CHECKER['hg'].minimum_version)
+CHECKER.register(
+    'mercurial', _same_minimum_version, checker_class=MercurialPythonPackage,
+    version_of='hg', package='mercurial.util', name='mercurial',
+    long_name='Mercurial Python package')
 
 
-CHECKER['tornado'] = TornadoPythonPackage(
-    package='tornado', name='tornado', long_name='Tornado', minimum_version=(2, 0))
+CHECKER.register(
+    'tornado', TornadoPythonPackage, package='tornado', name='tornado', long_name='Tornado', minimum_version=(2, 0))
 
 
-CHECKER['sqlite3-python'] = SQLitePythonPackage(
-    package='sqlite3', name='sqlite3-python',
-    long_name='SQLite Python package',
-    minimum_version=CHECKER['sqlite3'].minimum_version)
+CHECKER.register(
+    'sqlite3-python', _same_minimum_version, checker_class=SQLitePythonPackage,
+    version_of='sqlite3', package='sqlite3', name='sqlite3-python',
+    long_name='SQLite Python package')
 
 
-CHECKER['other-editor'] = EditorTaskDependency(
-    name='other-editor', long_name='')
+CHECKER.register(
+    'other-editor', EditorTaskDependency, name='other-editor', long_name='')
 
 
 for name,long_name,dependencies in [
@@ -962,11 +1800,254 @@ for name,long_name,dependencies in [
             'easy_install',
             )),
         ]:
-    CHECKER[name] = VirtualDependency(
+    CHECKER.register(
+        name, VirtualDependency,
         name=name, long_name=long_name, or_dependencies=dependencies)
 del name, long_name, dependencies  # cleanup namespace
 
 
+# Names of Python interpreters to look for in PATH
+_PYTHON_NAME_REGEXP = _re.compile(r'^python(\d(\.\d+)?)?(\.exe)?$')
+
+# Where conda installs usually live
+_CONDA_ROOTS = [
+    _os.path.join('~', name) for name in (
+        'anaconda3', 'miniconda3', 'miniforge3', 'mambaforge',
+        'anaconda', 'miniconda', 'Anaconda3', 'Miniconda3')
+    ] + ['/opt/conda']
+
+# Where virtual environments usually live (each one a directory)
+_VENV_PARENTS = [
+    _os.path.join('~', '.virtualenvs'),
+    _os.path.join('~', '.pyenv', 'versions'),
+    ]
+_VENV_DIRECTORIES = ['venv', '.venv', 'env']
+
+# Run by each interpreter found (with the packages to look for as
+# arguments) to report everything we need in one go.  This has to work
+# on every Python the learner might have, so it sticks to Python 2.6.
+_CHILD_PROBE = r"""
+import json, sys
+result = {
+    'executable': sys.executable,
+    'prefix': sys.prefix,
+    'version': '.'.join(str(part) for part in sys.version_info[:3]),
+    'packages': {},
+    }
+deep = sys.argv[1] == '--deep'
+try:
+    import importlib.machinery as machinery
+    import importlib.metadata as metadata
+    import importlib.util as util
+except ImportError:
+    deep = True
+
+def find(package):
+    # like find_spec(package), but without importing the parent packages
+    parts = package.split('.')
+    spec = util.find_spec(parts[0])
+    for part in parts[1:]:
+        if spec is None or not spec.submodule_search_locations:
+            return None
+        spec = machinery.PathFinder.find_spec(
+            part, list(spec.submodule_search_locations))
+    return spec
+
+for arg in sys.argv[2:]:
+    package, distribution = arg.split('=', 1)
+    found, version = False, None
+    if deep:
+        try:
+            __import__(package)
+        except Exception:
+            pass
+        else:
+            found = True
+            version = getattr(sys.modules[package], '__version__', None)
+    else:
+        try:
+            found = find(package) is not None
+        except (ImportError, ValueError):
+            pass
+        if found:
+            try:
+                version = metadata.version(distribution)
+            except metadata.PackageNotFoundError:  # e.g. in the stdlib
+                try:
+                    __import__(package)
+                    version = getattr(
+                        sys.modules[package], '__version__', None)
+                except Exception:
+                    pass
+    result['packages'][package] = {'found': found, 'version': version}
+print(json.dumps(result))
+"""
+
+
+def _python_executable(environment):
+    "Return the path of the interpreter in an environment directory"
+    if _os.name == 'nt':
+        return _os.path.join(environment, 'python.exe')
+    return _os.path.join(environment, 'bin', 'python')
+
+
+def find_python_interpreters():
+    """Return the Python interpreters installed on this computer
+
+    Looks in PATH, in the active conda environment or virtualenv, and
+    in the places conda, virtualenvwrapper, pyenv and venv usually put
+    environments.  The interpreter running this script comes first.
+    """
+    candidates = [_sys.executable]
+    for name,paths in sorted(_executable_index().items()):
+        if _PYTHON_NAME_REGEXP.match(name):
+            candidates.extend(paths)
+    environments = []
+    for variable in ('CONDA_PREFIX', 'VIRTUAL_ENV'):
+        if _os.environ.get(variable):
+            environments.append(_os.environ[variable])
+    for root in _CONDA_ROOTS:
+        root = _os.path.expanduser(root)
+        environments.append(root)
+        environments.extend(_subdirectories(_os.path.join(root, 'envs')))
+    for parent in _VENV_PARENTS:
+        environments.extend(_subdirectories(_os.path.expanduser(parent)))
+    environments.extend(_VENV_DIRECTORIES)
+    candidates.extend(_python_executable(e) for e in environments)
+
+    interpreters = []
+    seen = set()
+    for path in candidates:
+        path = _os.path.abspath(path)
+        if _os.path.basename(_os.path.dirname(path)) == 'shims':
+            continue  # pyenv's stand-ins for what is in .pyenv/versions
+        if _os.path.normcase(path) in seen or not _is_executable(path):
+            continue
+        seen.add(_os.path.normcase(path))
+        interpreters.append(path)
+    return interpreters
+
+
+def _subdirectories(path):
+    try:
+        names = sorted(_os.listdir(path))
+    except OSError:
+        return []
+    return [_os.path.join(path, name) for name in names
+            if _os.path.isdir(_os.path.join(path, name))]
+
+
+def probe_interpreter(interpreter, checkers, deep=False, timeout=PROBE_TIMEOUT):
+    """Look for the packages of 'checkers' using another interpreter
+
+    Returns the child's report: a dictionary with the interpreter's
+    'executable', 'prefix', 'version' and {package: {'found', 'version'}}
+    'packages', or with an 'error' message if it could not be probed.
+    """
+    args = [interpreter, '-c', _CHILD_PROBE]
+    args.append('--deep' if deep else '--metadata')
+    for checker in checkers:
+        if isinstance(checker, PythonPackageDependency):
+            args.append('{0}={1}'.format(checker.package, checker.distribution))
+    try:
+        status,stdout,stderr,timed_out = _run(args, timeout=timeout)
+    except OSError as e:
+        return {'executable': interpreter, 'error': str(e)}
+    if timed_out:
+        return {'executable': interpreter,
+                'error': 'timed out after {0:g} seconds'.format(timeout)}
+    try:
+        report = _json.loads(stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {'executable': interpreter,
+                'error': 'status {0}: {1}'.format(status, stderr.strip())}
+    report['executable'] = interpreter  # the path we found, not a symlink
+    return report
+
+
+def probe_environments(interpreters, checkers, jobs=JOBS, deep=False,
+                       timeout=PROBE_TIMEOUT):
+    """Probe several interpreters at the same time
+
+    Returns the reports from probe_interpreter(), in the same order,
+    leaving out interpreters that turned out to be the same
+    environment as one earlier in the list (e.g. python3 and python3.8
+    in the same directory, or a pyenv shim).
+    """
+    probe = _functools.partial(
+        probe_interpreter, checkers=checkers, deep=deep, timeout=timeout)
+    if _futures is not None and jobs > 1 and len(interpreters) > 1:
+        pool = _futures.ThreadPoolExecutor(max_workers=jobs)
+        try:
+            reports = list(pool.map(probe, interpreters))
+        finally:
+            pool.shutdown(wait=True)
+    else:
+        reports = [probe(interpreter) for interpreter in interpreters]
+    result = []
+    seen = set()
+    for report in reports:
+        if 'error' not in report:
+            key = (report['prefix'], report['version'])
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(report)
+    return result
+
+
+def _environment_cell(checker, report):
+    "Summarize one check in one environment for print_environment_matrix()"
+    if isinstance(checker, PythonPackageDependency):
+        package = report['packages'].get(checker.package)
+        if not package or not package['found']:
+            return '-'
+        version = checker._get_version_in_environment(
+            package, report) or 'unknown'
+    else:
+        version = report['version']
+    if checker.minimum_version and version != 'unknown':
+        try:
+            parsed_version = checker._parse_version(version)
+        except DependencyError:
+            parsed_version = None
+        if parsed_version is not None and (
+                parsed_version < tuple(checker.minimum_version)):
+            version += ' (old)'
+    return version
+
+
+def print_environment_matrix(reports, checkers):
+    """Print which version of each package each environment has
+
+    Missing packages are shown as '-' and versions below the minimum
+    are marked '(old)'.  Interpreters that could not be probed are
+    listed separately.
+    """
+    checkers = [c for c in checkers
+                if isinstance(c, (PythonDependency, PythonPackageDependency))]
+    failed = [report for report in reports if 'error' in report]
+    reports = [report for report in reports if 'error' not in report]
+    print('\nPython environments:\n')
+    for i,report in enumerate(reports):
+        print('  [{0}] {1} (Python {2})'.format(
+            i + 1, report['executable'], report['version']))
+    print()
+    rows = [['check'] + ['[{0}]'.format(i + 1) for i in range(len(reports))]]
+    for checker in checkers:
+        rows.append([checker.full_name()] + [
+            _environment_cell(checker, report) for report in reports])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(
+            cell.ljust(width) for cell,width in zip(row, widths)).rstrip())
+    if failed:
+        print('\nCould not check these Python installations:\n')
+        for report in failed:
+            print('  {0}: {1}'.format(
+                report['executable'], report['error'].splitlines()[0]))
+
+
 def _print_info(key, value, indent=19):
     print('{0}{1}: {2}'.format(key, ' '*(indent-len(key)), value))
 
@@ -987,6 +2068,8 @@ def print_system_info():
             'mac_ver',
             'win32_ver',
             ):
+        if not hasattr(_platform, pversion):  # removed in Python 3.8
+            continue
         value = getattr(_platform, pversion)()
         if value[0]:
             _print_info(pversion, value)
@@ -1023,9 +2106,49 @@ if __name__ == '__main__':
         '-v', '--verbose', action='store_true',
         help=('print additional information to help troubleshoot '
               'installation issues'))
+    parser.add_option(
+        '-j', '--jobs', type='int', default=JOBS,
+        help='number of checks to run at the same time (default %default)')
+    parser.add_option(
+        '-t', '--timeout', type='float', default=PROBE_TIMEOUT,
+        help=('seconds to wait for each program to report its version '
+              '(default %default)'))
+    parser.add_option(
+        '--total-timeout', type='float', default=TOTAL_TIMEOUT,
+        help='seconds to spend on all the checks (default %default)')
+    parser.add_option(
+        '--deep', action='store_true',
+        help=('import Python packages to check that they work, rather than '
+              'just looking for them (slower)'))
+    parser.add_option(
+        '-e', '--environments', action='store_true',
+        help=('also look for the Python packages in every Python '
+              'installation we can find'))
+    parser.add_option(
+        '--json', metavar='FILE',
+        help=('also write a report for your instructor to FILE '
+              '("-" for standard output, in which case everything else '
+              'goes to standard error)'))
+    parser.add_option(
+        '--fresh', action='store_true',
+        help='check everything again, ignoring the results of earlier runs')
     options,args = parser.parse_args()
+    if options.json == '-':
+        # keep standard output for the report alone, so it can be parsed
+        _json_stream = _sys.stdout
+        _sys.stdout = _sys.stderr
     try:
-        passed = check(args)
+        passed = check(
+            args, jobs=options.jobs, timeout=options.timeout,
+            total_timeout=options.total_timeout, deep=options.deep,
+            fresh=options.fresh, json_file=options.json)
+        if options.environments:
+            checkers = [CHECKER[check] for check in (args or CHECKS)]
+            print_environment_matrix(
+                probe_environments(
+                    find_python_interpreters(), checkers, jobs=options.jobs,
+                    deep=options.deep, timeout=options.timeout),
+                checkers)
     except InvalidCheck as e:
         print("I don't know how to check for {0!r}".format(e.check))
         print('I do know how to check for:')